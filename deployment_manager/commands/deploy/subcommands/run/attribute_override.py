@@ -1,8 +1,4 @@
-import difflib
-import json
 import re
-import subprocess
-import tempfile
 
 import jmespath
 from rossum_api.domain_logic.resources import Resource
@@ -116,48 +112,6 @@ class AttributeOverrider:
         else:
             del object[key]
 
-    def create_override_diff(self, before_object: dict, after_object: dict):
-        """Displays both implicit and explicit overrides (the explicit applied already when uploading the file itself)"""
-        # Do not display diffs in ID, but the ID must be retained for later reference
-        after_object_id = after_object.pop("id", None)
-        after_object_url = after_object.pop("url", None)
-        before_object.pop("id", None)
-        before_object.pop("url", None)
-        before_code = before_object.get("config", {}).get("code", "")
-        after_code = after_object.get("config", {}).get("code", "")
-        code_diff = ""
-
-        if before_code and after_code:
-            # codes will be compared separately
-            del before_object["config"]["code"]
-            del after_object["config"]["code"]
-
-            before_code = before_code.splitlines()
-            after_code = after_code.splitlines()
-
-            code_diff = difflib.unified_diff(before_code, after_code, fromfile="before", tofile="after", lineterm="")
-            code_diff = "\n".join(list(code_diff))
-
-            if code_diff:
-                code_diff = f"{'*'*80}\nconfig.code diff:\n{'*'*80}\n{code_diff}"
-
-        with tempfile.NamedTemporaryFile() as tf1, tempfile.NamedTemporaryFile() as tf2:
-            tf1.write(bytes(json.dumps(before_object, indent=2), "UTF-8"))
-            tf2.write(bytes(json.dumps(after_object, indent=2), "UTF-8"))
-            # Has to be manually seeked back to start
-            tf1.seek(0)
-            tf2.seek(0)
-
-            diff = subprocess.run(
-                ["diff", tf1.name, tf2.name, "-U" "3"],
-                capture_output=True,
-                text=True,
-            )
-            after_object["id"] = after_object_id
-            after_object["url"] = after_object_url
-
-            return diff.stdout + code_diff
-
     @classmethod
     def parse_diff(cls, diff: str):
         colorized_lines = []
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import TYPE_CHECKING
 
@@ -43,6 +44,7 @@ from deployment_manager.commands.deploy.subcommands.run.models import (
     Target,
     TargetWithDefault,
 )
+from deployment_manager.commands.deploy.subcommands.run.remote_object_cache import RemoteObjectCache
 from deployment_manager.common.read_write import read_object_from_json, write_object_to_json
 from deployment_manager.utils.consts import display_error, display_warning, settings
 from deployment_manager.utils.functions import extract_id_from_url, gather_with_concurrency, templatize_name_id
@@ -50,6 +52,15 @@ from deployment_manager.utils.functions import extract_id_from_url, gather_with_
 console = Console()
 
 
+class TargetComparison(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    target: TargetWithDefault
+    last_applied: dict
+    conflicts: dict
+    rebase_candidates: dict
+
+
 # TODO: prebuilt exceptions that automatically reference the type/name/id of object
 class DeployObject(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -79,6 +90,10 @@ class DeployObject(BaseModel):
     overrider: AttributeOverrider = None
     ref_replacer: ReferenceReplacer = None
 
+    # Computed concurrently for all objects before the (sequential) prompts and prints
+    prepared_comparisons: list[TargetComparison] = None
+    prepared_plan: list[str] = None
+
     async def initialize_deploy_object(self, deploy_file: "DeployOrchestrator"):
         self.deploy_file = deploy_file
         self.yaml_reference = self.get_object_in_yaml()
@@ -145,9 +160,14 @@ class DeployObject(BaseModel):
             self.overrider.override_attributes_v2(object=data_copy, attribute_overrides=target.attribute_override)
 
             target.pre_reference_replace_data = data_copy
-            target.visualized_plan_data = deepcopy(data_copy)
-            target.first_deploy_data = deepcopy(data_copy)
-            target.second_deploy_data = deepcopy(data_copy)
+            target.visualized_plan_data = self.copy_phase_data(data_copy)
+            target.first_deploy_data = self.copy_phase_data(data_copy)
+            target.second_deploy_data = self.copy_phase_data(data_copy)
+
+    def copy_phase_data(self, data: dict) -> dict:
+        """Copy of the target data for one deploy phase, the big attributes that no phase modifies stay shared"""
+        shared_keys = settings.DEPLOY_SHARED_KEYS.get(self.type, [])
+        return {key: value if key in shared_keys else deepcopy(value) for key, value in data.items()}
 
     async def initialize_target_object_data(self, data: dict, target: Target):
         """Method for specific deploy_objects (e.g., hooks) to add their custom logic"""
@@ -189,8 +209,15 @@ class DeployObject(BaseModel):
     def create_source_to_target_string(self, target: dict):
         return f'"{self.name} ([purple]{self.id}[/purple])" -> "{target["name"]} ([purple]{target["id"]}[/purple])"'
 
+    @property
+    def remote_object_cache(self) -> RemoteObjectCache | None:
+        return getattr(self.deploy_file, "remote_object_cache", None)
+
     async def get_remote_object(self, remote_object_id):
+        """The target objects are prefetched by the orchestrator, the others are fetched once per deploy."""
         try:
+            if self.remote_object_cache:
+                return await self.remote_object_cache.get(self.type, remote_object_id)
             return await self.deploy_file.client._http_client.fetch_one(self.type, remote_object_id)
         except APIClientError as e:
             if e.status_code == 404:
@@ -199,6 +226,10 @@ class DeployObject(BaseModel):
                 ) from None
             raise e
 
+    def remember_remote_object(self, remote_object: dict):
+        if self.remote_object_cache and remote_object and (id := remote_object.get("id", None)):
+            self.remote_object_cache.set(self.type, id, remote_object)
+
     def update_targets(self):
         for target in self.targets:
             # In case of errors, do not overwrite the existing target ID, the object still exists
@@ -226,6 +257,7 @@ class DeployObject(BaseModel):
                 lookup_table=self.deploy_file.lookup_table,
                 target_object_index=target.index,
                 num_targets=len(self.targets),
+                source_id_matcher=self.deploy_file.source_id_matcher,
             )
 
             if target.exists_on_remote:
@@ -241,15 +273,16 @@ class DeployObject(BaseModel):
         try:
             data = getattr(target, data_attribute)
 
-            create_copy = deepcopy(data)
             # Temporary fix because some objects like rules fail if ID is sent
-            create_copy.pop("id", None)
+            # The payload is only serialized, the nested values do not need to be copied
+            create_copy = {key: value for key, value in data.items() if key != "id"}
 
             result = await self.deploy_file.client._http_client.create(self.type, create_copy)
             # Remember last_applied only if the API call succeeds
             target.last_applied_data = self.scrub_attributes(data)
             target.data_from_remote = result
             target.update_after_first_create()
+            self.remember_remote_object(result)
 
             pprint(f"{settings.CREATE_PRINT_STR} {self.display_type}: {self.create_source_to_target_string(result)}.")
         except Exception as e:
@@ -264,9 +297,9 @@ class DeployObject(BaseModel):
         try:
             data = getattr(target, data_attribute)
 
-            update_copy = deepcopy(data)
             # Temporary fix because some objects like rules fail if ID is sent
-            update_copy.pop("id", None)
+            # The payload is only serialized, the nested values do not need to be copied
+            update_copy = {key: value for key, value in data.items() if key != "id"}
 
             result = await self.deploy_file.client._http_client.update(
                 resource=self.type, id_=target.id, data=update_copy
@@ -274,6 +307,7 @@ class DeployObject(BaseModel):
             # Only if the API call succeeds
             target.last_applied_data = self.scrub_attributes(data)
             target.data_from_remote = result
+            self.remember_remote_object(result)
 
             pprint(f"{settings.UPDATE_PRINT_STR} {self.display_type}: {self.create_source_to_target_string(result)}.")
         except Exception as e:
@@ -288,6 +322,8 @@ class DeployObject(BaseModel):
         try:
             if not self.plan_only:
                 await self.deploy_file.client._http_client.delete(self.type, id_=target.id)
+                if self.remote_object_cache:
+                    self.remote_object_cache.forget(self.type, target.id)
 
             pprint(
                 f"{settings.PLAN_PRINT_STR if self.plan_only else ''} {settings.DELETE_PRINT_STR} {self.display_type}: [purple]({target.id})[/purple]."
@@ -309,6 +345,7 @@ class DeployObject(BaseModel):
                 lookup_table=self.deploy_file.lookup_table,
                 target_object_index=target.index,
                 num_targets=len(self.targets),
+                source_id_matcher=self.deploy_file.source_id_matcher,
             )
 
             await self.override_references_in_target_object_data(
@@ -392,45 +429,68 @@ class DeployObject(BaseModel):
         for key in ignored_keys_for_type:
             data.pop(key, None)
 
+    async def compare_target_object(self, target: TargetWithDefault) -> TargetComparison:
+        """Merges the target with the source, without any user interaction."""
+        # Get last applied from deploy state
+        last_applied = (
+            self.deploy_file.deploy_state.get_last_applied(
+                resource_type=self.type,
+                source_id=self.id,
+                target_id=target.id,
+                direction="forward",
+            )
+            or {}
+        )
+
+        remote_object = await self.get_remote_object(target.id)
+        self.remove_ignored_attributes(remote_object)
+
+        # Use visualized version (with dummy refs) for comparison
+        # This allows comparing against last_applied and knowing if new references were added (target references will equal, dummy refs will not because they are not in last_applied)
+        _, conflicts, rebase_candidates = deep_three_way_merge(
+            last_applied=last_applied,
+            source=target.visualized_plan_data,
+            target=remote_object,
+            prefer=self.deploy_file.prefer,
+            override_fields=[],
+            ignored_fields=[
+                "id",
+                "url",
+                *self.ignored_attributes,
+            ],
+            derived_fields=last_applied.get("derived_fields", []),
+        )
+        return TargetComparison(
+            target=target, last_applied=last_applied, conflicts=conflicts, rebase_candidates=rebase_candidates
+        )
+
+    async def create_target_comparisons(self) -> list[TargetComparison]:
+        # No point comparing what does not yet exist
+        return await gather_with_concurrency(
+            *[self.compare_target_object(target) for target in self.targets if target.exists_on_remote]
+        )
+
+    async def prepare_comparisons(self):
+        try:
+            self.prepared_comparisons = await self.create_target_comparisons()
+        except Exception:
+            # compare_target_objects tries again and reports the error in its place
+            self.prepared_comparisons = None
+
     # TODO: if source has multiple targets, rebasing should be done in attr_override, not in source itself
     async def compare_target_objects(self):
         try:
-            for target in self.targets:
-                # No point comparing what does not yet exist
-                if not target.exists_on_remote:
-                    continue
-
-                # Get last applied from deploy state
-                last_applied = (
-                    self.deploy_file.deploy_state.get_last_applied(
-                        resource_type=self.type,
-                        source_id=self.id,
-                        target_id=target.id,
-                        direction="forward",
-                    )
-                    or {}
-                )
+            comparisons = self.prepared_comparisons
+            self.prepared_comparisons = None
+            if comparisons is None:
+                comparisons = await self.create_target_comparisons()
 
-                remote_object = await self.get_remote_object(target.id)
-                self.remove_ignored_attributes(remote_object)
-
-                # Use visualized version (with dummy refs) for comparison
-                # This allows comparing against last_applied and knowing if new references were added (target references will equal, dummy refs will not because they are not in last_applied)
-                _, conflicts, rebase_candidates = deep_three_way_merge(
-                    last_applied=last_applied,
-                    source=target.visualized_plan_data,
-                    target=remote_object,
-                    prefer=self.deploy_file.prefer,
-                    override_fields=[],
-                    ignored_fields=[
-                        "id",
-                        "url",
-                        *self.ignored_attributes,
-                    ],
-                    derived_fields=last_applied.get("derived_fields", []),
-                )
+            for comparison in comparisons:
+                target = comparison.target
+                last_applied = comparison.last_applied
+                conflicts = comparison.conflicts
 
-                for path, target_val in rebase_candidates.items():
+                for path, target_val in comparison.rebase_candidates.items():
                     if self.rebase_none:
                         break
 
@@ -442,12 +502,8 @@ class DeployObject(BaseModel):
                         ReferenceDetectionStatus.UNKNOWN,
                     ]:
                         if reference_type:
-                            target_val = ReferenceReplacer.reverse_target_reference_into_source(
-                                value=target_val,
-                                reference_type=reference_type,
-                                reverse_lookup_table=self.deploy_file.reverse_lookup_table,
-                                source_base_url=self.deploy_file.source_client._http_client.base_url,
-                                target_base_url=self.deploy_file.client._http_client.base_url,
+                            target_val = self.deploy_file.reverse_reference_translator.translate(
+                                value=target_val, reference_type=reference_type
                             )
                         else:
                             target_val = ReferenceReplacer.reverse_unknown_reference_type(target_val)
@@ -543,12 +599,8 @@ class DeployObject(BaseModel):
                             ReferenceDetectionStatus.UNKNOWN,
                         ]:
                             if reference_type:
-                                target_val = ReferenceReplacer.reverse_target_reference_into_source(
-                                    value=target_val,
-                                    reference_type=reference_type,
-                                    reverse_lookup_table=self.deploy_file.reverse_lookup_table,
-                                    source_base_url=self.deploy_file.source_client._http_client.base_url,
-                                    target_base_url=self.deploy_file.client._http_client.base_url,
+                                target_val = self.deploy_file.reverse_reference_translator.translate(
+                                    value=target_val, reference_type=reference_type
                                 )
                             else:
                                 target_val = ReferenceReplacer.reverse_unknown_reference_type(target_val)
@@ -575,24 +627,43 @@ class DeployObject(BaseModel):
             )
             self.deploy_failed = True
 
-    async def visualize_changes(self):
-        for target in self.targets:
-            # When updating, take the real remote object
-            # The diff comparison will then show only overrides that are not on the remote already (not all overrides from source)
-            if target.exists_on_remote:
-                overriden_object_data = await self.get_remote_object(target.id)
-            else:
-                overriden_object_data = {}
+    async def create_plan_message(self, target: TargetWithDefault) -> str:
+        # When updating, take the real remote object
+        # The diff comparison will then show only overrides that are not on the remote already (not all overrides from source)
+        if target.exists_on_remote:
+            overriden_object_data = await self.get_remote_object(target.id)
+        else:
+            overriden_object_data = {}
+
+        self.remove_ignored_attributes(overriden_object_data)
+        self.sort_lists(overriden_object_data)
+
+        self.sort_lists(target.visualized_plan_data)
+
+        plan_label = f"{settings.PLAN_PRINT_STR} {settings.UPDATE_PRINT_STR if target.exists_on_remote else settings.CREATE_PRINT_STR}"
+        # Off the event loop, so that the remote objects of other plans keep being fetched meanwhile
+        diff = await asyncio.to_thread(
+            DeployObjectDiffer.create_override_diff, overriden_object_data, target.visualized_plan_data
+        )
+        colorized_diff = DeployObjectDiffer.parse_diff(diff)
+        return f"{plan_label} {self.display_type} {self.create_source_to_target_string(target.visualized_plan_data)}:\n{colorized_diff if colorized_diff else ''}"
 
-            self.remove_ignored_attributes(overriden_object_data)
-            self.sort_lists(overriden_object_data)
+    async def prepare_plan(self):
+        try:
+            self.prepared_plan = await gather_with_concurrency(
+                *[self.create_plan_message(target) for target in self.targets]
+            )
+        except Exception:
+            # visualize_changes tries again and raises the error in its place
+            self.prepared_plan = None
 
-            self.sort_lists(target.visualized_plan_data)
+    async def visualize_changes(self):
+        messages = self.prepared_plan
+        self.prepared_plan = None
+        if messages is None:
+            messages = [await self.create_plan_message(target) for target in self.targets]
 
-            plan_label = f"{settings.PLAN_PRINT_STR} {settings.UPDATE_PRINT_STR if target.exists_on_remote else settings.CREATE_PRINT_STR}"
-            diff = DeployObjectDiffer.create_override_diff(overriden_object_data, target.visualized_plan_data)
-            colorized_diff = DeployObjectDiffer.parse_diff(diff)
-            message = f"{plan_label} {self.display_type} {self.create_source_to_target_string(target.visualized_plan_data)}:\n{colorized_diff if colorized_diff else ''}"
+        for message in messages:
             pprint(Panel(message))
 
     async def resolve_code_conflict(self, attribute_path: str, last_applied: dict, target_val: str): ...
@@ -625,6 +696,8 @@ class EmptyDeployObject(BaseModel):
     async def deploy_target_objects(self, *args, **kwargs): ...
     async def override_references(self, *args, **kwargs): ...
     async def override_references_in_target_object_data(self, *args, **kwargs): ...
+    async def prepare_comparisons(self, *args, **kwargs): ...
+    async def prepare_plan(self, *args, **kwargs): ...
     async def visualize_changes(self, *args, **kwargs): ...
 
     @property
@@ -1,11 +1,10 @@
-import difflib
-import json
-import subprocess
-import tempfile
-from copy import deepcopy
-
 from rich.markup import escape
 
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.json_diff import (
+    create_code_diff,
+    create_json_diff,
+)
+
 
 class DeployObjectDiffer:
     @classmethod
@@ -13,13 +12,9 @@ class DeployObjectDiffer:
         """Displays both implicit and explicit overrides (the explicit applied already when uploading the file itself)"""
         # Do not display diffs in ID, but the ID must be retained for later reference
 
-        after_object_copy = deepcopy(after_object)
-        after_object_copy.pop("id", None)
-        after_object_copy.pop("url", None)
-
-        before_object_copy = deepcopy(before_object)
-        before_object_copy.pop("id", None)
-        before_object_copy.pop("url", None)
+        # Shallow copies are enough, nothing nested is modified
+        after_object_copy = {key: value for key, value in after_object.items() if key not in ("id", "url")}
+        before_object_copy = {key: value for key, value in before_object.items() if key not in ("id", "url")}
 
         before_code = before_object_copy.get("config", {}).get("code", "")
         after_code = after_object_copy.get("config", {}).get("code", "")
@@ -27,32 +22,12 @@ class DeployObjectDiffer:
 
         if before_code and after_code:
             # codes will be compared separately
-            del before_object_copy["config"]["code"]
-            del after_object_copy["config"]["code"]
-
-            before_code = before_code.splitlines()
-            after_code = after_code.splitlines()
-
-            code_diff = difflib.unified_diff(before_code, after_code, fromfile="before", tofile="after", lineterm="")
-            code_diff = "\n".join(list(code_diff))
-
-            if code_diff:
-                code_diff = f"{'*'*80}\nconfig.code diff:\n{'*'*80}\n{code_diff}"
-
-        with tempfile.NamedTemporaryFile() as tf1, tempfile.NamedTemporaryFile() as tf2:
-            tf1.write(bytes(json.dumps(before_object_copy, indent=2, sort_keys=True), "UTF-8"))
-            tf2.write(bytes(json.dumps(after_object_copy, indent=2, sort_keys=True), "UTF-8"))
-            # Has to be manually seeked back to start
-            tf1.seek(0)
-            tf2.seek(0)
+            before_object_copy["config"] = {k: v for k, v in before_object_copy["config"].items() if k != "code"}
+            after_object_copy["config"] = {k: v for k, v in after_object_copy["config"].items() if k != "code"}
 
-            diff = subprocess.run(
-                ["diff", tf1.name, tf2.name, "-U" "3"],
-                capture_output=True,
-                text=True,
-            )
+            code_diff = create_code_diff(before_code, after_code)
 
-            return diff.stdout + code_diff
+        return create_json_diff(before_object_copy, after_object_copy) + code_diff
 
     @classmethod
     def parse_diff(cls, diff: str):
@@ -29,6 +29,11 @@ class EmailTemplateDeployObject(DeployObject):
             return
         await super().deploy_target_objects(data_attribute)
 
+    async def prepare_plan(self):
+        if self.non_creatable:
+            return
+        await super().prepare_plan()
+
     async def visualize_changes(self):
         # Non-creatable types are not deployed, so don't show them in plan
         if self.non_creatable:
@@ -88,6 +88,7 @@ class HookDeployObject(DeployObject):
             target.last_applied_data = self.scrub_attributes(data)
             target.data_from_remote = result
             target.update_after_first_create()
+            self.remember_remote_object(result)
 
             pprint(f"{settings.CREATE_PRINT_STR} {self.display_type}: {self.create_source_to_target_string(result)}.")
             return result
@@ -153,9 +154,10 @@ class HookDeployObject(DeployObject):
                 "runtime",
                 "private",
             ]
-            hook_config = hook.get("config", {})
-            for field in fields_to_remove:
-                hook_config.pop(field, None)
+            # The config is shared with the other deploy phases, so it is replaced instead of modified
+            hook["config"] = {
+                key: value for key, value in hook.get("config", {}).items() if key not in fields_to_remove
+            }
 
         # Do not try patching the type of extension in case it changed (e.g., SF to lambda)
         hook.pop("type", None)
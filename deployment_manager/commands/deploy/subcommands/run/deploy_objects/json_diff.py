@@ -0,0 +1,217 @@
+import difflib
+import json
+
+DIFF_CONTEXT_LINES = 3
+JSON_INDENT = "  "
+
+
+class JsonDiff:
+    """Line diff of two objects dumped to JSON (indent=2, sorted keys) computed structurally.
+
+    Only the dicts and lists that changed are walked item by item, unchanged values are dumped as whole blocks.
+    The resulting opcodes are the same kind as from difflib.SequenceMatcher.
+    """
+
+    def __init__(self):
+        self.before_lines: list[str] = []
+        self.after_lines: list[str] = []
+        self.opcodes: list[tuple[str, int, int, int, int]] = []
+
+    def add_opcode(self, tag: str, i1: int, i2: int, j1: int, j2: int):
+        if i1 == i2 and j1 == j2:
+            return
+        # Adjacent equal ranges are merged so that the hunks are grouped like by difflib
+        if self.opcodes and tag == "equal" and self.opcodes[-1][0] == "equal":
+            self.opcodes[-1] = ("equal", self.opcodes[-1][1], i2, self.opcodes[-1][3], j2)
+        else:
+            self.opcodes.append((tag, i1, i2, j1, j2))
+
+    @staticmethod
+    def dump_block(value, prefix: str, level: int, comma: bool) -> list[str]:
+        indent = JSON_INDENT * level
+        lines = [f"{indent}{line}" for line in json.dumps(value, indent=2, sort_keys=True).splitlines()]
+        lines[0] = f"{indent}{prefix}{lines[0][len(indent):]}"
+        if comma:
+            lines[-1] += ","
+        return lines
+
+    @staticmethod
+    def with_key(lines: list[str], prefix: str, comma: bool) -> list[str]:
+        """Copy of a block dumped without a key and a trailing comma."""
+        if not prefix and not comma:
+            return lines
+        lines = lines.copy()
+        indent_length = len(lines[0]) - len(lines[0].lstrip(" "))
+        lines[0] = f"{lines[0][:indent_length]}{prefix}{lines[0][indent_length:]}"
+        if comma:
+            lines[-1] += ","
+        return lines
+
+    def add_lines(self, lines: list[str], before: bool) -> tuple[int, int]:
+        target = self.before_lines if before else self.after_lines
+        start = len(target)
+        target.extend(lines)
+        return start, len(target)
+
+    def diff_blocks(self, before_block: list[str], after_block: list[str]):
+        i1, i2 = self.add_lines(before_block, before=True)
+        j1, j2 = self.add_lines(after_block, before=False)
+        if before_block == after_block:
+            self.add_opcode("equal", i1, i2, j1, j2)
+            return
+
+        for tag, bi1, bi2, bj1, bj2 in difflib.SequenceMatcher(None, before_block, after_block).get_opcodes():
+            self.add_opcode(tag, i1 + bi1, i1 + bi2, j1 + bj1, j1 + bj2)
+
+    def diff(
+        self,
+        before,
+        after,
+        before_prefix: str = "",
+        after_prefix: str = "",
+        level: int = 0,
+        commas: tuple[bool, bool] = (False, False),
+    ):
+        """Appends the lines of both values (with their keys and trailing commas) and the opcodes comparing them."""
+        is_dict = isinstance(before, dict) and isinstance(after, dict)
+        is_list = isinstance(before, list) and isinstance(after, list) and len(before) == len(after)
+        if are_json_equal(before, after):
+            lines = self.dump_block(before, "", level, False)
+            self.diff_blocks(
+                self.with_key(lines, before_prefix, commas[0]), self.with_key(lines, after_prefix, commas[1])
+            )
+            return
+
+        if not (is_dict or is_list) or not before or not after:
+            self.diff_blocks(
+                self.dump_block(before, before_prefix, level, commas[0]),
+                self.dump_block(after, after_prefix, level, commas[1]),
+            )
+            return
+
+        indent = JSON_INDENT * level
+        opening = "{" if is_dict else "["
+        self.diff_blocks([f"{indent}{before_prefix}{opening}"], [f"{indent}{after_prefix}{opening}"])
+
+        if is_dict:
+            self.diff_dict_items(before, after, level + 1)
+        else:
+            for index, (before_item, after_item) in enumerate(zip(before, after)):
+                comma = index < len(before) - 1
+                self.diff(before_item, after_item, level=level + 1, commas=(comma, comma))
+
+        closing = "}" if is_dict else "]"
+        self.diff_blocks(
+            [f"{indent}{closing}{',' if commas[0] else ''}"], [f"{indent}{closing}{',' if commas[1] else ''}"]
+        )
+
+    def diff_dict_items(self, before: dict, after: dict, level: int):
+        before_keys, after_keys = sorted(before.keys()), sorted(after.keys())
+        before_index, after_index = 0, 0
+        while before_index < len(before_keys) or after_index < len(after_keys):
+            before_key = before_keys[before_index] if before_index < len(before_keys) else None
+            after_key = after_keys[after_index] if after_index < len(after_keys) else None
+            before_comma = before_index < len(before_keys) - 1
+            after_comma = after_index < len(after_keys) - 1
+
+            if after_key is None or (before_key is not None and before_key < after_key):
+                lines = self.dump_block(before[before_key], f"{dump_json_key(before_key)}: ", level, before_comma)
+                i1, i2 = self.add_lines(lines, before=True)
+                j = len(self.after_lines)
+                self.add_opcode("delete", i1, i2, j, j)
+                before_index += 1
+            elif before_key is None or after_key < before_key:
+                lines = self.dump_block(after[after_key], f"{dump_json_key(after_key)}: ", level, after_comma)
+                i = len(self.before_lines)
+                j1, j2 = self.add_lines(lines, before=False)
+                self.add_opcode("insert", i, i, j1, j2)
+                after_index += 1
+            else:
+                prefix = f"{dump_json_key(before_key)}: "
+                self.diff(before[before_key], after[after_key], prefix, prefix, level, (before_comma, after_comma))
+                before_index += 1
+                after_index += 1
+
+
+def are_json_equal(before, after, sort_keys: bool = True) -> bool:
+    # Compared also as (quick to create) compact JSON, True == 1 in Python but not in JSON
+    return before == after and json.dumps(before, sort_keys=sort_keys) == json.dumps(after, sort_keys=sort_keys)
+
+
+def dump_json_key(key) -> str:
+    # The same key conversion as in json.dumps (e.g., 1 -> "1", True -> "true")
+    return json.dumps(key if isinstance(key, str) else json.dumps(key))
+
+
+class OpcodesMatcher(difflib.SequenceMatcher):
+    """Reuses difflib's grouping of changes into hunks for precomputed opcodes."""
+
+    def __init__(self, opcodes: list[tuple]):
+        super().__init__(None, [], [])
+        self.opcodes = opcodes
+
+    def get_opcodes(self):
+        return self.opcodes
+
+
+def format_unified_range(start: int, stop: int) -> str:
+    # Same as in difflib, lines are numbered from 1 and an empty range points to the line before it
+    length = stop - start
+    if length == 1:
+        return f"{start + 1}"
+    if not length:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def create_json_diff(before_object: dict, after_object: dict, sort_keys: bool = True) -> str:
+    """Unified diff (like `diff -U 3`) of the objects dumped to JSON with indent=2, computed in-process."""
+    if are_json_equal(before_object, after_object, sort_keys):
+        return ""
+
+    if sort_keys:
+        json_diff = JsonDiff()
+        json_diff.diff(before_object, after_object)
+        before_lines, after_lines = json_diff.before_lines, json_diff.after_lines
+        matcher = OpcodesMatcher(json_diff.opcodes)
+    else:
+        # Keys of the objects can be in a different order, they cannot be paired
+        before_lines = json.dumps(before_object, indent=2).splitlines()
+        after_lines = json.dumps(after_object, indent=2).splitlines()
+        matcher = difflib.SequenceMatcher(None, before_lines, after_lines)
+
+    if before_lines == after_lines:
+        return ""
+
+    diff_lines = ["--- before", "+++ after"]
+    for group in matcher.get_grouped_opcodes(DIFF_CONTEXT_LINES):
+        first, last = group[0], group[-1]
+        diff_lines.append(
+            f"@@ -{format_unified_range(first[1], last[2])} +{format_unified_range(first[3], last[4])} @@"
+        )
+        # Removed lines of adjacent changes go before the added ones, like in diff
+        removed_lines, added_lines = [], []
+        for tag, i1, i2, j1, j2 in [*group, ("equal", 0, 0, 0, 0)]:
+            if tag == "equal":
+                diff_lines.extend(removed_lines + added_lines)
+                removed_lines, added_lines = [], []
+                diff_lines.extend(f" {line}" for line in before_lines[i1:i2])
+                continue
+            removed_lines.extend(f"-{line}" for line in before_lines[i1:i2])
+            added_lines.extend(f"+{line}" for line in after_lines[j1:j2])
+
+    return "\n".join(diff_lines) + "\n"
+
+
+def create_code_diff(before_code: str, after_code: str) -> str:
+    """Line diff of hook code, shown separately from the rest of the object."""
+    if before_code == after_code:
+        return ""
+
+    code_diff = difflib.unified_diff(
+        before_code.splitlines(), after_code.splitlines(), fromfile="before", tofile="after", lineterm=""
+    )
+    code_diff = "\n".join(list(code_diff))
+    if code_diff:
+        code_diff = f"{'*'*80}\nconfig.code diff:\n{'*'*80}\n{code_diff}"
+    return code_diff
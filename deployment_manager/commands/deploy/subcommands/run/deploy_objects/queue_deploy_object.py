@@ -336,13 +336,14 @@ class QueueDeployObject(DeployObject):
             return
 
         try:
-            target_queue = await self.deploy_file.client.retrieve_queue(target.id)
-            queue["automation_enabled"] = target_queue.automation_enabled
-            queue["automation_level"] = target_queue.automation_level
-            queue["default_score_threshold"] = target_queue.default_score_threshold
-
-            queue.get("settings", {})["columns"] = target_queue.settings.get("columns", [])
-            queue.get("settings", {})["annotation_list_table"] = target_queue.settings.get("annotation_list_table", {})
+            target_queue = await self.get_remote_object(target.id)
+            queue["automation_enabled"] = target_queue.get("automation_enabled", None)
+            queue["automation_level"] = target_queue.get("automation_level", None)
+            queue["default_score_threshold"] = target_queue.get("default_score_threshold", None)
+
+            target_settings = target_queue.get("settings", None) or {}
+            queue.get("settings", {})["columns"] = target_settings.get("columns", [])
+            queue.get("settings", {})["annotation_list_table"] = target_settings.get("annotation_list_table", {})
 
         except Exception as e:
             raise Exception("Error while ignoring queue AI fields") from e
@@ -15,6 +15,107 @@ if TYPE_CHECKING:
     from deployment_manager.commands.deploy.subcommands.run.deploy_objects.base_deploy_object import DeployObject
 
 
+DIGIT_RUN_REGEX = re.compile(r"[0-9]+")
+
+
+class SourceIdMatcher:
+    """Finds all source IDs of the lookup table contained in a value in a single pass over the value.
+
+    Numeric IDs can only occur inside runs of digits, so only the substrings of these runs
+    with the lengths of the known IDs are looked up. Other IDs are still searched for one by one.
+    Keys that are written the same (e.g., 123 and "123") are all found.
+    """
+
+    def __init__(self, source_ids: list):
+        self.source_ids = source_ids
+        self.numeric_positions: dict[str, list[int]] = {}
+        self.other_ids: list[tuple[int, str]] = []
+        for position, source_id in enumerate(source_ids):
+            source_id_str = str(source_id)
+            if source_id_str.isascii() and source_id_str.isdigit():
+                self.numeric_positions.setdefault(source_id_str, []).append(position)
+            elif source_id_str:
+                self.other_ids.append((position, source_id_str))
+        self.lengths = sorted({len(source_id_str) for source_id_str in self.numeric_positions})
+
+    def find(self, value: str | int) -> list:
+        """Source IDs contained in the value, in the order of the lookup table."""
+        value = str(value)
+        positions = set()
+        for match in DIGIT_RUN_REGEX.finditer(value):
+            run = match.group()
+            for length in self.lengths:
+                if length > len(run):
+                    break
+                for start in range(len(run) - length + 1):
+                    positions.update(self.numeric_positions.get(run[start : start + length], []))
+
+        for position, source_id_str in self.other_ids:
+            if source_id_str in value:
+                positions.add(position)
+
+        return [self.source_ids[position] for position in sorted(positions)]
+
+
+# Whole numbers only, e.g., "12" is not replaced in "123" or "v12"
+ID_TOKEN_REGEX = re.compile(r"(?<!\w)[0-9]+(?!\w)")
+
+
+class ReverseReferenceTranslator:
+    """Translates target references back into source ones (for rebases and conflicts).
+
+    The reverse lookup table is compiled per object type on first use, a whole nested value is translated in one traversal.
+    """
+
+    def __init__(self, reverse_lookup_table: ReverseLookupTable, source_base_url: str, target_base_url: str):
+        self.reverse_lookup_table = reverse_lookup_table
+        self.source_base_url = source_base_url
+        self.target_base_url = target_base_url
+        self._compiled: dict[Resource, tuple[dict[str, str], list[tuple[str, str]]]] = {}
+
+    def _compile(self, reference_type: Resource):
+        if reference_type not in self._compiled:
+            numeric_ids = {}
+            other_ids = []
+            for target_id, source_id in self.reverse_lookup_table.get(reference_type, {}).items():
+                if target_id is None:
+                    continue
+                target_id = str(target_id)
+                if target_id.isascii() and target_id.isdigit():
+                    numeric_ids[target_id] = str(source_id)
+                else:
+                    # Dummy IDs of objects that do not exist yet
+                    other_ids.append((target_id, str(source_id)))
+            self._compiled[reference_type] = (numeric_ids, other_ids)
+        return self._compiled[reference_type]
+
+    def _translate_scalar(self, value: str | int, numeric_ids: dict[str, str], other_ids: list[tuple[str, str]]):
+        value = str(value)
+        if numeric_ids:
+            value = ID_TOKEN_REGEX.sub(lambda match: numeric_ids.get(match.group(), match.group()), value)
+        for target_id, source_id in other_ids:
+            if target_id in value:
+                value = value.replace(target_id, source_id)
+
+        if value.startswith(self.target_base_url):
+            value = value.replace(self.target_base_url, self.source_base_url)
+        return value
+
+    def translate(self, value: Any, reference_type: Resource):
+        numeric_ids, other_ids = self._compile(reference_type)
+
+        def translate_value(value: Any):
+            if isinstance(value, str) or isinstance(value, int):
+                return self._translate_scalar(value, numeric_ids, other_ids)
+            elif isinstance(value, list):
+                return [translate_value(v) for v in value]
+            elif isinstance(value, dict):
+                return {k: translate_value(v) for k, v in value.items()}
+            return value
+
+        return translate_value(value)
+
+
 class ReferenceReplacer:
     type: Resource
     parent_object_reference: "DeployObject"
@@ -43,22 +144,23 @@ class ReferenceReplacer:
         lookup_table: LookupTable,
         target_object_index: int,
         num_targets: int,
+        source_id_matcher: SourceIdMatcher = None,
     ):
         """
         Traverses selected "free-form" attributes like settings and replaces IDs of known objects using the lookup table
+        The source ID matcher is compiled once by the orchestrator, it is only created here if not given
         """
+        matcher = source_id_matcher
         for key in self.IMPLICIT_OVERRIDE_KEYS:
             if key not in target_object:
                 continue
+            matcher = matcher or SourceIdMatcher(list(lookup_table.keys()))
 
             for parent, key_in_parent, value in traverse_object(target_object, key, target_object[key]):
-                for source_id, types_dict in lookup_table.items():
-                    # source_id_regex = re.compile(f"(?<!\\w)({source_id})(?!\\w)")
-                    # if not re.search(source_id_regex, str(value)):
-                    # continue
-                    if str(source_id) not in str(value):
-                        continue
-                    elif f"{key}.{key_in_parent}" in self.EXACT_MATCH_PATHS and str(source_id) != str(value):
+                # Only the source IDs contained in the value, in the same order as in the lookup table
+                for source_id in matcher.find(value):
+                    types_dict = lookup_table[source_id]
+                    if f"{key}.{key_in_parent}" in self.EXACT_MATCH_PATHS and str(source_id) != str(value):
                         # Skip substring-only matches for paths like "actions.id" where partial ID replacement would corrupt values (e.g., UUIDs)
                         continue
 
@@ -264,48 +366,6 @@ class ReferenceReplacer:
 
         object[dependency_name] = new_urls
 
-    @classmethod
-    def reverse_target_reference_into_source(
-        cls,
-        value: Any,
-        reference_type: Resource,
-        reverse_lookup_table: ReverseLookupTable,
-        source_base_url: str,
-        target_base_url: str,
-    ):
-        if isinstance(value, str) or isinstance(value, int):
-            value = str(value)
-            for target_id, source_id in reverse_lookup_table.get(reference_type, {}).items():
-                if target_id in value:
-                    value = value.replace(target_id, str(source_id))
-
-            if re.compile(target_base_url).match(value):
-                value = value.replace(target_base_url, source_base_url)
-            return value
-        elif isinstance(value, list):
-            return [
-                cls.reverse_target_reference_into_source(
-                    v,
-                    reference_type,
-                    reverse_lookup_table,
-                    source_base_url,
-                    target_base_url,
-                )
-                for v in value
-            ]
-        elif isinstance(value, dict):
-            return {
-                k: cls.reverse_target_reference_into_source(
-                    v,
-                    reference_type,
-                    reverse_lookup_table,
-                    source_base_url,
-                    target_base_url,
-                )
-                for k, v in value.items()
-            }
-        return value
-
     @classmethod
     def reverse_unknown_reference_type(cls, value: Any):
         return f"UNKNOWN_REFERENCE({value})"
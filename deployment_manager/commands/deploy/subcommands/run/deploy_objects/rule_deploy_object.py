@@ -59,11 +59,21 @@ class RuleDeployObject(DeployObject):
         if data_attribute == "second_deploy_data" and not use_dummy_references:
             self.second_deploy_references_overridden = True
 
+    async def prepare_comparisons(self):
+        if self.skipped:
+            return
+        await super().prepare_comparisons()
+
     async def compare_target_objects(self):
         if self.skipped:
             return
         await super().compare_target_objects()
 
+    async def prepare_plan(self):
+        if self.skipped:
+            return
+        await super().prepare_plan()
+
     async def visualize_changes(self):
         if self.skipped:
             return
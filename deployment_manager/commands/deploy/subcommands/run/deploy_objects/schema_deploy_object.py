@@ -111,11 +111,11 @@ class SchemaDeployObject(DeployObject):
             return
 
         try:
-            target_schema = await self.deploy_file.client.retrieve_schema(target.id)
+            target_schema = await self.get_remote_object(target.id)
             schema_ids = find_fields_in_schema(schema["content"])
 
             for schema_id in schema_ids:
-                target_schema_id = find_schema_id(target_schema.content, schema_id["id"])
+                target_schema_id = find_schema_id(target_schema["content"], schema_id["id"])
                 if not target_schema_id:
                     continue
                 if target_schema_id["type"] in ["button"]:
@@ -0,0 +1,154 @@
+import asyncio
+import re
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel, ConfigDict
+
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.base_deploy_object import DeployObject
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.reference_replacer import (
+    ReferenceReplacer,
+    SourceIdMatcher,
+)
+from deployment_manager.commands.deploy.subcommands.run.helpers import traverse_object
+from deployment_manager.common.determine_path import determine_object_type_from_url
+from deployment_manager.utils.consts import settings
+
+# The former deploy waves: an object can only depend on objects deployed in an earlier one
+# (references the other way around are filled in by the second deploy, as before)
+DEPLOY_ORDER = ["engines", "hooks", "labels", "workspaces", "queues", "email_templates", "rules"]
+
+OBJECT_URL_REGEX = re.compile(r"/api/v1/[a-z_]+/\d+$")
+
+
+class DeployNode(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    deploy_object: DeployObject
+    rank: int
+    # Indexes of the nodes that must be deployed first
+    dependencies: list[int] = []
+
+    started_at: float = 0
+    finished_at: float = 0
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+
+def find_referenced_urls(value: Any):
+    if isinstance(value, dict):
+        for nested_value in value.values():
+            yield from find_referenced_urls(nested_value)
+    elif isinstance(value, list):
+        for nested_value in value:
+            yield from find_referenced_urls(nested_value)
+    elif isinstance(value, str) and OBJECT_URL_REGEX.search(value):
+        yield value
+
+
+def get_nested_deploy_objects(deploy_object: DeployObject) -> list[DeployObject]:
+    """The object and the objects it deploys itself (e.g., queue's schema and inbox)."""
+    nested_objects = [deploy_object]
+    for attribute in ("schema_deploy_object", "inbox_deploy_object"):
+        if isinstance(nested_object := getattr(deploy_object, attribute, None), DeployObject):
+            nested_objects.append(nested_object)
+    nested_objects.extend(getattr(deploy_object, "engine_field_deploy_objects", []))
+    return nested_objects
+
+
+def find_referenced_source_ids(deploy_object: DeployObject, source_id_matcher: SourceIdMatcher):
+    """Source IDs referenced in the unstructured attributes (e.g., settings), replaced by the reference replacer."""
+    for key in ReferenceReplacer.IMPLICIT_OVERRIDE_KEYS:
+        if key not in deploy_object.data:
+            continue
+        for _, _, value in traverse_object(deploy_object.data, key, deploy_object.data[key]):
+            yield from source_id_matcher.find(value)
+
+
+def build_deploy_graph(
+    deploy_objects_by_group: dict[str, list[DeployObject]], source_id_matcher: SourceIdMatcher = None
+) -> list[DeployNode]:
+    """Nodes in the former deploy order, each depending on the objects of earlier groups its data references.
+
+    Bare IDs in unstructured attributes are found with the source ID matcher. They do not say the type,
+    so the node depends on all objects of earlier groups with that ID.
+    """
+    nodes = []
+    node_indexes = {}
+    node_indexes_by_id = defaultdict(set)
+    for rank, group in enumerate(DEPLOY_ORDER):
+        for deploy_object in deploy_objects_by_group.get(group, []):
+            for nested_object in get_nested_deploy_objects(deploy_object):
+                node_indexes[(nested_object.type, nested_object.id)] = len(nodes)
+                node_indexes_by_id[str(nested_object.id)].add(len(nodes))
+            nodes.append(DeployNode(deploy_object=deploy_object, rank=rank))
+
+    for index, node in enumerate(nodes):
+        dependencies = set()
+        for nested_object in get_nested_deploy_objects(node.deploy_object):
+            for url in find_referenced_urls(nested_object.data):
+                try:
+                    key = (determine_object_type_from_url(url), int(url.rsplit("/", 1)[-1]))
+                except Exception:
+                    continue
+                dependency_index = node_indexes.get(key, None)
+                if dependency_index is not None and nodes[dependency_index].rank < node.rank:
+                    dependencies.add(dependency_index)
+
+            if not source_id_matcher:
+                continue
+            for source_id in find_referenced_source_ids(nested_object, source_id_matcher):
+                for dependency_index in node_indexes_by_id.get(str(source_id), ()):
+                    if nodes[dependency_index].rank < node.rank:
+                        dependencies.add(dependency_index)
+        node.dependencies = sorted(dependencies)
+
+    return nodes
+
+
+async def run_deploy_graph(nodes: list[DeployNode], deploy: Callable[[DeployObject], Awaitable], n: int = None):
+    """Deploys each object as soon as its dependencies are deployed (at most n at once)."""
+    semaphore = asyncio.Semaphore(n or settings.CONCURRENCY)
+    done = [asyncio.Event() for _ in nodes]
+    errors = []
+
+    async def deploy_node(index: int):
+        node = nodes[index]
+        try:
+            for dependency in node.dependencies:
+                await done[dependency].wait()
+
+            async with semaphore:
+                # Objects not started yet are skipped after an error, the ones in flight finish
+                if errors:
+                    return
+                node.started_at = time.perf_counter()
+                try:
+                    await deploy(node.deploy_object)
+                except Exception as e:
+                    errors.append(e)
+                    raise
+                finally:
+                    node.finished_at = time.perf_counter()
+        finally:
+            done[index].set()
+
+    # An unexpected error stops the whole deploy like it did between the waves,
+    # without cancelling objects being deployed (e.g., created on the remote but not recorded yet)
+    await asyncio.gather(*[deploy_node(index) for index in range(len(nodes))], return_exceptions=True)
+    if errors:
+        raise errors[0]
+
+
+def find_critical_path(nodes: list[DeployNode]) -> list[DeployNode]:
+    """The chain of dependencies that finished last, it determined the total duration."""
+    if not nodes:
+        return []
+
+    path = [max(nodes, key=lambda node: node.finished_at)]
+    while path[-1].dependencies:
+        path.append(max((nodes[index] for index in path[-1].dependencies), key=lambda node: node.finished_at))
+    return list(reversed(path))
@@ -38,6 +38,10 @@ from deployment_manager.commands.deploy.subcommands.run.deploy_objects.organizat
 from deployment_manager.commands.deploy.subcommands.run.deploy_objects.queue_deploy_object import (
     QueueDeployObject,
 )
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.reference_replacer import (
+    ReverseReferenceTranslator,
+    SourceIdMatcher,
+)
 from deployment_manager.commands.deploy.subcommands.run.deploy_objects.rule_deploy_object import (
     RuleDeployObject,
 )
@@ -47,6 +51,14 @@ from deployment_manager.commands.deploy.subcommands.run.deploy_objects.schema_de
 from deployment_manager.commands.deploy.subcommands.run.deploy_objects.workspace_deploy_object import (
     WorkspaceDeployObject,
 )
+from deployment_manager.commands.deploy.subcommands.run.deploy_orchestrator.deploy_graph import (
+    DEPLOY_ORDER,
+    DeployNode,
+    build_deploy_graph,
+    find_critical_path,
+    get_nested_deploy_objects,
+    run_deploy_graph,
+)
 from deployment_manager.commands.deploy.subcommands.run.helpers import DeployYaml
 from deployment_manager.commands.deploy.subcommands.run.merge.state import DeployState
 from deployment_manager.commands.deploy.subcommands.run.models import (
@@ -56,6 +68,7 @@ from deployment_manager.commands.deploy.subcommands.run.models import (
     Target,
     TargetWithDefault,
 )
+from deployment_manager.commands.deploy.subcommands.run.remote_object_cache import RemoteObjectCache
 from deployment_manager.utils.consts import (
     CustomResource,
     display_error,
@@ -105,7 +118,10 @@ class DeployOrchestrator(BaseModel):
     engines: list[EngineDeployObject] = []
 
     lookup_table: LookupTable = {}
+    # Source IDs of the lookup table compiled for the replacing in unstructured attributes
+    source_id_matcher: SourceIdMatcher = None
     reverse_lookup_table: ReverseLookupTable = {}
+    reverse_reference_translator: ReverseReferenceTranslator = None
 
     unselected_hooks: list[int] = []
 
@@ -117,6 +133,9 @@ class DeployOrchestrator(BaseModel):
     # Auto-loaded dependency mappings (source_id -> target_id)
     auto_mappings: dict = {}
 
+    # Target objects fetched during this deploy
+    remote_object_cache: RemoteObjectCache = None
+
     @property
     def is_same_org(self):
         return self.source_org.id == self.target_org.id
@@ -146,6 +165,8 @@ class DeployOrchestrator(BaseModel):
         # Load auto-mappings for auto-loaded dependencies
         self.auto_mappings = self.load_auto_mappings()
 
+        self.remote_object_cache = RemoteObjectCache(client=self.client)
+
         self.organization = OrganizationDeployObject(
             id=self.source_org.id,
             name=self.source_org.name,
@@ -238,83 +259,82 @@ class DeployOrchestrator(BaseModel):
 
         await self.deploy_state.write_deploy_state(Path(self.deploy_state_file))
 
-    async def resolve_non_creatable_email_templates(self):
+    async def resolve_non_creatable_email_template(self, email_template: EmailTemplateDeployObject):
         """Resolve target IDs for non-creatable email template types.
 
         Non-creatable types (rejection_default, email_with_no_processable_attachments)
-        are auto-created with every queue. After queues are deployed, we need to:
+        are auto-created with every queue. After the queue is deployed, we need to:
         1. Query the target queue's email templates
         2. Find the one matching by type
         3. Update our email template target with that ID
         4. Update the lookup table for rule reference replacement
         """
-        for email_template in self.email_templates:
-            if not email_template.non_creatable:
-                continue
+        if not email_template.non_creatable:
+            return
 
-            source_queue_url = email_template.data.get("queue")
-            if not source_queue_url:
-                display_warning(
-                    f"Non-creatable email template {email_template.display_label} has no queue reference, skipping"
-                )
-                continue
+        source_queue_url = email_template.data.get("queue")
+        if not source_queue_url:
+            display_warning(
+                f"Non-creatable email template {email_template.display_label} has no queue reference, skipping"
+            )
+            return
 
-            source_queue_id = extract_id_from_url(source_queue_url)
-            email_type = email_template.data.get("type")
+        source_queue_id = extract_id_from_url(source_queue_url)
+        email_type = email_template.data.get("type")
 
-            # Find the queue deploy object for this source queue
-            queue_deploy_obj = None
-            for queue in self.queues:
-                if queue.id == source_queue_id:
-                    queue_deploy_obj = queue
-                    break
+        # Find the queue deploy object for this source queue
+        queue_deploy_obj = None
+        for queue in self.queues:
+            if queue.id == source_queue_id:
+                queue_deploy_obj = queue
+                break
+
+        if not queue_deploy_obj:
+            display_warning(
+                f"Could not find queue {source_queue_id} for email template {email_template.display_label}. "
+                "The email template reference may not be replaced correctly."
+            )
+            return
 
-            if not queue_deploy_obj:
+        # For each target queue, find the matching email template by type
+        for i, queue_target in enumerate(queue_deploy_obj.targets):
+            target_queue_id = queue_target.id
+            if not target_queue_id:
                 display_warning(
-                    f"Could not find queue {source_queue_id} for email template {email_template.display_label}. "
-                    "The email template reference may not be replaced correctly."
+                    f"Target queue ID not available for email template {email_template.display_label}, skipping"
                 )
                 continue
 
-            # For each target queue, find the matching email template by type
-            for i, queue_target in enumerate(queue_deploy_obj.targets):
-                target_queue_id = queue_target.id
-                if not target_queue_id:
+            try:
+                # Query target queue's email templates (fetch_all returns async generator)
+                target_template_id = None
+                async for template in self.client._http_client.fetch_all(
+                    Resource.EmailTemplate,
+                    params={"queue": target_queue_id},
+                ):
+                    if template.get("type") == email_type:
+                        target_template_id = template["id"]
+                        break
+
+                if target_template_id:
+                    # Update the email template target
+                    if i < len(email_template.targets):
+                        email_template.targets[i].id = target_template_id
+                    else:
+                        # Add new target if needed
+                        email_template.targets.append(TargetWithDefault(id=target_template_id))
+
+                    display_info(
+                        f"Resolved non-creatable email template {email_template.display_label} "
+                        f"(type: {email_type}) -> target ID {target_template_id}"
+                    )
+                else:
                     display_warning(
-                        f"Target queue ID not available for email template {email_template.display_label}, skipping"
+                        f"Could not find email template with type '{email_type}' on target queue {target_queue_id}"
                     )
-                    continue
 
-                try:
-                    # Query target queue's email templates (fetch_all returns async generator)
-                    target_template_id = None
-                    async for template in self.client._http_client.fetch_all(
-                        Resource.EmailTemplate,
-                        params={"queue": target_queue_id},
-                    ):
-                        if template.get("type") == email_type:
-                            target_template_id = template["id"]
-                            break
-
-                    if target_template_id:
-                        # Update the email template target
-                        if i < len(email_template.targets):
-                            email_template.targets[i].id = target_template_id
-                        else:
-                            # Add new target if needed
-                            email_template.targets.append(TargetWithDefault(id=target_template_id))
-
-                        display_info(
-                            f"Resolved non-creatable email template {email_template.display_label} "
-                            f"(type: {email_type}) -> target ID {target_template_id}"
-                        )
-                    else:
-                        display_warning(
-                            f"Could not find email template with type '{email_type}' on target queue {target_queue_id}"
-                        )
-
-                except Exception as e:
-                    display_warning(f"Could not fetch email templates for target queue {target_queue_id}: {e}")
+            except Exception as e:
+                display_warning(f"Could not fetch email templates for target queue {target_queue_id}: {e}")
 
     async def initialize_deploy_objects(self):
         await self.ensure_token_owner()
@@ -329,8 +349,31 @@ class DeployOrchestrator(BaseModel):
 
         self.detect_phase_exceptions("initialize_failed")
 
+    def find_target_ids_by_type(self) -> dict[Resource, set]:
+        ids_by_type = defaultdict(set)
+        for deploy_object in self.deploy_objects:
+            objects = [deploy_object]
+            if isinstance(deploy_object, QueueDeployObject):
+                objects.extend([deploy_object.schema_deploy_object, deploy_object.inbox_deploy_object])
+            elif isinstance(deploy_object, EngineDeployObject):
+                objects.extend(deploy_object.engine_field_deploy_objects)
+
+            for object in objects:
+                # Organizations cannot be listed by IDs
+                if not isinstance(object, DeployObject) or object.type == Resource.Organization:
+                    continue
+                for target in object.targets:
+                    if target.exists_on_remote:
+                        ids_by_type[object.type].add(target.id)
+        return ids_by_type
+
+    async def prefetch_target_objects(self):
+        """Takes a snapshot of all existing targets, a few listings per type instead of a request per object."""
+        await self.remote_object_cache.prefetch(self.find_target_ids_by_type())
+
     async def initialize_target_objects(self):
         try:
+            await self.prefetch_target_objects()
             await gather_with_concurrency(
                 *[deploy_object.initialize_target_objects() for deploy_object in self.deploy_objects],
             )
@@ -340,6 +383,7 @@ class DeployOrchestrator(BaseModel):
 
         try:
             self.lookup_table = self.create_lookup_table()
+            self.source_id_matcher = SourceIdMatcher(list(self.lookup_table.keys()))
 
             await gather_with_concurrency(
                 *[
@@ -354,10 +398,22 @@ class DeployOrchestrator(BaseModel):
     async def compare_object_versions(self):
         try:
             self.reverse_lookup_table = self.create_reverse_lookup_table()
-
-            for object in self.deploy_objects:
-                if isinstance(object, OrganizationDeployObject) and not self.patch_target_org:
-                    continue
+            self.reverse_reference_translator = ReverseReferenceTranslator(
+                reverse_lookup_table=self.reverse_lookup_table,
+                source_base_url=self.source_client._http_client.base_url,
+                target_base_url=self.client._http_client.base_url,
+            )
+            # Conflicts must be detected against the latest remote versions
+            await self.prefetch_target_objects()
+
+            compared_objects = [
+                object
+                for object in self.deploy_objects
+                if not isinstance(object, OrganizationDeployObject) or self.patch_target_org
+            ]
+            # Fetch and merge everything at once, then ask about rebases and conflicts in the deploy file order
+            await gather_with_concurrency(*[object.prepare_comparisons() for object in compared_objects])
+            for object in compared_objects:
                 await object.compare_target_objects()
 
             # Need to pause execution of the command so the user can resolve them
@@ -382,9 +438,21 @@ class DeployOrchestrator(BaseModel):
 
     async def show_deploy_plan(self):
         try:
-            for object in self.deploy_objects:
-                if isinstance(object, OrganizationDeployObject) and not self.patch_target_org:
-                    continue
+            visualized_objects = [
+                object
+                for object in self.deploy_objects
+                if not isinstance(object, OrganizationDeployObject) or self.patch_target_org
+            ]
+            # Diffs of all objects (including the ones deployed by queues and engines) are created at once,
+            # only printing them keeps the deploy file order
+            await gather_with_concurrency(
+                *[
+                    nested_object.prepare_plan()
+                    for object in visualized_objects
+                    for nested_object in get_nested_deploy_objects(object)
+                ]
+            )
+            for object in visualized_objects:
                 await object.visualize_changes()
         except Exception as e:
             display_error(f"Error during visualization of deploy plan changes: {e}")
@@ -399,68 +467,47 @@ class DeployOrchestrator(BaseModel):
             if self.patch_target_org:
                 await self.organization.deploy_target_objects(data_attribute=data_attribute)
 
-            await gather_with_concurrency(
-                *[deploy_object.deploy_target_objects(data_attribute=data_attribute) for deploy_object in self.engines]
-            )
-
-            await gather_with_concurrency(
-                *[deploy_object.deploy_target_objects(data_attribute=data_attribute) for deploy_object in self.hooks]
-            )
-
-            await gather_with_concurrency(
-                *[deploy_object.deploy_target_objects(data_attribute=data_attribute) for deploy_object in self.labels]
-            )
-
-            await gather_with_concurrency(
-                *[
-                    deploy_object.deploy_target_objects(data_attribute=data_attribute)
-                    for deploy_object in self.workspaces
-                ]
-            )
-
-            await gather_with_concurrency(
-                *[deploy_object.deploy_target_objects(data_attribute=data_attribute) for deploy_object in self.queues]
-            )
-
-            # After queues are deployed (first phase), resolve non-creatable email template targets
-            if is_first:
-                await self.resolve_non_creatable_email_templates()
-                # Re-override email template references with the updated lookup table (queue refs)
-                await gather_with_concurrency(
-                    *[
-                        et.override_references(data_attribute="second_deploy_data", use_dummy_references=False)
-                        for et in self.email_templates
-                    ]
-                )
-
-            # Email templates must be deployed AFTER queues (they require queue reference)
-            await gather_with_concurrency(
-                *[
-                    deploy_object.deploy_target_objects(data_attribute=data_attribute)
-                    for deploy_object in self.email_templates
-                ]
-            )
+            async def deploy(deploy_object: DeployObject):
+                if is_first and isinstance(deploy_object, EmailTemplateDeployObject):
+                    # Its queue is deployed at this point
+                    await self.resolve_non_creatable_email_template(deploy_object)
+                    # Re-override email template references with the updated lookup table (queue refs)
+                    await deploy_object.override_references(
+                        data_attribute="second_deploy_data", use_dummy_references=False
+                    )
+                elif is_first and isinstance(deploy_object, RuleDeployObject):
+                    # Now the email template targets it references have their IDs from deployment
+                    await deploy_object.override_references(
+                        data_attribute="second_deploy_data", use_dummy_references=False
+                    )
 
-            # After email templates are deployed (first phase), re-override rule references
-            # Now the email template targets have their IDs from deployment
-            if is_first:
-                await gather_with_concurrency(
-                    *[
-                        rule.override_references(data_attribute="second_deploy_data", use_dummy_references=False)
-                        for rule in self.rules
-                    ]
-                )
+                await deploy_object.deploy_target_objects(data_attribute=data_attribute)
 
-            await gather_with_concurrency(
-                *[deploy_object.deploy_target_objects(data_attribute=data_attribute) for deploy_object in self.rules]
+            # Each object is deployed once the objects it references are (e.g., a queue after its workspace and hooks),
+            # including the ones referenced only by ID in settings, metadata and actions
+            nodes = build_deploy_graph(
+                {group: getattr(self, group) for group in DEPLOY_ORDER}, source_id_matcher=self.source_id_matcher
             )
+            await run_deploy_graph(nodes, deploy)
 
             display_info(f"{'First' if is_first else 'Second'} deploy finished.")
+            self.display_critical_path(nodes)
 
         except Exception as e:
             display_error(f"Error during {'first' if is_first else 'second'} deploy: {e}")
             raise
 
+    def display_critical_path(self, nodes: list[DeployNode]):
+        if not (critical_path := find_critical_path(nodes)):
+            return
+
+        total_duration = critical_path[-1].finished_at - critical_path[0].started_at
+        steps = " -> ".join(
+            f"{node.deploy_object.display_type} {node.deploy_object.display_label} ({node.duration:.1f} s)"
+            for node in critical_path
+        )
+        display_info(f"Critical path ({total_duration:.1f} s): {steps}")
+
     # TODO: for perfect safety, comparison should be done after first deploy (what if someone on remote changed something in the middle of deploy?)
     # Compare first_deploy_data vs last_applied (saved after first_deploy) against remote
 
@@ -559,3 +606,4 @@ SchemaDeployObject.model_rebuild()
 InboxDeployObject.model_rebuild()
 RuleDeployObject.model_rebuild()
 Target.model_rebuild()
+DeployNode.model_rebuild()
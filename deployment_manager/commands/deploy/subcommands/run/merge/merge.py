@@ -2,6 +2,7 @@ import difflib
 import json
 import subprocess
 import tempfile
+from functools import lru_cache
 
 import questionary
 
@@ -10,6 +11,50 @@ def is_primitive(val):
     return isinstance(val, (str, int, float, bool, type(None)))
 
 
+def as_path_set(fields) -> frozenset[str]:
+    """Paths for O(1) lookups, the set is passed down the recursion as it is."""
+    if isinstance(fields, frozenset):
+        return fields
+    return frozenset(fields or [])
+
+
+@lru_cache(maxsize=32)
+def get_path_prefixes(fields: frozenset[str]) -> frozenset[str]:
+    """Paths that have some of the fields nested under them ("" for the root)."""
+    prefixes = set()
+    for field in fields:
+        parts = field.split(".")
+        prefixes.update(".".join(parts[:index]) for index in range(len(parts)))
+    return frozenset(prefixes)
+
+
+def merge_identical(value, path: str | None, ignored_fields: frozenset[str]):
+    """What the merge returns for a value that is the same in last_applied, source and target (there are no conflicts
+    or rebase candidates in it). Paths are tracked only while some ignored field can be nested deeper (path=None)."""
+    if isinstance(value, list) and all(is_primitive(x) for x in value):
+        return sorted(list(set(value)))
+    if not isinstance(value, dict):
+        return value
+
+    if path is None or path not in get_path_prefixes(ignored_fields):
+        return {
+            key: (
+                merge_identical(nested_value, None, ignored_fields)
+                if isinstance(nested_value, (dict, list))
+                else nested_value
+            )
+            for key, nested_value in value.items()
+        }
+
+    merged = {}
+    for key, nested_value in value.items():
+        k_path = f"{path}.{key}" if path else key
+        merged[key] = (
+            nested_value if k_path in ignored_fields else merge_identical(nested_value, k_path, ignored_fields)
+        )
+    return merged
+
+
 def deep_three_way_merge(
     last_applied: dict,
     source: dict,
@@ -26,12 +71,9 @@ def deep_three_way_merge(
         conflicts: dict[path -> (source_val, target_val)]
         rebase_candidates: dict[path -> target_val]
     """
-    if ignored_fields is None:
-        ignored_fields = []
-    if override_fields is None:
-        override_fields = []
-    if derived_fields is None:
-        derived_fields = []
+    ignored_fields = as_path_set(ignored_fields)
+    override_fields = as_path_set(override_fields)
+    derived_fields = as_path_set(derived_fields)
 
     merged = {}
     conflicts = {}
@@ -56,6 +98,11 @@ def deep_three_way_merge(
             merged[key] = t_val
             continue
 
+        # Identical subtrees cannot have conflicts or rebases, the (native) comparison is cheaper than walking them
+        if s_val == t_val == l_val:
+            merged[key] = merge_identical(s_val, k_path, ignored_fields)
+            continue
+
         # Handle lists of primitives (order-insensitive)
         if (
             isinstance(s_val, list)
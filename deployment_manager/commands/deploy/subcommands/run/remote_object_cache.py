@@ -0,0 +1,74 @@
+import asyncio
+from copy import deepcopy
+from typing import Iterable
+
+from rossum_api import AsyncRossumAPIClient
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.common.fetch_by_ids import fetch_objects_by_ids
+from deployment_manager.utils.consts import settings
+
+
+class RemoteObjectCache:
+    """Target objects fetched during one deploy run.
+
+    Concurrent requests for the same object share a single fetch, failed fetches are not remembered.
+    Callers get their own copies, so they can modify them freely.
+    """
+
+    def __init__(self, client: AsyncRossumAPIClient):
+        self.client = client
+        self._fetches: dict[tuple[Resource, str], asyncio.Future] = {}
+
+    @staticmethod
+    def _key(type: Resource, id: int | str) -> tuple[Resource, str]:
+        return (type, str(id))
+
+    async def get(self, type: Resource, id: int | str, refresh: bool = False) -> dict:
+        """Returns the remote object, refresh=True fetches it again even if it is known already."""
+        key = self._key(type, id)
+        fetch = self._fetches.get(key, None)
+        if refresh or not fetch:
+            fetch = asyncio.ensure_future(self.client._http_client.fetch_one(type, id))
+            self._fetches[key] = fetch
+
+        try:
+            return deepcopy(await asyncio.shield(fetch))
+        except Exception:
+            # The next caller tries again
+            if self._fetches.get(key, None) is fetch:
+                del self._fetches[key]
+            raise
+
+    def set(self, type: Resource, id: int | str, object: dict):
+        """Remembers the current remote version of the object (e.g., returned by a write)."""
+        fetch = asyncio.get_running_loop().create_future()
+        fetch.set_result(deepcopy(object))
+        self._fetches[self._key(type, id)] = fetch
+
+    def forget(self, type: Resource, id: int | str):
+        self._fetches.pop(self._key(type, id), None)
+
+    async def prefetch(self, ids_by_type: dict[Resource, Iterable[int | str]]):
+        """Fetches (again) the objects of all types at once with listings filtered by IDs instead of one by one.
+
+        Only types whose paginated payloads are complete (see settings.LIST_PAYLOAD_COMPLETE_TYPES) are listed,
+        the others are fetched one by one when needed.
+        """
+        types = []
+        for type, ids in ids_by_type.items():
+            if type.value not in settings.LIST_PAYLOAD_COMPLETE_TYPES:
+                for id in ids:
+                    self.forget(type, id)
+            elif ids:
+                types.append(type)
+        results = await asyncio.gather(
+            *[fetch_objects_by_ids(self.client, type, ids_by_type[type]) for type in types], return_exceptions=True
+        )
+        for type, objects in zip(types, results):
+            for id in ids_by_type[type]:
+                # Missing objects (and types that cannot be listed by IDs) get fetched one by one when needed
+                if isinstance(objects, BaseException) or int(id) not in objects:
+                    self.forget(type, id)
+                else:
+                    self.set(type, id, objects[int(id)])
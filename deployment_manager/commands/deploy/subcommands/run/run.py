@@ -22,11 +22,13 @@ from deployment_manager.commands.deploy.subcommands.run.merge.state import Deplo
 from deployment_manager.commands.deploy.subcommands.run.models import DeployException
 from deployment_manager.commands.deploy.subcommands.run.reverse_override import reverse_source_target_in_yaml
 from deployment_manager.commands.download.download import download_destinations
+from deployment_manager.common.non_versioned_attributes import buffered_session
 from deployment_manager.common.read_write import read_object_from_json
 from deployment_manager.common.rossum_client import CustomAsyncAPIClient
 from deployment_manager.utils.consts import display_error, display_info, settings
 
 
+@buffered_session
 async def deploy_release_file(
     deploy_file_path: Path,
     project_path: Path = None,
@@ -1,8 +1,10 @@
+import asyncio
+import os
 from collections import defaultdict
 from typing import Optional
 
 from anyio import Path
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from rich import print as pprint
 from rich.panel import Panel
 from rossum_api import APIClientError, AsyncRossumAPIClient
@@ -12,13 +14,13 @@ from rossum_api.dtos import Token
 from deployment_manager.commands.deploy.common.helpers import validate_credentials
 from deployment_manager.commands.deploy.subcommands.run.helpers import get_token
 from deployment_manager.commands.deploy.subcommands.run.upload_helpers import Credentials
-from deployment_manager.commands.download.downloader import Downloader
+from deployment_manager.commands.download.downloader import Downloader, DownloadException
 from deployment_manager.commands.download.helpers import (
     delete_empty_folders,
-    delete_empty_formula_dir,
     replace_code_paths,
     should_write_object,
 )
+from deployment_manager.commands.download.pull_state import PullState
 from deployment_manager.commands.download.remover import ObjectRemover
 from deployment_manager.commands.download.saver import (
     EmailTemplateSaver,
@@ -34,17 +36,35 @@ from deployment_manager.commands.download.saver import (
     WorkflowStepSaver,
     WorkspaceSaver,
 )
-from deployment_manager.commands.download.subdirectory import SubdirectoriesDict, Subdirectory
+from deployment_manager.commands.download.subdirectory import SubdirClassifier, SubdirectoriesDict, Subdirectory
 from deployment_manager.commands.download.types import ObjectSaver
 from deployment_manager.common.determine_path import determine_object_type_from_url
+from deployment_manager.common.fleet import RequestBudget
 from deployment_manager.common.git import get_changed_file_paths
+from deployment_manager.common.object_index import IndexedObject, ObjectIndex
 from deployment_manager.common.read_write import read_object_from_json, write_object_to_json
 from deployment_manager.common.rossum_client import CustomAsyncAPIClient
 from deployment_manager.utils.consts import CustomResource, display_error, settings
-from deployment_manager.utils.functions import find_all_object_paths, gather_with_concurrency
-
-
-class DownloadException(Exception): ...
+from deployment_manager.utils.functions import iterate
+
+# Types whose objects are needed to save their children (paths, subdirs)
+PARENT_TYPES = (Resource.Workspace, Resource.Queue, Resource.Engine, CustomResource.Workflow)
+
+# Object type, whether it might not be accessible
+DOWNLOADED_TYPES = (
+    (Resource.Workspace, False),
+    (Resource.Queue, False),
+    (Resource.EmailTemplate, False),
+    (Resource.Inbox, False),
+    (Resource.Schema, False),
+    (Resource.Engine, True),
+    (Resource.EngineField, True),
+    (Resource.Rule, True),
+    (Resource.Hook, False),
+    (CustomResource.Label, True),
+    (CustomResource.Workflow, True),
+    (CustomResource.WorkflowStep, True),
+)
 
 
 class OrganizationDirectory(BaseModel):
@@ -59,27 +79,42 @@ class OrganizationDirectory(BaseModel):
     # Added later
     client: AsyncRossumAPIClient = None
     project_path: Path = None
+    object_index: Optional[ObjectIndex] = None
+    # Shared by the org directories processed at once
+    request_budget: Optional[RequestBudget] = None
+
+    # Reported at the end of the command
+    errors: list[str] = []
 
     @property
     def org_path(self):
         return self.project_path / self.name
 
+    def report_error(self, message: str, exception: Exception = None):
+        display_error(message, exception)
+        self.errors.append(f"{message} {exception}" if exception and str(exception) not in message else message)
+
+    def apply_request_budget(self):
+        if self.request_budget and hasattr(self.client, "_http_client"):
+            self.client._http_client.request_budget = self.request_budget.for_organization(self.name)
+
+    def get_object_index(self) -> ObjectIndex:
+        if not self.object_index:
+            self.object_index = ObjectIndex(project_path=self.project_path)
+        return self.object_index
+
     @property
     def display_label(self):
         return f'"[blue]{self.org_path}[/blue] ([purple]{self.org_id}[/purple])"'
 
-    async def find_object_ids_for_subdirs(self):
+    async def find_object_ids_for_subdirs(self) -> list[IndexedObject]:
+        all_indexed_objects = []
         for subdir in self.subdirectories.values():
             subdir_path = self.project_path / self.name / subdir.name
-            object_paths = await find_all_object_paths(subdir_path)
-
-            object_ids = set()
-            for object_path in object_paths:
-                object = await read_object_from_json(object_path)
-                object_id = object.get("id", None)
-                if object_id:
-                    object_ids.add(object_id)
-            subdir.object_ids = object_ids
+            indexed_objects = await self.get_object_index().scan(subdir_path)
+            subdir.object_ids = {indexed_object.id for indexed_object in indexed_objects if indexed_object.id}
+            all_indexed_objects.extend(indexed_objects)
+        return all_indexed_objects
 
 
 # TODO: use display label
@@ -87,11 +122,27 @@ class OrganizationDirectory(BaseModel):
 
 class DownloadOrganizationDirectory(OrganizationDirectory):
     id_objects_map: dict[str, dict[int, dict]] = {}
-    changed_files: list = []
+    changed_files: set = set()
 
     download_all: bool = False
     skip_objects_without_subdir: bool = False
     ignore_changed_file_warnings: bool = False
+    incremental: bool = False
+    verify_list_payloads: bool = False
+    # Whether the user can be asked (about local changes, objects without a subdir...)
+    interactive: bool = True
+
+    downloader: Optional[Downloader] = None
+    # Loaded once for all org directories pulled at once, only the command writes it (see download_destinations)
+    pull_state: Optional[PullState] = None
+    # Set after a successful incremental pull, the marks to store in the pull state
+    high_water_marks: Optional[dict[str, str]] = None
+
+    # Saves run concurrently (even across org directories), user prompts must not
+    prompt_lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
+    # Shared by all savers of a pull
+    _subdir_classifier: Optional[SubdirClassifier] = PrivateAttr(default=None)
+    _subdirs_by_object_id: dict[int, Subdirectory] = PrivateAttr(default_factory=dict)
 
     workspace_saver: Optional["WorkspaceSaver"] = None
     queue_saver: Optional["QueueSaver"] = None
@@ -113,7 +164,7 @@ class DownloadOrganizationDirectory(OrganizationDirectory):
         changed_files = get_changed_file_paths(self.org_path)
         changed_files = list(map(lambda x: x[1], changed_files))
         changed_files = replace_code_paths(changed_files)
-        self.changed_files = changed_files
+        self.changed_files = set(changed_files)
 
         if not self.client:
             token = await get_token(
@@ -124,6 +175,7 @@ class DownloadOrganizationDirectory(OrganizationDirectory):
             credentials = Credentials(token=token, url=self.api_base)
             await validate_credentials(credentials)
             self.client = CustomAsyncAPIClient(base_url=self.api_base, credentials=Token(token=token))
+        self.apply_request_budget()
 
     # TODO: catch errors on org-dir or subdir level?
     async def download_organization(self):
@@ -133,230 +185,176 @@ class DownloadOrganizationDirectory(OrganizationDirectory):
 
         try:
             await self.download_and_save_organization_object()
-
-            downloader = Downloader(client=self.client)
-            (
-                workspaces_for_mapping,
-                queues_for_mapping,
-                email_templates_for_mapping,
-                inboxes_for_mapping,
-                schemas_for_mapping,
-                engines_for_mapping,
-                engine_fields_for_mapping,
-                rules_for_mapping,
-                hooks_for_mapping,
-                labels_for_mapping,
-                workflows_for_mapping,
-                workflow_steps_for_mapping,
-            ) = await gather_with_concurrency(
-                *[
-                    downloader.download_remote_objects(type=Resource.Workspace),
-                    downloader.download_remote_objects(type=Resource.Queue),
-                    downloader.download_remote_objects(type=Resource.EmailTemplate),
-                    downloader.download_remote_objects(type=Resource.Inbox),
-                    downloader.download_remote_objects(type=Resource.Schema),
-                    downloader.download_remote_objects(type=Resource.Engine, check_access=True),
-                    downloader.download_remote_objects(type=Resource.EngineField, check_access=True),
-                    downloader.download_remote_objects(type=Resource.Rule, check_access=True),
-                    downloader.download_remote_objects(type=Resource.Hook),
-                    downloader.download_remote_objects(type=CustomResource.Label, check_access=True),
-                    downloader.download_remote_objects(type=CustomResource.Workflow, check_access=True),
-                    downloader.download_remote_objects(type=CustomResource.WorkflowStep, check_access=True),
-                ],
-            )
-
         except DownloadException as e:
-            display_error(f"Downloading from remote failed for {self.name}: {e}")
+            self.report_error(f"Downloading from remote failed for {self.name}: {e}")
             return
         except Exception as e:
-            display_error(f"Downloading from remote failed for {self.name}: {e}", e)
+            self.report_error(f"Downloading from remote failed for {self.name}: {e}", e)
             return
 
+        # --all overwrites everything, so there is no point in skipping unchanged objects
+        incremental = self.incremental and not self.download_all
+        pull_state = (self.pull_state or await PullState.load(self.project_path)) if incremental else None
+        self.downloader = Downloader(
+            client=self.client,
+            incremental=incremental,
+            verify_list_payloads=self.verify_list_payloads,
+            modified_since=(
+                pull_state.get_high_water_marks(self.name, self.org_id, self.api_base) if pull_state else {}
+            ),
+        )
+
         await self.find_object_ids_for_subdirs()
 
-        subdir_list = list(self.subdirectories.values())
-        # Assigned outside of the constructor because Pydantic creates a copy - we need a shared reference
-        subdirs_by_object_id: dict[int, str] = {}
+        self._subdir_classifier = SubdirClassifier(list(self.subdirectories.values()))
+        self._subdirs_by_object_id = {}
 
         try:
-            self.workspace_saver = WorkspaceSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=workspaces_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.workspace_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.workspace_saver.save_downloaded_objects()
-
-            self.queue_saver = QueueSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=queues_for_mapping,
-                workspaces=workspaces_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.queue_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.queue_saver.save_downloaded_objects()
-
-            self.email_template_saver = EmailTemplateSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=email_templates_for_mapping,
-                workspaces=workspaces_for_mapping,
-                queues=queues_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.email_template_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.email_template_saver.save_downloaded_objects()
+            # All types start downloading at once, the objects are saved as they arrive
+            # Children wait (with a bounded buffer) until their parents are saved because they need their subdirs
+            streams = {
+                type: self.downloader.stream_remote_objects(type=type, check_access=check_access)
+                for type, check_access in DOWNLOADED_TYPES
+            }
+            await self.save_streams(streams)
+        except DownloadException as e:
+            # Nothing gets removed locally based on an incomplete download
+            self.report_error(f"Downloading from remote failed for {self.name}: {e}")
+            return
+        except Exception as e:
+            self.report_error("Error while saving downloaded objects ^", e)
+            return
+        finally:
+            self.downloader.cancel_streams()
 
-            # TODO: test inbox without any queue
-            self.inbox_saver = InboxSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=inboxes_for_mapping,
-                workspaces=workspaces_for_mapping,
-                queues=queues_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.inbox_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.inbox_saver.save_downloaded_objects()
-
-            self.schema_saver = SchemaSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=schemas_for_mapping,
-                workspaces=workspaces_for_mapping,
-                queues=queues_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.schema_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.schema_saver.save_downloaded_objects()
-
-            self.engine_saver = EngineSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=engines_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.engine_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.engine_saver.save_downloaded_objects()
-
-            self.engine_field_saver = EngineFieldSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=engine_fields_for_mapping,
-                engines=engines_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.engine_field_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.engine_field_saver.save_downloaded_objects()
-
-            self.rule_saver = RuleSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=rules_for_mapping,
-                queues=queues_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.rule_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.rule_saver.save_downloaded_objects()
-
-            self.hook_saver = HookSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=hooks_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.hook_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.hook_saver.save_downloaded_objects()
-
-            self.label_saver = LabelSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=labels_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.label_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.label_saver.save_downloaded_objects()
-
-            self.workflow_saver = WorkflowSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=workflows_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.workflow_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.workflow_saver.save_downloaded_objects()
-
-            self.workflow_step_saver = WorkflowStepSaver(
-                parent_dir_reference=self,
-                base_path=self.project_path / self.name,
-                objects=workflow_steps_for_mapping,
-                workflows=workflows_for_mapping,
-                changed_files=self.changed_files,
-                download_all=self.download_all,
-                skip_objects_without_subdir=self.skip_objects_without_subdir,
-                subdirs=subdir_list,
-            )
-            self.workflow_step_saver.subdirs_by_object_id = subdirs_by_object_id
-            await self.workflow_step_saver.save_downloaded_objects()
-
-            self.id_objects_map = self.create_id_objects_map(
-                [
-                    *workspaces_for_mapping,
-                    *queues_for_mapping,
-                    *email_templates_for_mapping,
-                    *inboxes_for_mapping,
-                    *schemas_for_mapping,
-                    *engines_for_mapping,
-                    *engine_fields_for_mapping,
-                    *rules_for_mapping,
-                    *hooks_for_mapping,
-                    *labels_for_mapping,
-                    *workflows_for_mapping,
-                    *workflow_steps_for_mapping,
-                ]
-            )
+        try:
+            self.id_objects_map = self.create_id_objects_map(self.saved_objects)
 
             await self.remove_stale_objects()
             await self.remove_empty_queue_dirs()
 
+            if incremental:
+                # Skipped objects still get refetched before writing if their local file turns out to be outdated
+                # (e.g., in a subdir that was not pulled before), so the marks are safe to store for partial pulls too
+                self.high_water_marks = self.downloader.high_water_marks
+
             pprint(Panel(f"Finished {settings.DOWNLOAD_COMMAND_NAME} for {self.name}."))
         except Exception as e:
-            display_error("Error while saving downloaded objects ^", e)
+            self.report_error("Error while saving downloaded objects ^", e)
+
+    async def refresh_objects(self, remote_objects: list[dict], previous_paths: list[Path]):
+        """Saves the given up-to-date remote objects like a pull would, but without listing the whole organization.
+
+        The local copies of the parent objects stand in for the rest of their type, their children need them
+        for their paths and subdirs. Files in previous_paths get removed if their object now has a different path.
+        """
+        await self.initialize()
+        self.downloader = Downloader(client=self.client)
+
+        indexed_objects = await self.find_object_ids_for_subdirs()
+        self._subdir_classifier = SubdirClassifier(list(self.subdirectories.values()))
+        self._subdirs_by_object_id = {}
+
+        objects_by_type = defaultdict(dict)
+        for remote_object in remote_objects:
+            objects_by_type[determine_object_type_from_url(remote_object["url"])][remote_object["id"]] = remote_object
+        parent_type_values = {type.value for type in PARENT_TYPES}
+        for indexed_object in indexed_objects:
+            if indexed_object.type not in parent_type_values:
+                continue
+            object_type = determine_object_type_from_url(indexed_object.url)
+            if indexed_object.id not in objects_by_type[object_type]:
+                objects_by_type[object_type][indexed_object.id] = await read_object_from_json(indexed_object.path)
+
+        try:
+            await self.save_streams(
+                {type: iterate(list(objects_by_type[type].values())) for type, _ in DOWNLOADED_TYPES}
+            )
+        except Exception as e:
+            self.report_error("Error while saving refreshed objects ^", e)
+            return
+
+        self.id_objects_map = self.create_id_objects_map(remote_objects)
+        for path in previous_paths:
+            subdir_name = Path(os.path.relpath(path, self.org_path)).parts[0]
+            if subdir := self.subdirectories.get(subdir_name, None):
+                await self.validate_and_remove_object(path, subdir=subdir)
+
+    @property
+    def saved_objects(self) -> list[dict]:
+        return [
+            *self.workspace_saver.objects,
+            *self.queue_saver.objects,
+            *self.email_template_saver.objects,
+            *self.inbox_saver.objects,
+            *self.schema_saver.objects,
+            *self.engine_saver.objects,
+            *self.engine_field_saver.objects,
+            *self.rule_saver.objects,
+            *self.hook_saver.objects,
+            *self.label_saver.objects,
+            *self.workflow_saver.objects,
+            *self.workflow_step_saver.objects,
+        ]
+
+    async def save_streams(self, streams: dict):
+        await self.gather_saves(
+            self.save_workspace_tree(streams),
+            self.save_engine_tree(streams),
+            self.save_stream(streams, "hook_saver", HookSaver),
+            self.save_stream(streams, "label_saver", LabelSaver),
+            self.save_workflow_tree(streams),
+        )
+
+    @staticmethod
+    async def gather_saves(*coros):
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        # Let the other types finish saving before reporting a failed one
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def save_stream(self, streams: dict, saver_attribute: str, saver_class: type["ObjectSaver"], **kwargs):
+        """Creates the saver (parent objects in kwargs are complete by now) and saves the streamed objects."""
+        saver = saver_class(
+            parent_dir_reference=self,
+            base_path=self.project_path / self.name,
+            objects=[],
+            changed_files=self.changed_files,
+            download_all=self.download_all,
+            skip_objects_without_subdir=self.skip_objects_without_subdir,
+            subdirs=list(self.subdirectories.values()),
+            subdir_classifier=self._subdir_classifier,
+            **kwargs,
+        )
+        # Assigned outside of the constructor because Pydantic creates a copy - we need a shared reference
+        saver.subdirs_by_object_id = self._subdirs_by_object_id
+        setattr(self, saver_attribute, saver)
+
+        await saver.save_streamed_objects(streams[saver.type])
+        # Downloaded in the order they arrived, keep the listing one
+        self.downloader.sort_in_listing_order(saver.type, saver.objects)
+
+    async def save_workspace_tree(self, streams: dict):
+        await self.save_stream(streams, "workspace_saver", WorkspaceSaver)
+        workspaces = self.workspace_saver.objects
+        await self.save_stream(streams, "queue_saver", QueueSaver, workspaces=workspaces)
+        queues = self.queue_saver.objects
+        await self.gather_saves(
+            self.save_stream(streams, "email_template_saver", EmailTemplateSaver, workspaces=workspaces, queues=queues),
+            # TODO: test inbox without any queue
+            self.save_stream(streams, "inbox_saver", InboxSaver, workspaces=workspaces, queues=queues),
+            self.save_stream(streams, "schema_saver", SchemaSaver, workspaces=workspaces, queues=queues),
+            self.save_stream(streams, "rule_saver", RuleSaver, queues=queues),
+        )
+
+    async def save_engine_tree(self, streams: dict):
+        await self.save_stream(streams, "engine_saver", EngineSaver)
+        await self.save_stream(streams, "engine_field_saver", EngineFieldSaver, engines=self.engine_saver.objects)
+
+    async def save_workflow_tree(self, streams: dict):
+        await self.save_stream(streams, "workflow_saver", WorkflowSaver)
+        await self.save_stream(streams, "workflow_step_saver", WorkflowStepSaver, workflows=self.workflow_saver.objects)
 
     async def download_and_save_organization_object(self):
         try:
@@ -391,12 +389,9 @@ class DownloadOrganizationDirectory(OrganizationDirectory):
             if not subdir.include:
                 continue
 
-            object_paths = []
             subdir_path = self.project_path / self.name / subdir.name
-            object_paths.extend(await find_all_object_paths(subdir_path))
-
-            for object_path in object_paths:
-                await self.validate_and_remove_object(object_path, subdir=subdir)
+            for indexed_object in await self.get_object_index().scan(subdir_path):
+                await self.validate_and_remove_object(indexed_object.path, subdir=subdir, indexed_object=indexed_object)
 
     async def remove_empty_queue_dirs(self):
         for subdir in self.subdirectories.values():
@@ -407,16 +402,18 @@ class DownloadOrganizationDirectory(OrganizationDirectory):
             if not await subdir_ws_path.exists():
                 continue
 
-            await delete_empty_formula_dir(subdir_ws_path)
             await delete_empty_folders(subdir_ws_path)
 
-    async def validate_and_remove_object(self, object_path: Path, subdir: Subdirectory):
+    async def validate_and_remove_object(
+        self, object_path: Path, subdir: Subdirectory, indexed_object: Optional[IndexedObject] = None
+    ):
         try:
             if object_path.name == "organization.json":
                 return
 
             object_remover = await ObjectRemover.construct_remover(
                 object_path=object_path,
+                indexed_object=indexed_object,
                 subdir=subdir,
                 id_objects_map=self.id_objects_map,
                 path_constructor=self.construct_path_for_remote_object,
@@ -428,7 +425,7 @@ class DownloadOrganizationDirectory(OrganizationDirectory):
 
             await object_remover.remove_if_stale()
         except Exception as e:
-            display_error(
+            self.report_error(
                 f"Error while checking if object [green]{object_path}[/green] should be removed (skipping) ^",
                 e,
             )
@@ -1,17 +1,30 @@
+import asyncio
+import multiprocessing
 import os
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
 import click
 from anyio import Path
 
 from deployment_manager.commands.download.directory import DownloadOrganizationDirectory
+from deployment_manager.commands.download.pull_state import OrganizationPullState, PullState
+from deployment_manager.common.fleet import (
+    OrganizationResult,
+    RequestBudget,
+    display_summary,
+    run_for_organizations,
+)
+from deployment_manager.common.non_versioned_attributes import buffered_session
+from deployment_manager.common.object_index import ObjectIndex
 from deployment_manager.common.read_write import read_prd_project_config
 from deployment_manager.common.upload_download_setup import (
     check_unique_org_ids,
     expand_destinations,
     mark_subdirectories_to_include,
 )
-from deployment_manager.utils.consts import display_error, display_warning, settings
+from deployment_manager.utils.consts import display_warning, settings
 from deployment_manager.utils.functions import apply_concurrency_override, coro
 
 # TODO: fix foreign JSONs in the subdir (mongo.json...)
@@ -51,6 +64,19 @@ In case the directory already exists, it first deletes its contents and then dow
     is_flag=True,
     help="If there are objects whose subdir cannot be determined, user is not manually prompted - objects are not downloaded.",
 )
+@click.option(
+    "--incremental",
+    "-i",
+    default=False,
+    is_flag=True,
+    help="Refetches only objects modified since the last successful pull of the organization (ignored with --all).",
+)
+@click.option(
+    "--verify-list-payloads",
+    default=False,
+    is_flag=True,
+    help="Sample-compares paginated and detail payloads of types saved without refetching, refetches types where they differ.",
+)
 @click.option(
     "--message",
     "-m",
@@ -63,6 +89,24 @@ In case the directory already exists, it first deletes its contents and then dow
     default=None,
     help="Maximum concurrent API requests (default: 5, or PRD2_CONCURRENCY env var).",
 )
+@click.option(
+    "--org-concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    help="How many org directories are pulled at once.",
+)
+@click.option(
+    "--request-budget",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Maximum concurrent API requests across all org directories pulled at once (default: 20).",
+)
+@click.option(
+    "--process-pool",
+    default=False,
+    is_flag=True,
+    help="Pulls each org directory in a separate (non-interactive) process, up to --org-concurrency at once.",
+)
 @coro
 # To be able to run the command progammatically without the CLI decorators
 async def download_project_wrapper(
@@ -71,18 +115,61 @@ async def download_project_wrapper(
     message: str = "",
     all: bool = False,
     skip_objects_without_subdir: bool = False,
+    incremental: bool = False,
+    verify_list_payloads: bool = False,
     concurrency: int = None,
+    org_concurrency: int = 1,
+    request_budget: int = None,
+    process_pool: bool = False,
 ):
     apply_concurrency_override(concurrency)
+    if request_budget:
+        settings.REQUEST_BUDGET = request_budget
     await download_destinations(
         destinations=destinations,
         commit_message=message,
         commit=commit,
         download_all=all,
         skip_objects_without_subdir=skip_objects_without_subdir,
+        incremental=incremental,
+        verify_list_payloads=verify_list_payloads,
+        org_concurrency=org_concurrency,
+        process_pool=process_pool,
     )
 
 
+def download_organization_in_process(
+    project_path: str, org_dir_name: str, subdir_names: list[str], concurrency: int, options: dict
+) -> tuple[list[str], Optional[dict]]:
+    """Pulls the subdirs of one org directory in a worker process (see --process-pool).
+    Returns the errors and the org's pull state, which only the parent process writes."""
+    # The workers split the request budget
+    settings.CONCURRENCY = concurrency
+
+    async def download_organization():
+        pull_state = None
+        if options.get("incremental", False) and not options.get("download_all", False):
+            pull_state = await PullState.load(Path(project_path))
+        previous_org_state = pull_state.organizations.get(org_dir_name, None) if pull_state else None
+        results = await download_destinations(
+            destinations=tuple(Path(org_dir_name) / subdir_name for subdir_name in subdir_names),
+            project_path=Path(project_path),
+            # There is nobody to ask in the worker
+            skip_objects_without_subdir=True,
+            interactive=False,
+            pull_state=pull_state,
+            **options,
+        )
+        org_state = pull_state.organizations.get(org_dir_name, None) if pull_state else None
+        # Only a state set by this pull is returned (a failed pull leaves the previous one in place)
+        if org_state is previous_org_state:
+            org_state = None
+        return (results[0].errors if results else []), (org_state.model_dump() if org_state else None)
+
+    return asyncio.run(download_organization())
+
+
+@buffered_session
 async def download_destinations(
     destinations: tuple[Path],
     project_path: Path = None,
@@ -90,15 +177,31 @@ async def download_destinations(
     commit_message: str = "",
     download_all: bool = False,
     skip_objects_without_subdir: bool = False,
-):
+    incremental: bool = False,
+    verify_list_payloads: bool = False,
+    org_concurrency: int = 1,
+    process_pool: bool = False,
+    interactive: bool = True,
+    pull_state: Optional[PullState] = None,
+) -> list[OrganizationResult]:
+    """Pulls the destinations. The pull state of incremental pulls is written once at the end,
+    unless it is given by the caller (e.g., a --process-pool worker), then it is only updated."""
     if not destinations:
         display_warning(f"No destinations specified to {settings.DOWNLOAD_COMMAND_NAME}.")
-        return
+        return []
 
     if not project_path:
         project_path = Path("./")
 
     project_config = await read_prd_project_config(project_path)
+    # The org directories are pulled concurrently, but they share the local index and ask one question at a time
+    object_index = ObjectIndex(project_path=project_path)
+    prompt_lock = asyncio.Lock()
+    request_budget = RequestBudget(settings.REQUEST_BUDGET) if org_concurrency > 1 else None
+    # Loaded once, so that org directories pulled at once do not overwrite each other's marks
+    write_pull_state = pull_state is None and incremental and not download_all
+    if write_pull_state:
+        pull_state = await PullState.load(project_path)
     # TODO: const keys for stuff like 'directories'
     configured_directories = {
         name: DownloadOrganizationDirectory(
@@ -106,13 +209,20 @@ async def download_destinations(
             project_path=project_path,
             skip_objects_without_subdir=skip_objects_without_subdir,
             download_all=download_all,
+            incremental=incremental,
+            verify_list_payloads=verify_list_payloads,
+            interactive=interactive,
+            object_index=object_index,
+            prompt_lock=prompt_lock,
+            request_budget=request_budget,
+            pull_state=pull_state,
             **value,
         )
         for name, value in project_config.get("directories", {}).items()
     }
 
     if not check_unique_org_ids(configured_directories=configured_directories):
-        return
+        return []
 
     expanded_destinations = expand_destinations(
         destinations=destinations,
@@ -125,22 +235,62 @@ async def download_destinations(
         expanded_destinations=expanded_destinations,
     )
 
+    included_dir_names = []
     for org_dir_name, org_dir_config in configured_directories.items():
         if all(not subdir.include for subdir in org_dir_config.subdirectories.values()):
             continue
 
+        included_dir_names.append(org_dir_name)
         for subdir_name in org_dir_config.subdirectories.keys():
             subdir_path = project_path / org_dir_name / subdir_name
             if not await subdir_path.exists():
                 os.makedirs(subdir_path, exist_ok=True)
 
+    async def download_organization(org_dir_name: str) -> list[str]:
+        org_dir_config = configured_directories[org_dir_name]
         try:
             await org_dir_config.download_organization()
         except Exception as e:
-            display_error(
+            org_dir_config.report_error(
                 f"Error during the {settings.DOWNLOAD_COMMAND_NAME} of {org_dir_config.display_label}: {e}",
                 e,
             )
+        return org_dir_config.errors
+
+    if process_pool and len(included_dir_names) > 1:
+        results = await download_organizations_in_processes(
+            project_path=project_path,
+            configured_directories={name: configured_directories[name] for name in included_dir_names},
+            workers=org_concurrency,
+            options={
+                "download_all": download_all,
+                "incremental": incremental,
+                "verify_list_payloads": verify_list_payloads,
+            },
+        )
+    else:
+        results = await run_for_organizations(
+            names=included_dir_names,
+            run=download_organization,
+            org_concurrency=org_concurrency,
+            request_budget=request_budget,
+        )
+    object_index.close()
+
+    if pull_state is not None:
+        updated = False
+        for org_dir_name in included_dir_names:
+            org_dir_config = configured_directories[org_dir_name]
+            if org_dir_config.high_water_marks is not None:
+                pull_state.set_high_water_marks(
+                    org_dir_name, org_dir_config.org_id, org_dir_config.api_base, org_dir_config.high_water_marks
+                )
+                updated = True
+        if updated and write_pull_state:
+            await pull_state.write(project_path)
+
+    if len(results) > 1:
+        display_summary(settings.DOWNLOAD_COMMAND_NAME, results)
 
     # TODO: test with deleting objects
     # TODO: test just empty org file (subdirs should not be required then
@@ -149,3 +299,41 @@ async def download_destinations(
     if commit:
         subprocess.run(["git", "add", "."])
         subprocess.run(["git", "commit", "-m", commit_message])
+
+    return results
+
+
+async def download_organizations_in_processes(
+    project_path: Path,
+    configured_directories: dict[str, DownloadOrganizationDirectory],
+    workers: int,
+    options: dict,
+) -> list[OrganizationResult]:
+    loop = asyncio.get_running_loop()
+    concurrency = max(1, settings.REQUEST_BUDGET // min(workers, len(configured_directories)))
+
+    # Spawned workers start clean, a forked one would inherit e.g. the open non-versioned attribute session
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+
+        async def download_organization(org_dir_name: str) -> list[str]:
+            org_dir_config = configured_directories[org_dir_name]
+            subdir_names = [subdir.name for subdir in org_dir_config.subdirectories.values() if subdir.include]
+            errors, org_state = await loop.run_in_executor(
+                executor,
+                download_organization_in_process,
+                str(project_path),
+                org_dir_name,
+                subdir_names,
+                concurrency,
+                options,
+            )
+            # The marks are written by this process together with the other orgs' ones
+            if org_state:
+                org_dir_config.high_water_marks = OrganizationPullState(**org_state).high_water_marks
+            return errors
+
+        return await run_for_organizations(
+            names=list(configured_directories.keys()),
+            run=download_organization,
+            org_concurrency=workers,
+        )
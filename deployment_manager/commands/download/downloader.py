@@ -1,9 +1,16 @@
-from pydantic import BaseModel, ConfigDict
+import asyncio
+import random
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from rossum_api import APIClientError, AsyncRossumAPIClient
 from rossum_api.domain_logic.resources import Resource
 
-from deployment_manager.utils.consts import CustomResource
-from deployment_manager.utils.functions import gather_with_concurrency
+from deployment_manager.utils.consts import CustomResource, display_info, display_warning, settings
+from deployment_manager.utils.functions import gather_with_concurrency, iterate
+
+
+class DownloadException(Exception): ...
 
 
 class Downloader(BaseModel):
@@ -11,26 +18,189 @@ class Downloader(BaseModel):
 
     client: AsyncRossumAPIClient
 
+    # Incremental mode: object type -> modified_at high-water mark of the previous pull
+    # Only objects modified since then get refetched, the rest keep their paginated (list) payloads
+    incremental: bool = False
+    modified_since: dict[str, str] = {}
+
+    # Types whose paginated payloads are saved as they are (see settings.LIST_PAYLOAD_COMPLETE_TYPES)
+    complete_list_payload_types: set[str] = set(settings.LIST_PAYLOAD_COMPLETE_TYPES)
+    # Sample-compares paginated and detail payloads of the above and refetches everything if they differ
+    verify_list_payloads: bool = False
+
+    # Filled in while downloading
+    high_water_marks: dict[str, str] = {}
+    partial_object_ids: dict[str, set] = {}
+    # Object type -> object ID -> position in the paginated listing
+    listing_positions: dict[str, dict] = {}
+
+    # Detail requests of all streamed types share the concurrency limit
+    _request_semaphore: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _producers: list[asyncio.Task] = PrivateAttr(default_factory=list)
+
+    @property
+    def request_semaphore(self) -> asyncio.Semaphore:
+        if not self._request_semaphore:
+            self._request_semaphore = asyncio.Semaphore(settings.CONCURRENCY)
+        return self._request_semaphore
+
     async def download_remote_objects(self, type: Resource | CustomResource, check_access: bool = False):
-        # Some API objects (e.g., rules) might not be allowed and Elis API would return 403...
-        if check_access:
+        objects = [object async for object in self.stream_remote_objects(type=type, check_access=check_access)]
+        return self.sort_in_listing_order(type, objects)
+
+    def stream_remote_objects(self, type: Resource | CustomResource, check_access: bool = False) -> AsyncIterator[dict]:
+        """Starts downloading right away and yields the objects once the consumer gets to them.
+
+        Detail payloads are yielded in the order they arrive, at most settings.DOWNLOAD_BUFFER_SIZE objects
+        are downloaded ahead of the consumer.
+        """
+        objects = asyncio.Queue(maxsize=settings.DOWNLOAD_BUFFER_SIZE)
+        producer = asyncio.create_task(self.produce_remote_objects(type, objects, check_access))
+        self._producers.append(producer)
+        return self.consume_remote_objects(type, objects, producer)
+
+    @staticmethod
+    async def consume_remote_objects(type: Resource | CustomResource, objects: asyncio.Queue, producer: asyncio.Task):
+        try:
+            while (object := await objects.get()) is not None:
+                yield object
             try:
-                async for item in self.client._http_client.fetch_all(type):
-                    # First item is enough to check
-                    break
-            except APIClientError:
-                # display_warning(f"Could not download {type.value}, skipping: {e}")
-                return []
-
-        paginated_object_ids = await self.download_remote_object_ids(type=type)
-
-        # Refetch in case the paginated fields don't include everything
-        # Use raw dicts and not dataclasses in case of fields not defined in the Rossum API lib
-        full_objects = await gather_with_concurrency(
-            *[self.client._http_client.fetch_one(type, object_id) for object_id in paginated_object_ids],
+                await producer
+            except APIClientError as e:
+                raise DownloadException(f"Could not download {type.value}: {e}") from e
+        finally:
+            producer.cancel()
+
+    def cancel_streams(self):
+        for producer in self._producers:
+            producer.cancel()
+        self._producers = []
+
+    async def produce_remote_objects(
+        self, type: Resource | CustomResource, objects: asyncio.Queue, check_access: bool = False
+    ):
+        fetches = []
+        try:
+            # Some API objects (e.g., rules) might not be allowed and Elis API would return 403...
+            if check_access and not await self.is_accessible(type):
+                return
+
+            listing = self.client._http_client.fetch_all(type)
+            is_complete = type.value in self.complete_list_payload_types
+            if is_complete and self.verify_list_payloads:
+                # The sample is taken from the whole listing
+                paginated_objects = await self.download_remote_object_list(type=type)
+                is_complete = await self.is_list_payload_complete(type, paginated_objects)
+                listing = iterate(paginated_objects)
+
+            since = self.modified_since.get(type.value, None) if self.incremental else None
+            if not is_complete and since is not None:
+                self.partial_object_ids[type.value] = set()
+
+            paginated_objects = []
+            positions = self.listing_positions[type.value] = {}
+            # Limits the objects downloaded ahead of the consumer (including the detail ones being fetched)
+            buffer_slots = asyncio.Semaphore(settings.DOWNLOAD_BUFFER_SIZE)
+            async for object in listing:
+                positions[object["id"]] = len(paginated_objects)
+                paginated_objects.append(object)
+
+                # Refetch in case the paginated fields don't include everything
+                # Use raw dicts and not dataclasses in case of fields not defined in the Rossum API lib
+                if is_complete:
+                    await objects.put(object)
+                elif since is not None and not self.is_modified_since(object, since):
+                    self.partial_object_ids[type.value].add(object["id"])
+                    await objects.put(object)
+                else:
+                    await buffer_slots.acquire()
+                    fetches.append(asyncio.create_task(self.fetch_full_object(type, object, objects, buffer_slots)))
+
+            await asyncio.gather(*fetches)
+            self.record_high_water_mark(type, paginated_objects)
+        finally:
+            for fetch in fetches:
+                fetch.cancel()
+            await objects.put(None)
+
+    async def fetch_full_object(
+        self, type: Resource | CustomResource, object: dict, objects: asyncio.Queue, buffer_slots: asyncio.Semaphore
+    ):
+        try:
+            async with self.request_semaphore:
+                full_object = await self.client._http_client.fetch_one(type, object["id"])
+            # Do not hold the request slot while waiting for the consumer
+            await objects.put(full_object)
+        finally:
+            buffer_slots.release()
+
+    async def is_accessible(self, type: Resource | CustomResource):
+        try:
+            async for item in self.client._http_client.fetch_all(type):
+                # First item is enough to check
+                break
+        except APIClientError:
+            # display_warning(f"Could not download {type.value}, skipping: {e}")
+            return False
+        return True
+
+    def sort_in_listing_order(self, type: Resource | CustomResource, objects: list[dict]):
+        positions = self.listing_positions.get(type.value, {})
+        objects.sort(key=lambda object: positions.get(object["id"], len(positions)))
+        return objects
+
+    async def is_list_payload_complete(self, type: Resource | CustomResource, paginated_objects: list[dict]):
+        sample = random.sample(
+            paginated_objects, min(len(paginated_objects), settings.LIST_PAYLOAD_VERIFICATION_SAMPLE_SIZE)
+        )
+        detail_objects = await gather_with_concurrency(
+            *[self.client._http_client.fetch_one(type, object["id"]) for object in sample],
+        )
+
+        differing_keys = set()
+        for paginated_object, detail_object in zip(sample, detail_objects):
+            for key in paginated_object.keys() | detail_object.keys():
+                if paginated_object.get(key, None) != detail_object.get(key, None):
+                    differing_keys.add(key)
+
+        if differing_keys:
+            display_warning(
+                f"Paginated payloads of [yellow]{type.value}[/yellow] differ from the detail ones in {sorted(differing_keys)}, refetching all of them."
+            )
+            self.complete_list_payload_types.discard(type.value)
+            return False
+
+        display_info(
+            f"Paginated payloads of [yellow]{type.value}[/yellow] match the detail ones ({len(sample)} sampled)."
         )
+        return True
 
-        return full_objects
+    async def download_remote_object_list(self, type: Resource | CustomResource):
+        return [object async for object in self.client._http_client.fetch_all(type)]
 
     async def download_remote_object_ids(self, type: Resource):
-        return [object["id"] async for object in self.client._http_client.fetch_all(type)]
+        return [object["id"] for object in await self.download_remote_object_list(type=type)]
+
+    async def complete_object(self, type: Resource | CustomResource, object: dict):
+        """Replaces the paginated payload of an object skipped by the incremental pull with the full one (in place)."""
+        partial_ids = self.partial_object_ids.get(type.value, set())
+        if object["id"] not in partial_ids:
+            return
+
+        object.update(await self.client._http_client.fetch_one(type, object["id"]))
+        partial_ids.discard(object["id"])
+
+    def record_high_water_mark(self, type: Resource | CustomResource, objects: list[dict]):
+        timestamps = [object["modified_at"] for object in objects if object.get("modified_at", None)]
+        previous_mark = self.modified_since.get(type.value, None)
+        if previous_mark:
+            timestamps.append(previous_mark)
+
+        if timestamps:
+            self.high_water_marks[type.value] = max(timestamps)
+
+    @staticmethod
+    def is_modified_since(object: dict, since: str):
+        # Objects without a timestamp cannot be proven unchanged
+        modified_at = object.get("modified_at", None)
+        return not modified_at or modified_at > since
@@ -1,4 +1,4 @@
-import json
+import os
 import shutil
 from typing import TYPE_CHECKING, Any
 
@@ -13,7 +13,9 @@ from anyio import Path
 from rossum_api.domain_logic.resources import Resource
 
 from deployment_manager.common.determine_path import determine_object_type_from_url
-from deployment_manager.common.read_write import NON_VERSIONED_ATTRIBUTES_FILE_LOCK, read_object_from_json
+from deployment_manager.common.non_versioned_attributes import non_versioned_attributes
+from deployment_manager.common.object_index import canonical_hash
+from deployment_manager.common.read_write import get_versioned_content, read_object_from_json
 from deployment_manager.utils.consts import display_warning, settings
 
 
@@ -32,15 +34,57 @@ def replace_code_paths(file_paths: list[Path]):
     return replaced_paths
 
 
+async def read_local_object_for_comparison(path: Path, parent_dir_reference: "DownloadOrganizationDirectory"):
+    """Returns the attributes of the local object needed by should_write_object, None if there is no local object."""
+    indexed_object = await get_indexed_object(path, parent_dir_reference)
+    if indexed_object is False:
+        return await read_object_from_json(path) if await path.exists() else None
+
+    if not indexed_object:
+        return None
+    # Hooks and rules are not in the index
+    if indexed_object.type in [Resource.Queue.value, Resource.Schema.value]:
+        return await read_object_from_json(path)
+
+    local_file = {"url": indexed_object.url or ""}
+    if indexed_object.modified_at is not None:
+        local_file["modified_at"] = indexed_object.modified_at
+    return local_file
+
+
+async def get_indexed_object(path: Path, parent_dir_reference: "DownloadOrganizationDirectory"):
+    """Returns the local object index entry, None if there is no local object and False if there is no index."""
+    get_object_index = getattr(parent_dir_reference, "get_object_index", None)
+    if not get_object_index:
+        return False
+    return await get_object_index().get(path)
+
+
+def get_remote_object_type(remote_object: Any):
+    try:
+        return determine_object_type_from_url(remote_object.get("url", ""))
+    except Exception:
+        return None
+
+
 async def should_write_object(
     path: Path,
     remote_object: Any,
-    changed_files: list,
+    changed_files: set,
     parent_dir_reference: "DownloadOrganizationDirectory",
+    object_type: Resource = None,
 ):
-    if await path.exists():
-        local_file = await read_object_from_json(path)
-
+    # Same content as the local file means there is nothing to overwrite, only the non-versioned attributes can differ
+    # Changed files are excluded because their code files (not part of the hash) might have been edited
+    indexed_object = await get_indexed_object(path, parent_dir_reference)
+    if indexed_object and path not in changed_files:
+        object_type = object_type or get_remote_object_type(remote_object)
+        if indexed_object.content_hash == canonical_hash(get_versioned_content(path, remote_object, object_type)):
+            parent_dir_reference.get_object_index().record_pulled_hash(path, indexed_object.content_hash)
+            return indexed_object.modified_at != remote_object.get("modified_at", None)
+
+    local_file = await read_local_object_for_comparison(path, parent_dir_reference)
+    if local_file is not None:
         object_type = determine_object_type_from_url(local_file.get("url", ""))
         # Queues might have their hooks attribute changed. Same for schema.rules
         # This does not update the timestamp in the DB because this change is only done on hooks entities.
@@ -51,18 +95,31 @@ async def should_write_object(
             or (object_type == Resource.Schema and local_file.get("rules", []) != remote_object.get("rules", []))
         ):
             if path in changed_files and not parent_dir_reference.ignore_changed_file_warnings:
-                display_warning(
-                    f"File [green]{path}[/green] has local unversioned changes [white](local: {local_timestamp} | remote: {remote_timestamp})[/white]."
-                )
-                user_answer = await questionary.text(
-                    message="Should the remote version overwrite the local one?",
-                    instruction="(y/n/yy)",
-                ).ask_async()
-                # Disable warnings for all other queues
-                if user_answer.casefold() == "yy":
-                    parent_dir_reference.ignore_changed_file_warnings = True
-
-                return user_answer == "y" or user_answer == "yy"
+                # E.g., pull in a worker process, there is nobody to ask
+                if not getattr(parent_dir_reference, "interactive", True):
+                    display_warning(
+                        f"File [green]{path}[/green] has local unversioned changes, keeping the local version."
+                    )
+                    return False
+
+                # Objects are saved concurrently, but only one question can be asked at a time
+                async with parent_dir_reference.prompt_lock:
+                    # The previous answer might have been "yy"
+                    if parent_dir_reference.ignore_changed_file_warnings:
+                        return True
+
+                    display_warning(
+                        f"File [green]{path}[/green] has local unversioned changes [white](local: {local_timestamp} | remote: {remote_timestamp})[/white]."
+                    )
+                    user_answer = await questionary.text(
+                        message="Should the remote version overwrite the local one?",
+                        instruction="(y/n/yy)",
+                    ).ask_async()
+                    # Disable warnings for all other queues
+                    if user_answer.casefold() == "yy":
+                        parent_dir_reference.ignore_changed_file_warnings = True
+
+                    return user_answer == "y" or user_answer == "yy"
 
             return True
 
@@ -72,79 +129,49 @@ async def should_write_object(
 
 async def delete_objects_non_versioned_attributes(path: Path):
     # this method deletes the object's data in non_versioned_attributes file
+    non_versioned_attributes.delete(path)
+
 
-    if len(path.parents) < 3:
-        # outside subdirectory, no non_versioned_attribute allowed at this level
-        return
-
-    subdir_path: Path = path.parents[-3]  ## path to dir/subdir, resp. org/suborg
-    file_path_parts_from_subdir: tuple[str, ...] = path.parts[2:]  # parts of path from dir/subdir, in list
-    non_versioned_file = subdir_path / settings.NON_VERSIONED_ATTRIBUTES_FILE_NAME
-    if await non_versioned_file.exists():
-        async with NON_VERSIONED_ATTRIBUTES_FILE_LOCK:
-            with open(non_versioned_file, "r") as f:
-                data = json.load(f)
-
-            # searching for the key in json
-            parent = data
-            for path_part in file_path_parts_from_subdir[
-                :-1
-            ]:  # Go up to the second-to-last key. For the last one, del will be called later.
-                if path_part in parent:
-                    parent = parent[path_part]
-                else:
-                    return
-
-            # The last key in the list is the one to delete
-            key_to_delete = file_path_parts_from_subdir[-1]
-
-            # Delete the key from the parent dictionary
-            if key_to_delete in parent:
-                del parent[key_to_delete]
-            else:
-                return
-
-            # if the key was found and deleted, write updated non_versioned_attributes file
-            with open(non_versioned_file, "w") as f:
-                json.dump(data, f, indent=4)
-
-
-async def delete_empty_folders(root: Path):
-    deleted = set()
-
-    # Walk through the directories in reverse (bottom-up)
-    async for current_dir in root.rglob("*"):
-        current_dir = Path(current_dir)
-
-        if await current_dir.is_dir():
-            # Check if the directory has subdirectories or files
-            subdirs = [subdir async for subdir in current_dir.iterdir() if await subdir.is_dir()]
-            files = [file async for file in current_dir.iterdir() if await file.is_file()]
-
-            # If no files or valid subdirectories, delete the directory
-            if not files and not subdirs:
-                shutil.rmtree(current_dir)
-                deleted.add(current_dir)
-                await delete_objects_non_versioned_attributes(current_dir)
-
-    return deleted
-
-
-async def delete_empty_formula_dir(ws_root: Path):
-    # Iterate over workspaces in the root path
-    async for ws_path in ws_root.iterdir():
-        if not await ws_path.is_dir():
-            continue
-        queues_path = ws_path / "queues"
-        if not await queues_path.exists():
-            continue
-
-        async for queue_path in queues_path.iterdir():
-            if not await queue_path.is_dir():
+def is_prunable_dir(dir_path: str, remaining_entries: list[os.DirEntry]) -> bool:
+    if not remaining_entries:
+        return True
+
+    # A queue directory with nothing but its formula code means the queue itself is gone
+    return (
+        os.path.basename(os.path.dirname(dir_path)) == "queues"
+        and len(remaining_entries) == 1
+        and remaining_entries[0].name == settings.FORMULA_DIR_NAME
+        and remaining_entries[0].is_dir(follow_symlinks=False)
+    )
+
+
+def prune_dir(dir_path: str, deleted: list[str]) -> list[os.DirEntry]:
+    """Prunes the subdirectories bottom-up (children first), returns the entries left in the directory."""
+    with os.scandir(dir_path) as entries:
+        entries = list(entries)
+
+    remaining_entries = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if is_prunable_dir(entry.path, prune_dir(entry.path, deleted)):
+                shutil.rmtree(entry.path)
+                deleted.append(entry.path)
                 continue
+        remaining_entries.append(entry)
+
+    return remaining_entries
+
+
+async def delete_empty_folders(root: Path) -> set[Path]:
+    """Deletes empty directories (and queue directories with only formulas) under root in a single pass."""
+    deleted = []
+    prune_dir(str(root), deleted)
+    deleted_paths = {Path(path) for path in deleted}
 
-            contents = [item async for item in queue_path.iterdir()]
+    # Forgetting a directory forgets everything under it too
+    with non_versioned_attributes.session():
+        for path in deleted_paths:
+            if path.parent not in deleted_paths:
+                await delete_objects_non_versioned_attributes(path)
 
-            # If the directory only contains a 'formula' folder, delete it
-            if len(contents) == 1 and contents[0].name == settings.FORMULA_DIR_NAME:
-                shutil.rmtree(queue_path)
+    return deleted_paths
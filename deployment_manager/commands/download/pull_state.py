@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+
+from anyio import Path
+from pydantic import BaseModel, Field
+
+from deployment_manager.utils.consts import display_error, settings
+
+
+class OrganizationPullState(BaseModel):
+    org_id: int
+    api_base: str
+    # Object type (e.g., 'queues') -> highest modified_at seen in the last successful pull
+    high_water_marks: dict[str, str] = Field(default_factory=dict)
+
+
+class PullState(BaseModel):
+    """Local (non-versioned) bookkeeping of previous pulls, used for incremental pulls."""
+
+    # Org directory name -> state
+    organizations: dict[str, OrganizationPullState] = Field(default_factory=dict)
+
+    @staticmethod
+    def get_path(project_path: Path) -> Path:
+        return project_path / settings.LOCAL_STATE_DIR_NAME / settings.PULL_STATE_FILE_NAME
+
+    @classmethod
+    async def load(cls, project_path: Path) -> "PullState":
+        path = cls.get_path(project_path)
+        if await path.exists():
+            try:
+                return cls(**json.loads(await path.read_text()))
+            except Exception as e:
+                display_error(f"Failed to load pull state from {path}, running a full pull: {e}")
+
+        return cls()
+
+    def get_high_water_marks(self, org_dir_name: str, org_id: int, api_base: str) -> dict[str, str]:
+        org_state = self.organizations.get(org_dir_name, None)
+        # The directory might have been pointed to a different org since the last pull
+        if not org_state or org_state.org_id != org_id or org_state.api_base != api_base:
+            return {}
+        return org_state.high_water_marks
+
+    def set_high_water_marks(self, org_dir_name: str, org_id: int, api_base: str, high_water_marks: dict[str, str]):
+        self.organizations[org_dir_name] = OrganizationPullState(
+            org_id=org_id, api_base=api_base, high_water_marks=high_water_marks
+        )
+
+    async def write(self, project_path: Path):
+        path = self.get_path(project_path)
+        await path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that an interrupted write never leaves a truncated file behind
+        fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.model_dump_json(indent=2))
+            os.replace(temp_path, str(path))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
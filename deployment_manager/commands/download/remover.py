@@ -1,6 +1,6 @@
 import os
 import shutil
-from typing import Any
+from typing import Any, Optional
 
 from anyio import Path
 from pydantic import BaseModel, ConfigDict
@@ -9,6 +9,7 @@ from rossum_api.domain_logic.resources import Resource
 from deployment_manager.commands.download.helpers import delete_objects_non_versioned_attributes
 from deployment_manager.commands.download.subdirectory import Subdirectory
 from deployment_manager.common.determine_path import determine_object_type_from_url
+from deployment_manager.common.object_index import IndexedObject
 from deployment_manager.common.read_write import (
     create_custom_hook_code_path,
     create_formula_directory_path,
@@ -27,14 +28,21 @@ class ObjectRemover(BaseModel):
     directory: Any = None
 
     local_path: Path
-    local_object: dict
+    # Only read when needed if the object comes from the local index
+    local_object: dict = {}
 
     remote_object: dict = {}
 
     @staticmethod
-    async def construct_remover(object_path: Path, id_objects_map, **kwargs):
-        local_object = await read_object_from_json(object_path)
-        url, id = local_object.get("url", ""), local_object.get("id", "")
+    async def construct_remover(
+        object_path: Path, id_objects_map, indexed_object: Optional[IndexedObject] = None, **kwargs
+    ):
+        if indexed_object:
+            local_object = {}
+            url, id = indexed_object.url or "", indexed_object.id or ""
+        else:
+            local_object = await read_object_from_json(object_path)
+            url, id = local_object.get("url", ""), local_object.get("id", "")
         # Clearly not a Rossum object, just ignore
         if not url or not id:
             return None
@@ -90,7 +98,8 @@ class SchemaRemover(ObjectRemover):
         removed_schema = await super().remove_if_stale()
 
         # Check if individual formula fields are still in the schema
-        if not removed_schema:
+        # (paginated payloads kept by incremental pulls might come without the content)
+        if not removed_schema and "content" in self.remote_object:
             remote_formula_fields = find_formula_fields_in_schema(self.remote_object["content"])
             remote_field_ids = [ff[0] for ff in remote_formula_fields]
             local_formula_dir = create_formula_directory_path(self.local_path)
@@ -111,6 +120,10 @@ class SchemaRemover(ObjectRemover):
 
 class HookRemover(ObjectRemover):
     async def delete_object(self):
+        # The code path is derived from the hook's config, read it before the file is gone
+        if not self.local_object:
+            self.local_object = await read_object_from_json(self.local_path)
+
         await super().delete_object()
 
         hook_code_path = create_custom_hook_code_path(hook_path=self.local_path, hook=self.local_object)
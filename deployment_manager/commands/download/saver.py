@@ -1,16 +1,16 @@
+from functools import cached_property
+
 from anyio import Path
 from pydantic import BaseModel, ConfigDict
 from rossum_api.domain_logic.resources import Resource
 
-from deployment_manager.commands.download.helpers import should_write_object
 from deployment_manager.commands.download.subdirectory import Subdirectory
-from deployment_manager.commands.download.types import ObjectSaver
+from deployment_manager.commands.download.types import ObjectSaver, index_objects_by_url
 from deployment_manager.common.read_write import (
     create_custom_hook_code_path,
     create_formula_directory_path,
     create_formula_file,
     find_formula_fields_in_schema,
-    write_object_to_json,
     write_str,
 )
 from deployment_manager.utils.consts import CustomResource, Settings, display_warning
@@ -32,15 +32,8 @@ class WorkspaceSaver(ObjectSaver):
 
     async def save_downloaded_object(self, workspace: dict, subdir: Subdirectory):
         object_path = self.construct_object_path(subdir=subdir, object=workspace)
-        if self.download_all or await should_write_object(
-            object_path, workspace, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                workspace,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, workspace):
+            await self.write_object(object_path, workspace)
 
 
 class QueueSaver(ObjectSaver):
@@ -83,20 +76,17 @@ class QueueSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, queue=queue)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, queue, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                queue,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, queue):
+            await self.write_object(object_path, queue)
+
+    @cached_property
+    def workspaces_by_url(self) -> dict[str, dict]:
+        return index_objects_by_url(self.workspaces)
 
     def find_workspace_for_queue(self, queue: dict):
-        for ws in self.workspaces:
-            if ws["url"] == queue.get("workspace", None):
-                return ws
+        workspace = self.workspaces_by_url.get(queue.get("workspace", None), None)
+        if workspace:
+            return workspace
         # display_error(
         #     f"Could not find workspace for {self.display_type} {self.display_label(queue.get('name', "no-name"), queue.get('id', 'no-id'))}. Skipping."
         # )
@@ -110,10 +100,14 @@ class EmailTemplateSaver(QueueSaver):
     def find_parent_object(self, child):
         return self.find_queue(child)
 
+    @cached_property
+    def queues_by_url(self) -> dict[str, dict]:
+        return index_objects_by_url(self.queues)
+
     def find_queue(self, email_template: dict):
-        for queue in self.queues:
-            if queue["url"] == email_template.get("queue", None):
-                return queue
+        queue = self.queues_by_url.get(email_template.get("queue", None), None)
+        if queue:
+            return queue
         # display_warning(
         #     f"Could not find queue for {self.display_type} {self.display_label(email_template.get('name', 'no-name'), email_template.get('id', 'no-id'))}. The object will not be saved locally."
         # )
@@ -154,15 +148,8 @@ class EmailTemplateSaver(QueueSaver):
         object_path = self.construct_object_path(subdir=subdir, email_template=email_template)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, email_template, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                email_template,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, email_template):
+            await self.write_object(object_path, email_template)
 
 
 class InboxSaver(QueueSaver):
@@ -172,10 +159,14 @@ class InboxSaver(QueueSaver):
     def find_parent_object(self, child):
         return self.find_queue(child)
 
+    @cached_property
+    def queues_by_url(self) -> dict[str, dict]:
+        return index_objects_by_url(self.queues)
+
     def find_queue(self, inbox: dict):
-        for queue in self.queues:
-            if queue["url"] == inbox.get("queues", [None])[0]:
-                return queue
+        queue = self.queues_by_url.get((inbox.get("queues", None) or [None])[0], None)
+        if queue:
+            return queue
         # display_warning(
         #     f"Could not find queue for {self.display_type} {self.display_label(inbox.get('name', 'no-name'), inbox.get('id', 'no-id'))}. The object will not be saved locally."
         # )
@@ -207,35 +198,34 @@ class InboxSaver(QueueSaver):
         object_path = self.construct_object_path(subdir=subdir, inbox=inbox)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, inbox, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                inbox,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, inbox):
+            await self.write_object(object_path, inbox)
 
 
 class SchemaSaver(QueueSaver):
     type: Resource = Resource.Schema
     queues: list[dict]
 
-    async def save_downloaded_objects(self):
-        for object in self.objects:
-            subdir = self.find_subdir_of_object(object)
-            if not subdir:
-                self.objects_without_subdir.append(object)
-                continue
-            # The subdir should not be pulled, disregard the current object
-            elif not subdir.include:
-                continue
-            await self.save_downloaded_object(object, subdir)
+    def classify_object(self, object: dict):
+        # Schemas follow their queue, the user is not asked about the ones without any
+        subdir = self.find_subdir_of_object(object)
+        if not subdir:
+            self.objects_without_subdir.append(object)
+            return None
+        # The subdir should not be pulled, disregard the current object
+        elif not subdir.include:
+            return None
+        return subdir
+
+    async def handle_objects_without_subdir(self): ...
 
     def find_parent_object(self, child):
         return self.find_queue(child)
 
+    @cached_property
+    def queues_by_url(self) -> dict[str, dict]:
+        return index_objects_by_url(self.queues)
+
     def find_queue(self, schema: dict):
         schema_queues = schema.get("queues", [None])
         # The schema might not have any queues assigned ([])
@@ -243,14 +233,14 @@ class SchemaSaver(QueueSaver):
             # display_warning(warning_message)
             return None
 
-        for queue in self.queues:
-            if queue["url"] == schema_queues[0]:
-                if len(schema_queues) > 1:
-                    display_warning(
-                        f"{self.display_type} {self.display_label(schema.get('name', 'no-name'), schema.get('id', 'no-id'))} has multiple queues assigned - saving it under the first one ({self.display_label(queue.get('name', 'no-name'), queue.get('id', 'no-id'))})"
-                    )
+        queue = self.queues_by_url.get(schema_queues[0], None)
+        if queue:
+            if len(schema_queues) > 1:
+                display_warning(
+                    f"{self.display_type} {self.display_label(schema.get('name', 'no-name'), schema.get('id', 'no-id'))} has multiple queues assigned - saving it under the first one ({self.display_label(queue.get('name', 'no-name'), queue.get('id', 'no-id'))})"
+                )
 
-                return queue
+            return queue
 
         # display_warning(warning_message)
         return None
@@ -282,15 +272,8 @@ class SchemaSaver(QueueSaver):
         object_path = self.construct_object_path(subdir=subdir, schema=schema)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, schema, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                schema,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, schema):
+            await self.write_object(object_path, schema)
 
             formula_saver = FormulaSaver(parent_schema_path=object_path, parent_schema=schema)
             await formula_saver.save_downloaded_objects()
@@ -337,19 +320,25 @@ class RuleSaver(ObjectSaver):
     def find_parent_object(self, child):
         return self.find_queue_for_rule(child)
 
+    @cached_property
+    def queue_positions_by_url(self) -> dict[str, int]:
+        positions = {}
+        for position, queue in enumerate(self.queues):
+            positions.setdefault(queue["url"], position)
+        return positions
+
     def find_queue_for_rule(self, rule: dict):
         rule_queues = rule.get("queues", [])
         # The rule might not have any queues assigned
         if not rule_queues:
             return None
 
-        # Use the first queue to determine the subdir
+        # Use the first queue (in the order of downloaded queues) to determine the subdir
         # If a rule spans multiple subdirs, this will use the first one
-        for queue in self.queues:
-            if queue["url"] in rule_queues:
-                return queue
-
-        return None
+        queue_positions = [
+            self.queue_positions_by_url[url] for url in rule_queues if url in self.queue_positions_by_url
+        ]
+        return self.queues[min(queue_positions)] if queue_positions else None
 
     def construct_object_path(self, subdir: Subdirectory, rule: dict) -> Path:
         object_path = (
@@ -364,15 +353,8 @@ class RuleSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, rule=rule)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, rule, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                rule,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, rule):
+            await self.write_object(object_path, rule)
 
 
 class HookSaver(ObjectSaver):
@@ -386,15 +368,8 @@ class HookSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, hook=hook)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, hook, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                hook,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, hook):
+            await self.write_object(object_path, hook)
 
             custom_hook_code_path = create_custom_hook_code_path(object_path, hook)
             if custom_hook_code_path:
@@ -412,15 +387,8 @@ class LabelSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, label=label)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, label, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                label,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, label):
+            await self.write_object(object_path, label)
 
 
 class WorkflowSaver(ObjectSaver):
@@ -438,15 +406,8 @@ class WorkflowSaver(ObjectSaver):
 
     async def save_downloaded_object(self, workflow: dict, subdir: Subdirectory):
         object_path = self.construct_object_path(subdir=subdir, object=workflow)
-        if self.download_all or await should_write_object(
-            object_path, workflow, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                workflow,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, workflow):
+            await self.write_object(object_path, workflow)
 
 
 class EngineSaver(ObjectSaver):
@@ -462,15 +423,8 @@ class EngineSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, engine=engine)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, engine, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                engine,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, engine):
+            await self.write_object(object_path, engine)
 
 
 class EngineFieldSaver(ObjectSaver):
@@ -492,11 +446,12 @@ class EngineFieldSaver(ObjectSaver):
     def find_parent_object(self, child):
         return self.find_engine_for_engine_field(child)
 
+    @cached_property
+    def engines_by_url(self) -> dict[str, dict]:
+        return index_objects_by_url(self.engines)
+
     def find_engine_for_engine_field(self, engine_field: dict):
-        for engine in self.engines:
-            if engine["url"] == engine_field.get("engine", None):
-                return engine
-        return None
+        return self.engines_by_url.get(engine_field.get("engine", None), None)
 
     def construct_object_path(self, subdir: Subdirectory, engine_field: dict) -> Path:
         engine = self.find_engine_for_engine_field(engine_field)
@@ -517,15 +472,8 @@ class EngineFieldSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, engine_field=engine_field)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, engine_field, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                engine_field,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, engine_field):
+            await self.write_object(object_path, engine_field)
 
 
 class WorkflowStepSaver(ObjectSaver):
@@ -567,20 +515,17 @@ class WorkflowStepSaver(ObjectSaver):
         object_path = self.construct_object_path(subdir=subdir, workflow_step=workflow_step)
         if not object_path:
             return
-        if self.download_all or await should_write_object(
-            object_path, workflow_step, self.changed_files, self.parent_dir_reference
-        ):
-            await write_object_to_json(
-                object_path,
-                workflow_step,
-                self.type,
-                log_message=f"Pulled {self.display_type} {object_path}",
-            )
+        if await self.should_write(object_path, workflow_step):
+            await self.write_object(object_path, workflow_step)
+
+    @cached_property
+    def workflows_by_url(self) -> dict[str, dict]:
+        return index_objects_by_url(self.workflows)
 
     def find_workflow_for_workflow_step(self, workflow_step: dict):
-        for ws in self.workflows:
-            if ws["url"] == workflow_step.get("workflow", None):
-                return ws
+        workflow = self.workflows_by_url.get(workflow_step.get("workflow", None), None)
+        if workflow:
+            return workflow
         # display_error(
         #     f"Could not find workflow for {self.display_type} {self.display_label(queue.get('name', "no-name"), queue.get('id', 'no-id'))}. Skipping."
         # )
@@ -1,3 +1,4 @@
+import re
 from typing import Annotated
 
 from pydantic import BaseModel, BeforeValidator
@@ -12,10 +13,43 @@ class Subdirectory(BaseModel):
 
 
 def create_subdir_configuration(subdirs):
-    return {name: Subdirectory(name=name, **value if value else {}) for name, value in subdirs.items()}
+    # Already configured subdirs (e.g., shared by the upload and download directories) are kept as they are
+    return {
+        name: value if isinstance(value, Subdirectory) else Subdirectory(name=name, **value if value else {})
+        for name, value in subdirs.items()
+    }
 
 
 SubdirectoriesDict = Annotated[
     dict[str, Subdirectory],
     BeforeValidator(lambda subdirs: create_subdir_configuration(subdirs)),
 ]
+
+
+class SubdirClassifier:
+    """Finds the subdir of an object by its ID and name. Regexes are compiled once for all objects."""
+
+    def __init__(self, subdirs: list[Subdirectory]):
+        self.subdirs = subdirs
+
+        self.subdirs_by_object_id: dict[int, Subdirectory] = {}
+        for subdir in subdirs:
+            for object_id in subdir.object_ids:
+                # The first subdir wins, same as when going through them in order
+                self.subdirs_by_object_id.setdefault(object_id, subdir)
+
+        self.subdir_regexes = [(subdir, re.compile(subdir.regex)) for subdir in subdirs if subdir.regex]
+
+    def classify(self, object: dict) -> Subdirectory | None:
+        if len(self.subdirs) == 1:
+            return self.subdirs[0]
+
+        subdir = self.subdirs_by_object_id.get(object["id"], None)
+        if subdir:
+            return subdir
+
+        for subdir, subdir_regex in self.subdir_regexes:
+            if subdir_regex.search(object["name"]):
+                return subdir
+
+        return None
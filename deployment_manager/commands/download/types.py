@@ -1,6 +1,7 @@
 # types.py - Shared Interfaces to Break Circular Imports
-import re
-from typing import TYPE_CHECKING, Optional
+import asyncio
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, AsyncIterator, Optional
 
 import questionary
 from anyio import Path
@@ -8,7 +9,12 @@ from pydantic import BaseModel, ConfigDict
 from rich import print as pprint
 from rossum_api.domain_logic.resources import Resource
 
-from deployment_manager.commands.download.subdirectory import Subdirectory
+from deployment_manager.commands.download.helpers import should_write_object
+from deployment_manager.commands.download.subdirectory import SubdirClassifier, Subdirectory
+from deployment_manager.common.object_index import canonical_hash
+from deployment_manager.common.read_write import get_versioned_content, write_object_to_json
+from deployment_manager.utils.consts import settings
+from deployment_manager.utils.functions import iterate
 
 if TYPE_CHECKING:
     from deployment_manager.commands.download.directory import DownloadOrganizationDirectory
@@ -23,12 +29,14 @@ class ObjectSaver(BaseModel):
     base_path: Path
     subdirs: list[Subdirectory] = []
     objects: list[dict]
-    changed_files: list
+    changed_files: set
     download_all: bool = False
     skip_objects_without_subdir: bool = False
 
     objects_without_subdir: list[dict] = []
     subdirs_by_object_id: dict[int, str] = {}
+    # Can be shared by all savers of a pull, built from subdirs if not provided
+    subdir_classifier: Optional[SubdirClassifier] = None
 
     @property
     def display_type(self):
@@ -38,32 +46,70 @@ class ObjectSaver(BaseModel):
     def display_label(self, name, id):
         return f'"[green]{name}[/green] ([purple]{id}[/purple])"'
 
-    async def save_downloaded_objects(self):
-        for object in self.objects:
-            subdir = self.find_subdir_of_object(object)
-            if not subdir:
-                if object.get("status") == "deletion_requested":
-                    # If the object has status deletion_requested, we bypass user selection
-                    # Instead, a dummy subdirectory with include=False is used to prevent its children from being downloaded
-                    subdir = Subdirectory(name="_skipped_assets", include=False)
-                else:
-                    self.objects_without_subdir.append(object)
-                    continue
-            # The subdir should not be pulled, disregard the current object
-            elif not subdir.include:
-                continue
+    @property
+    def prompt_lock(self):
+        # Saves run concurrently, user prompts must not
+        return self.parent_dir_reference.prompt_lock if self.parent_dir_reference else nullcontext()
 
-            self.subdirs_by_object_id[object["id"]] = subdir
-            await self.save_downloaded_object(object, subdir)
+    async def save_downloaded_objects(self):
+        await self.save_streamed_objects(iterate(list(self.objects)), collect=False)
+
+    async def save_streamed_objects(self, stream: AsyncIterator[dict], collect: bool = True):
+        """Saves the objects as they come (e.g., while they are still being downloaded).
+
+        The streamed objects are collected in self.objects, objects without a subdir are handled at the end.
+        """
+        save_slots = asyncio.Semaphore(settings.SAVE_CONCURRENCY)
+        saves = []
+
+        async def save(object: dict, subdir: Subdirectory):
+            try:
+                await self.save_downloaded_object(object, subdir)
+            finally:
+                save_slots.release()
+
+        try:
+            async for object in stream:
+                if collect:
+                    self.objects.append(object)
+                if subdir := self.classify_object(object):
+                    await save_slots.acquire()
+                    saves.append(asyncio.create_task(save(object, subdir)))
+        finally:
+            # Let the started saves finish even if the stream failed
+            results = await asyncio.gather(*saves, return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
         await self.handle_objects_without_subdir()
 
+    def classify_object(self, object: dict) -> Optional[Subdirectory]:
+        """Returns the subdir the object should be saved to, None if it should not be saved (yet)."""
+        subdir = self.find_subdir_of_object(object)
+        if not subdir:
+            if object.get("status") == "deletion_requested":
+                # If the object has status deletion_requested, we bypass user selection
+                # Instead, a dummy subdirectory with include=False is used to prevent its children from being downloaded
+                subdir = Subdirectory(name="_skipped_assets", include=False)
+            else:
+                self.objects_without_subdir.append(object)
+                return None
+        # The subdir should not be pulled, disregard the current object
+        elif not subdir.include:
+            return None
+
+        self.subdirs_by_object_id[object["id"]] = subdir
+        return subdir
+
     async def handle_objects_without_subdir(self):
         if not self.objects_without_subdir or self.skip_objects_without_subdir:
             return
 
         for object in self.objects_without_subdir:
-            subdir = await self.get_subdir_from_user(object)
+            async with self.prompt_lock:
+                subdir = await self.get_subdir_from_user(object)
             self.subdirs_by_object_id[object["id"]] = subdir
             await self.save_downloaded_object(object, subdir)
 
@@ -83,21 +129,40 @@ class ObjectSaver(BaseModel):
 
     def construct_object_path(self, subdir: Subdirectory, object: dict) -> Path: ...
 
+    async def should_write(self, object_path: Path, object: dict) -> bool:
+        if not self.download_all and not await should_write_object(
+            object_path, object, self.changed_files, self.parent_dir_reference, object_type=self.type
+        ):
+            return False
+
+        # Incremental pulls keep only the paginated payload of unchanged objects, the full one is needed for writing
+        downloader = getattr(self.parent_dir_reference, "downloader", None)
+        if downloader:
+            await downloader.complete_object(self.type, object)
+
+        return True
+
+    async def write_object(self, object_path: Path, object: dict):
+        await write_object_to_json(object_path, object, self.type)
+        if get_object_index := getattr(self.parent_dir_reference, "get_object_index", None):
+            get_object_index().record_pulled_hash(
+                object_path, canonical_hash(get_versioned_content(object_path, object, self.type))
+            )
+        # Do not print into an open prompt
+        async with self.prompt_lock:
+            pprint(f"Pulled {self.display_type} {object_path}")
+
     async def save_downloaded_object(self): ...
 
     def find_subdir_of_object(self, object: dict):
-        if len(self.subdirs) == 1:
-            return self.subdirs[0]
-
-        for subdir in self.subdirs:
-            if object["id"] in subdir.object_ids:
-                return subdir
+        if not self.subdir_classifier:
+            self.subdir_classifier = SubdirClassifier(self.subdirs)
+        return self.subdir_classifier.classify(object)
 
-        for subdir in self.subdirs:
-            if not subdir.regex:
-                continue
-            subdir_regex = re.compile(subdir.regex)
-            if subdir_regex.findall(object["name"]):
-                return subdir
 
-        return None
+def index_objects_by_url(objects: list[dict]) -> dict[str, dict]:
+    objects_by_url = {}
+    for object in objects:
+        # Keep the first one in case of duplicates, same as a linear search would
+        objects_by_url.setdefault(object["url"], object)
+    return objects_by_url
@@ -36,6 +36,7 @@ async def init_project(name: Path):
         f"\n**/{settings.DEFAULT_DEPLOY_SECRETS_PARENT}/",
         f"\n**/**/{settings.NON_VERSIONED_ATTRIBUTES_FILE_NAME}",
         f"\n**/{settings.DEFAULT_HOOK_SYNC_PARENT}/",
+        f"\n**/{settings.LOCAL_STATE_DIR_NAME}/",
     ]
 
     git_ignore_contents = await git_ignore_path.read_text() if await git_ignore_path.exists() else ""
@@ -13,12 +13,20 @@ from deployment_manager.common.read_write import (
     find_formula_fields_in_schema,
     read_formula_file,
     read_object_from_json,
+    read_txt,
     write_object_to_json,
     write_str,
 )
 from deployment_manager.common.schema import find_schema_id
 from deployment_manager.utils.consts import GIT_CHARACTERS, display_warning, settings
 
+MERGED_OPERATIONS = (
+    GIT_CHARACTERS.UPDATED,
+    GIT_CHARACTERS.CREATED,
+    GIT_CHARACTERS.CREATED_STAGED,
+    GIT_CHARACTERS.CREATED_STAGED_MODIFIED,
+)
+
 
 def is_change_existing(change, changes):
     c_op, c_path = change
@@ -28,109 +36,108 @@ def is_change_existing(change, changes):
     return False
 
 
+def get_change_key(change) -> tuple[str, str]:
+    op, path = change
+    return (op, str(path))
+
+
+def is_formula_code_change(change) -> bool:
+    op, path = change
+    return op in MERGED_OPERATIONS and settings.FORMULA_DIR_NAME in path.parent.name and path.suffix == ".py"
+
+
+def is_hook_code_change(change) -> bool:
+    op, path = change
+    return op in MERGED_OPERATIONS and path.parent.name == "hooks" and path.suffix in [".py", ".js"]
+
+
 async def merge_formula_changes(changes: list[tuple[str, Path]]):
-    merged_changes = []
+    # Insertion-ordered, the same change is listed once
+    merged_changes: dict[tuple[str, str], tuple[str, Path]] = {}
+    # Schema path -> {formula field ID: code file path}
+    formula_paths_by_schema: dict[str, dict[str, Path]] = {}
     for change in changes:
         op, path = change
-
-        if (
-            op
-            in [
-                GIT_CHARACTERS.UPDATED,
-                GIT_CHARACTERS.CREATED,
-                GIT_CHARACTERS.CREATED_STAGED,
-                GIT_CHARACTERS.CREATED_STAGED_MODIFIED,
-            ]
-            and settings.FORMULA_DIR_NAME in path.parent.name
-            and (path.suffix == ".py")
-        ):
-            formula_code = await read_formula_file(path)
-            formula_name = path.stem
-
+        if is_formula_code_change(change):
             schema_path = path.parent.parent / "schema.json"
-            if not await schema_path.exists():
-                continue
+            formula_paths_by_schema.setdefault(str(schema_path), {})[path.stem] = path
+            # The schema change takes the position of its first formula (unless the schema itself changed earlier)
+            merged_changes.setdefault(get_change_key((GIT_CHARACTERS.UPDATED, schema_path)), None)
+        else:
+            merged_changes.setdefault(get_change_key(change), change)
+
+    # All formulas of a schema are written to it at once
+    merged_schemas: dict[str, dict] = {}
+    for schema_path, formula_paths in formula_paths_by_schema.items():
+        schema_path = Path(schema_path)
+        change_key = get_change_key((GIT_CHARACTERS.UPDATED, schema_path))
+        if not await schema_path.exists():
+            if merged_changes[change_key] is None:
+                del merged_changes[change_key]
+            continue
 
-            schema = await read_object_from_json(schema_path)
-            schema_id = find_schema_id(schema["content"], formula_name)
-            schema_id["formula"] = formula_code
+        schema = await read_object_from_json(schema_path)
+        for formula_name, formula_path in formula_paths.items():
+            if not (schema_id := find_schema_id(schema["content"], formula_name)):
+                display_warning(f"Formula field {formula_name} not found in {schema_path}, skipping.")
+                continue
+            schema_id["formula"] = await read_formula_file(formula_path)
 
-            await write_object_to_json(schema_path, schema)
-            new_change = (GIT_CHARACTERS.UPDATED, schema_path)
-            if not is_change_existing(new_change, merged_changes):
-                merged_changes.append(new_change)
-        elif not is_change_existing(change, merged_changes):
-            merged_changes.append(change)
+        await write_object_to_json(schema_path, schema)
+        merged_schemas[str(schema_path)] = schema
+        merged_changes[change_key] = (GIT_CHARACTERS.UPDATED, schema_path)
 
     # If code file was not among the changes, the JSON schemas file already has the new code thanks to the for loop above and no change is technically actually made.
     # In case code of a schema was changed directly in the JSON file, update the formula code file as well.
-    for change in merged_changes:
+    for change in merged_changes.values():
         op, path = change
-        if (
-            op
-            in [
-                GIT_CHARACTERS.UPDATED,
-                GIT_CHARACTERS.CREATED,
-                GIT_CHARACTERS.CREATED_STAGED,
-                GIT_CHARACTERS.CREATED_STAGED_MODIFIED,
-            ]
-            and "schema.json" in path.name
-        ):
-            schema = await read_object_from_json(path)
-
-            formula_fields = find_formula_fields_in_schema(schema["content"])
-            if formula_fields:
-                formula_directory_path = create_formula_directory_path(path)
-                for field_id, code in formula_fields:
+        if op in MERGED_OPERATIONS and "schema.json" in path.name:
+            schema = merged_schemas.get(str(path), None) or await read_object_from_json(path)
+            # Code files merged above are the same as the schema already
+            merged_formula_names = formula_paths_by_schema.get(str(path), {})
+
+            formula_directory_path = create_formula_directory_path(path)
+            for field_id, code in find_formula_fields_in_schema(schema["content"]):
+                if field_id not in merged_formula_names:
                     await create_formula_file(formula_directory_path / f"{field_id}.py", code)
 
-    return merged_changes
+    return list(merged_changes.values())
 
 
 async def merge_hook_changes(changes: list[tuple[str, Path]], org_path: Path):
-    merged_changes = []
+    merged_changes: dict[tuple[str, str], tuple[str, Path]] = {}
+    # Hook object path -> code file path
+    code_paths_by_hook: dict[str, Path] = {}
     for change in changes:
         op, path = change
-        if (
-            op
-            in [
-                GIT_CHARACTERS.UPDATED,
-                GIT_CHARACTERS.CREATED,
-                GIT_CHARACTERS.CREATED_STAGED,
-                GIT_CHARACTERS.CREATED_STAGED_MODIFIED,
-            ]
-            and path.parent.name == "hooks"
-            and path.suffix in [".py", ".js"]
-        ):
-            # Overwrite the code property in the JSON hook file with the code from the file.
-            # If the JSON hook file also had changed code, it will get overwritten!
-            with open(path, "r") as file:
-                code_str = file.read()
-                object_path = org_path / (Path(str(path).removesuffix(".py").removesuffix(".js") + ".json"))
-                hook = await read_object_from_json(object_path)
-                hook["config"]["code"] = code_str
-                await write_object_to_json(object_path, hook)
-                new_change = (GIT_CHARACTERS.UPDATED, object_path)
-                exists = is_change_existing(new_change, merged_changes)
-                if not exists:
-                    merged_changes.append(new_change)
-        elif not is_change_existing(change, merged_changes):
-            merged_changes.append(change)
+        if is_hook_code_change(change):
+            object_path = org_path / (Path(str(path).removesuffix(".py").removesuffix(".js") + ".json"))
+            code_paths_by_hook[str(object_path)] = path
+            # The hook change takes the position of its code (unless the hook itself changed earlier)
+            merged_changes.setdefault(get_change_key((GIT_CHARACTERS.UPDATED, object_path)), None)
+        else:
+            merged_changes.setdefault(get_change_key(change), change)
+
+    merged_hooks: dict[str, dict] = {}
+    for object_path, code_path in code_paths_by_hook.items():
+        object_path = Path(object_path)
+
+        # Overwrite the code property in the JSON hook file with the code from the file.
+        # If the JSON hook file also had changed code, it will get overwritten!
+        hook = await read_object_from_json(object_path)
+        hook["config"]["code"] = await read_txt(code_path)
+        await write_object_to_json(object_path, hook)
+        merged_hooks[str(object_path)] = hook
+        merged_changes[get_change_key((GIT_CHARACTERS.UPDATED, object_path))] = (GIT_CHARACTERS.UPDATED, object_path)
 
     # If code file was not among the changes, the JSON hook file already has the new code thanks to the for loop above and no change is technically actually made.
     # In case code of a hook was changed directly in the JSON file, update the code file as well.
-    for change in merged_changes:
+    for change in merged_changes.values():
         op, path = change
-        if (
-            op
-            in [
-                GIT_CHARACTERS.UPDATED,
-                GIT_CHARACTERS.CREATED,
-                GIT_CHARACTERS.CREATED_STAGED,
-                GIT_CHARACTERS.CREATED_STAGED_MODIFIED,
-            ]
-            and path.parent.name == "hooks"
-        ) and path.suffix == ".json":
+        if op in MERGED_OPERATIONS and path.parent.name == "hooks" and path.suffix == ".json":
+            # The code file merged above is the same as the hook already
+            if str(path) in merged_hooks:
+                continue
             hook = await read_object_from_json(path)
 
             code_path = create_custom_hook_code_path(Path(path), hook)
@@ -139,14 +146,17 @@ async def merge_hook_changes(changes: list[tuple[str, Path]], org_path: Path):
 
             await write_str(code_path, hook.get("config", {}).get("code", None))
 
-    return merged_changes
+    return list(merged_changes.values())
 
 
-async def mark_unstaged_objects_as_updated(changes, org_path, client: AsyncRossumAPIClient):
+async def mark_unstaged_objects_as_updated(changes, org_path, client: AsyncRossumAPIClient, remote_objects: dict = None):
     """
     Unstaged changes may be truly new objects or existing objects that were pulled and not yet committed. Change op-codes based on their existence on the remote.
+    remote_objects are the prefetched remote objects by URL (None if missing from the listing), the others get fetched one by one.
+    Missing objects are fetched as well, an object may be missing from the listing and still exist.
     """
     changes_updated = []
+    created_change_keys = set()
     for change in changes:
         path: Path
         op, path = change
@@ -165,12 +175,15 @@ async def mark_unstaged_objects_as_updated(changes, org_path, client: AsyncRossu
             if object_type in [Resource.Organization, Resource.Inbox]:
                 is_non_creatable_object = True
 
-            try:
-                obj = await client._http_client.request_json(method="GET", url=url)
-            # 404 may happen when looking for the object
-            except APIClientError as e:
-                if e.status_code != 404:
-                    raise e
+            if remote_objects is not None and remote_objects.get(url, None):
+                obj = remote_objects[url]
+            else:
+                try:
+                    obj = await client._http_client.request_json(method="GET", url=url)
+                # 404 may happen when looking for the object
+                except APIClientError as e:
+                    if e.status_code != 404:
+                        raise e
 
             # Object exists on remote -> this should really be an update, not create
             if obj:
@@ -180,7 +193,8 @@ async def mark_unstaged_objects_as_updated(changes, org_path, client: AsyncRossu
                 display_warning(f"Creating organization or inbox is not supported: ({path})")
                 continue
             # Object does not exist on remote -> keep it as create
-            elif not is_change_existing(change, changes_updated):
+            elif get_change_key(change) not in created_change_keys:
+                created_change_keys.add(get_change_key(change))
                 changes_updated.append(change)
         # Add back anything that does not have created git status op codes
         else:
@@ -1,7 +1,11 @@
+from collections import defaultdict
+from typing import Optional
+
 from anyio import Path
 from pydantic import BaseModel, ConfigDict
 from rich import print as pprint
 from rich.panel import Panel
+from rossum_api import APIClientError
 from rossum_api.domain_logic.resources import Resource
 from rossum_api.dtos import Token
 
@@ -15,13 +19,16 @@ from deployment_manager.commands.upload.dependencies import (
     merge_hook_changes,
 )
 from deployment_manager.commands.upload.models import PushException
+from deployment_manager.commands.upload.scheduler import push_in_dependency_order
 from deployment_manager.common.determine_path import determine_object_type_from_url
+from deployment_manager.common.fetch_by_ids import fetch_objects_by_ids
 from deployment_manager.common.git import get_changed_file_paths
-from deployment_manager.common.modified_at import check_modified_timestamp
-from deployment_manager.common.read_write import read_object_from_json, write_object_to_json
+from deployment_manager.common.modified_at import check_modified_timestamp, is_modified_timestamp_synced
+from deployment_manager.common.object_index import canonical_hash
+from deployment_manager.common.read_write import get_versioned_content, read_object_from_json, write_object_to_json
 from deployment_manager.common.rossum_client import CustomAsyncAPIClient
-from deployment_manager.utils.consts import GIT_CHARACTERS, CustomResource, display_error, display_warning, settings
-from deployment_manager.utils.functions import find_all_object_paths, gather_with_concurrency
+from deployment_manager.utils.consts import GIT_CHARACTERS, CustomResource, display_warning, settings
+from deployment_manager.utils.functions import extract_id_from_url, gather_with_concurrency
 
 
 class ChangedObject(BaseModel):
@@ -75,12 +82,28 @@ class ChangedObject(BaseModel):
         return f"{self.display_operation} {self.display_type} {self.display_label}: {error}"
 
 
+class PushedObject(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    path: Path
+    # Server responses to the push, and for updates, the remote version before it
+    remote_object: dict
+    previous_remote_object: dict = {}
+
+    @property
+    def type(self) -> Resource:
+        return determine_object_type_from_url(self.remote_object.get("url", ""))
+
+
 class UploadOrganizationDirectory(OrganizationDirectory):
     upload_all: bool = False
     force: bool = False
     indexed_only: bool = False
     changed_objects: list[ChangedObject] = []
     request_errors: list[str] = []
+    pushed_objects: list[PushedObject] = []
+    # Prefetched before pushing: object URL -> remote object (None if missing from the listing, fetched when needed)
+    remote_objects: dict[str, Optional[dict]] = {}
 
     async def initialize(self):
         if not self.project_path:
@@ -95,6 +118,7 @@ class UploadOrganizationDirectory(OrganizationDirectory):
             credentials = Credentials(token=token, url=self.api_base)
             await validate_credentials(credentials)
             self.client = CustomAsyncAPIClient(base_url=self.api_base, credentials=Token(token=token))
+        self.apply_request_budget()
 
     async def prepare_changed_objects(self):
         changes = get_changed_file_paths(self.project_path / self.name, indexed_only=self.indexed_only)
@@ -105,7 +129,17 @@ class UploadOrganizationDirectory(OrganizationDirectory):
         changes = await merge_hook_changes(changes, self.project_path)
         # changes = await evaluate_delete_dependencies(changes, org_path)
         changes = await merge_formula_changes(changes)
-        changes = await mark_unstaged_objects_as_updated(changes, self.project_path, self.client)
+        # New files might be objects that exist already, see below
+        await self.prefetch_remote_objects(
+            [
+                path
+                for op, path in changes
+                if op in (GIT_CHARACTERS.CREATED, GIT_CHARACTERS.CREATED_STAGED, GIT_CHARACTERS.CREATED_STAGED_MODIFIED)
+            ]
+        )
+        changes = await mark_unstaged_objects_as_updated(
+            changes, self.project_path, self.client, remote_objects=self.remote_objects
+        )
 
         # Include files from all subdirs, the non-included subdir objects will be filtered out later
         if self.upload_all:
@@ -144,53 +178,156 @@ class UploadOrganizationDirectory(OrganizationDirectory):
         try:
             await self.initialize()
         except Exception as e:
-            display_error(f"Error while initializing {self.display_label}: {str(e)}")
+            self.report_error(f"Error while initializing {self.display_label}: {str(e)}")
             return
 
         try:
             await self.find_object_ids_for_subdirs()
             await self.prepare_changed_objects()
-            requests = await self.prepare_upload_requests()
-            if not requests:
+            pushed_objects = await self.prepare_upload_requests()
+            if not pushed_objects:
                 return
         except PushException as e:
-            display_error(
+            self.report_error(
                 f"Error while preparing objects to {settings.UPLOAD_COMMAND_NAME} for {self.display_label}: {str(e)}",
             )
             return
         except Exception as e:
-            display_error(
+            self.report_error(
                 f"Error while preparing objects to {settings.UPLOAD_COMMAND_NAME} for {self.display_label}: {str(e)}",
                 e,
             )
             return
 
-        pprint(Panel(f"Pushing objects to {self.display_label} (Total objects: {len(requests)})"))
-        # Update with concurrency limit
-        await gather_with_concurrency(*requests)
+        pprint(Panel(f"Pushing objects to {self.display_label} (Total objects: {len(pushed_objects)})"))
+        # New objects are created before the objects referencing them, the rest is pushed concurrently
+        await push_in_dependency_order(pushed_objects, push=self.push_object, on_skipped=self.report_skipped_object)
+
+    async def prefetch_remote_objects(self, paths: list[Path]):
+        """Fetches the remote versions of the objects in paths with listings filtered by IDs (per type),
+        so that checking their existence and timestamps does not take a request per object.
+        Objects missing from the listings (or of types whose listings are not complete) are fetched when needed."""
+        urls_by_type = defaultdict(dict)
+        for path in paths:
+            if path.suffix != ".json":
+                continue
+            indexed_object = await self.get_object_index().get(self.project_path / path)
+            if not indexed_object or not indexed_object.id or not indexed_object.url:
+                continue
+            if indexed_object.url in self.remote_objects:
+                continue
+            urls_by_type[determine_object_type_from_url(indexed_object.url)][indexed_object.id] = indexed_object.url
+
+        for object_type, urls in urls_by_type.items():
+            # Only listings of some types include everything (e.g., not schema content), the others are fetched one by one.
+            # Organizations cannot be listed by IDs at all.
+            if not object_type or object_type.value not in settings.LIST_PAYLOAD_COMPLETE_TYPES:
+                continue
+            try:
+                remote_objects = await fetch_objects_by_ids(self.client, object_type, urls.keys())
+            except Exception:
+                # Falls back to checking the objects one by one
+                continue
+
+            for id, url in urls.items():
+                self.remote_objects[url] = remote_objects.get(id, None)
+
+    async def fetch_remote_object(self, url: str):
+        """Fetches an object that was not prefetched, objects that do not exist are left out."""
+        try:
+            self.remote_objects[url] = await self.client._http_client.fetch_one(
+                determine_object_type_from_url(url), extract_id_from_url(url)
+            )
+        # 404 may happen when looking for the object
+        except APIClientError as e:
+            if e.status_code != 404:
+                raise e
+
+    async def get_remote_object(self, object: "ChangedObject") -> dict:
+        url = object.data.get("url", None)
+        if url in self.remote_objects and self.remote_objects[url]:
+            return self.remote_objects[url]
+        return await self.client._http_client.fetch_one(object.type, object.id)
 
     async def prepare_upload_requests(self):
-        requests = []
+        # The timestamps of all updated objects are checked before pushing them
+        await self.prefetch_remote_objects(
+            [
+                changed_object.path
+                for changed_object in self.changed_objects
+                if changed_object.operation in (GIT_CHARACTERS.UPDATED, GIT_CHARACTERS.PARTIALLY_UPADTED)
+            ]
+        )
+
+        pushed_objects = []
         for changed_object in self.changed_objects:
-            match changed_object.operation:
-                case GIT_CHARACTERS.CREATED | GIT_CHARACTERS.CREATED_STAGED | GIT_CHARACTERS.CREATED_STAGED_MODIFIED:
-                    requests.append(self.make_create_request(object=changed_object))
-                case GIT_CHARACTERS.UPDATED | GIT_CHARACTERS.PARTIALLY_UPADTED:
-                    requests.append(self.make_update_request(object=changed_object))
-                case _:
-                    self.request_errors.append(
-                        f'Unrecognized operation "{changed_object.operation}" for {changed_object.display_type} {changed_object.display_label}.'
-                    )
-
-        return requests
+            if changed_object.operation in (
+                GIT_CHARACTERS.CREATED,
+                GIT_CHARACTERS.CREATED_STAGED,
+                GIT_CHARACTERS.CREATED_STAGED_MODIFIED,
+                GIT_CHARACTERS.UPDATED,
+                GIT_CHARACTERS.PARTIALLY_UPADTED,
+            ):
+                pushed_objects.append(changed_object)
+            else:
+                self.request_errors.append(
+                    f'Unrecognized operation "{changed_object.operation}" for {changed_object.display_type} {changed_object.display_label}.'
+                )
+
+        return pushed_objects
+
+    async def push_object(self, object: ChangedObject):
+        match object.operation:
+            case GIT_CHARACTERS.CREATED | GIT_CHARACTERS.CREATED_STAGED | GIT_CHARACTERS.CREATED_STAGED_MODIFIED:
+                return await self.make_create_request(object=object)
+            case _:
+                return await self.make_update_request(object=object)
 
-    async def include_unmodified_files(self, changes: list[tuple[str, Path]]):
-        all_files = await find_all_object_paths(self.org_path)
+    def report_skipped_object(self, object: ChangedObject, prerequisite: ChangedObject):
+        self.request_errors.append(
+            object.create_failure_message(
+                f"Not pushed because {prerequisite.display_type} {prerequisite.display_label} could not be created."
+            )
+        )
 
+    async def include_unmodified_files(self, changes: list[tuple[str, Path]]):
+        """Adds the files not changed in git, but only those that differ from the server."""
+        object_index = self.get_object_index()
         changes_paths = set(map(lambda x: x[1], changes))
-        for file_path in all_files:
-            if file_path not in changes_paths:
-                changes.append((GIT_CHARACTERS.UPDATED.value, file_path))
+        unknown_objects = []
+        for indexed_object in await object_index.scan(self.org_path):
+            if indexed_object.path in changes_paths:
+                continue
+
+            pulled_hash = object_index.get_pulled_hash(indexed_object.path)
+            if pulled_hash is None:
+                unknown_objects.append(indexed_object)
+            elif pulled_hash != indexed_object.content_hash:
+                changes.append((GIT_CHARACTERS.UPDATED.value, indexed_object.path))
+
+        # Files not pulled (or pushed) since the hashes are recorded get compared with the remote objects
+        await self.prefetch_remote_objects([indexed_object.path for indexed_object in unknown_objects])
+        await gather_with_concurrency(
+            *[
+                self.fetch_remote_object(indexed_object.url)
+                for indexed_object in unknown_objects
+                if indexed_object.url and not self.remote_objects.get(indexed_object.url, None)
+            ]
+        )
+        for indexed_object in unknown_objects:
+            remote_object = self.remote_objects.get(indexed_object.url, None)
+            object_type = determine_object_type_from_url(indexed_object.url) if indexed_object.url else None
+            if remote_object and indexed_object.content_hash == canonical_hash(
+                get_versioned_content(indexed_object.path, remote_object, object_type)
+            ):
+                object_index.record_pulled_hash(indexed_object.path, indexed_object.content_hash)
+                continue
+            changes.append((GIT_CHARACTERS.UPDATED.value, indexed_object.path))
+
+    def record_pushed_content(self, object: ChangedObject, result: dict):
+        self.get_object_index().record_pulled_hash(
+            object.path, canonical_hash(get_versioned_content(object.path, result, object.type))
+        )
 
     async def make_update_request(self, object: ChangedObject):
         try:
@@ -199,12 +336,9 @@ class UploadOrganizationDirectory(OrganizationDirectory):
                 raise Exception("Missing object ID")
             if not url:
                 raise Exception("Missing object URL")
-            local_remote_timestamp_synced = await check_modified_timestamp(
-                client=self.client,
-                resource=object.type,
-                id=object.id,
-                local_object=object.data,
-            )
+            # Kept for refreshing the objects related to the previous version after the push
+            previous_remote_object = await self.get_remote_object(object)
+            local_remote_timestamp_synced = is_modified_timestamp_synced(previous_remote_object, object.data)
             if not self.force and not local_remote_timestamp_synced:
                 self.request_errors.append(object.create_timestamp_mismatch_message())
                 return None
@@ -221,6 +355,10 @@ class UploadOrganizationDirectory(OrganizationDirectory):
                 result,
                 object.type,
             )
+            self.record_pushed_content(object, result)
+            self.pushed_objects.append(
+                PushedObject(path=object.path, remote_object=result, previous_remote_object=previous_remote_object)
+            )
 
             pprint(object.create_success_message())
             return result
@@ -242,6 +380,8 @@ class UploadOrganizationDirectory(OrganizationDirectory):
                 result,
                 object.type,
             )
+            self.record_pushed_content(object, result)
+            self.pushed_objects.append(PushedObject(path=object.path, remote_object=result))
 
             pprint(object.create_success_message())
             return result
@@ -0,0 +1,103 @@
+from rossum_api import APIClientError
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.commands.download.directory import DownloadOrganizationDirectory
+from deployment_manager.commands.upload.directory import PushedObject, UploadOrganizationDirectory
+from deployment_manager.common.determine_path import determine_object_type_from_url
+from deployment_manager.utils.consts import display_error
+from deployment_manager.utils.functions import extract_id_from_url, gather_with_concurrency
+
+# Relations whose other side is kept in sync by the server (e.g., creating a hook with queues changes queue.hooks)
+REVERSE_RELATIONS = {
+    Resource.Hook: ["queues"],
+    Resource.Queue: ["workspace", "schema", "inbox", "hooks"],
+    Resource.Workspace: ["queues"],
+    Resource.Schema: ["queues"],
+    Resource.Inbox: ["queues"],
+    Resource.Rule: ["schema"],
+}
+
+# Types whose local directories contain their children, moving them moves the children too
+DIRECTORY_TYPES = (Resource.Workspace, Resource.Queue)
+
+
+def find_related_urls(pushed_objects: list[PushedObject]) -> set[str]:
+    """URLs of objects changed by the server as a side effect of the push (both before and after it).
+    Pushed objects are included too when another pushed object is related to them,
+    their own push response may predate the side effects of the other push."""
+    urls = set()
+    for pushed_object in pushed_objects:
+        own_url = pushed_object.remote_object.get("url", "")
+        for attribute in REVERSE_RELATIONS.get(pushed_object.type, []):
+            for object in (pushed_object.remote_object, pushed_object.previous_remote_object):
+                value = object.get(attribute, None)
+                for url in value if isinstance(value, list) else [value]:
+                    if isinstance(url, str) and url and url != own_url:
+                        urls.add(url)
+
+    return urls
+
+
+def is_directory_moved(pushed_object: PushedObject) -> bool:
+    if pushed_object.type not in DIRECTORY_TYPES:
+        return False
+
+    # Created objects get an ID (part of the path) only from the server
+    previous_object = pushed_object.previous_remote_object
+    return not previous_object or any(
+        pushed_object.remote_object.get(attribute, None) != previous_object.get(attribute, None)
+        for attribute in ("id", "name", "workspace")
+    )
+
+
+async def fetch_related_object(directory: UploadOrganizationDirectory, url: str):
+    try:
+        return await directory.client._http_client.fetch_one(
+            determine_object_type_from_url(url), extract_id_from_url(url)
+        )
+    except APIClientError as e:
+        # Deleted in the meantime, the next pull removes it
+        if e.status_code == 404:
+            return None
+        raise
+
+
+async def refresh_pushed_objects(directory: UploadOrganizationDirectory) -> bool:
+    """Rewrites the local copies of the pushed objects and the objects they changed on the server.
+    Returns False if a full pull is needed instead (a workspace or queue directory moved)."""
+    if not directory.pushed_objects:
+        return True
+    if any(is_directory_moved(pushed_object) for pushed_object in directory.pushed_objects):
+        return False
+
+    related_urls = find_related_urls(directory.pushed_objects)
+    related_objects = await gather_with_concurrency(*[fetch_related_object(directory, url) for url in related_urls])
+
+    download_directory = DownloadOrganizationDirectory(
+        name=directory.name,
+        org_id=directory.org_id,
+        api_base=directory.api_base,
+        subdirectories=directory.subdirectories,
+        project_path=directory.project_path,
+        client=directory.client,
+        object_index=directory.object_index,
+    )
+    await download_directory.refresh_objects(
+        remote_objects=[
+            *[
+                pushed_object.remote_object
+                for pushed_object in directory.pushed_objects
+                # Refetched after all the pushes
+                if pushed_object.remote_object.get("url", "") not in related_urls
+            ],
+            *[related_object for related_object in related_objects if related_object],
+        ],
+        previous_paths=[pushed_object.path for pushed_object in directory.pushed_objects],
+    )
+    if download_directory.errors:
+        # The summary of the push is printed already, the errors would not be shown otherwise
+        display_error(
+            f"Error(s) while refreshing the pushed objects of {directory.display_label}:\n"
+            f"{'\n'.join(download_directory.errors)}"
+        )
+    return True
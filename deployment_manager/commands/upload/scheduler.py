@@ -0,0 +1,149 @@
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.utils.consts import GIT_CHARACTERS, settings
+
+if TYPE_CHECKING:
+    from deployment_manager.commands.upload.directory import ChangedObject
+
+# Attributes referencing other objects that must exist before the object is pushed
+# (queue.inbox is read-only, the inbox references its queues instead)
+DEPENDENCY_ATTRIBUTES = {
+    Resource.Queue: ["workspace", "schema", "hooks"],
+    Resource.Inbox: ["queues"],
+    Resource.Hook: ["queues", "run_after"],
+}
+
+CREATE_OPERATIONS = (GIT_CHARACTERS.CREATED, GIT_CHARACTERS.CREATED_STAGED, GIT_CHARACTERS.CREATED_STAGED_MODIFIED)
+
+
+class PushDependency(BaseModel):
+    # Index of the prerequisite in the pushed objects
+    index: int
+    attribute: str
+    url: str
+
+
+def find_referenced_urls(object: "ChangedObject") -> list[tuple[str, str]]:
+    references = []
+    for attribute in DEPENDENCY_ATTRIBUTES.get(object.type, []):
+        value = object.data.get(attribute, None)
+        for url in value if isinstance(value, list) else [value]:
+            if isinstance(url, str) and url:
+                references.append((attribute, url))
+    return references
+
+
+def build_dependencies(objects: list["ChangedObject"]) -> list[list[PushDependency]]:
+    """Dependencies of each object on the objects created in the same push
+    (their URLs are local placeholders until the server assigns new ones)."""
+    created_indexes = {
+        object.data.get("url"): index for index, object in enumerate(objects) if object.operation in CREATE_OPERATIONS
+    }
+
+    dependencies = []
+    for index, object in enumerate(objects):
+        object_dependencies = []
+        for attribute, url in find_referenced_urls(object):
+            prerequisite_index = created_indexes.get(url, None)
+            if prerequisite_index is not None and prerequisite_index != index:
+                object_dependencies.append(PushDependency(index=prerequisite_index, attribute=attribute, url=url))
+        dependencies.append(object_dependencies)
+    return dependencies
+
+
+def find_cycle_remainder(dependencies: list[list[PushDependency]]) -> list[int]:
+    """Indexes that cannot be ordered (Kahn's algorithm), empty if there is no cycle."""
+    remaining_counts = [len({dependency.index for dependency in deps}) for deps in dependencies]
+    dependents = [set() for _ in dependencies]
+    for index, deps in enumerate(dependencies):
+        for dependency in deps:
+            dependents[dependency.index].add(index)
+
+    ready = [index for index, count in enumerate(remaining_counts) if not count]
+    ordered_count = 0
+    while ready:
+        index = ready.pop()
+        ordered_count += 1
+        for dependent in dependents[index]:
+            remaining_counts[dependent] -= 1
+            if not remaining_counts[dependent]:
+                ready.append(dependent)
+
+    if ordered_count == len(dependencies):
+        return []
+    return [index for index, count in enumerate(remaining_counts) if count]
+
+
+def break_dependency_cycles(objects: list["ChangedObject"], dependencies: list[list[PushDependency]]):
+    """Removes references until the objects can be ordered. List references go first, the server fills in the other
+    side of the relation once the referencing object is pushed (e.g., hook.queues and queue.hooks)."""
+    while remainder := find_cycle_remainder(dependencies):
+        candidates = [(index, dependency) for index in remainder for dependency in dependencies[index]]
+        index, dependency = next(
+            (
+                (index, dependency)
+                for index, dependency in candidates
+                if isinstance(objects[index].data.get(dependency.attribute, None), list)
+            ),
+            candidates[0],
+        )
+
+        dependencies[index].remove(dependency)
+        value = objects[index].data.get(dependency.attribute, None)
+        if isinstance(value, list):
+            objects[index].data[dependency.attribute] = [url for url in value if url != dependency.url]
+        else:
+            objects[index].data[dependency.attribute] = None
+
+
+def replace_references(object: "ChangedObject", replaced_urls: dict[str, str]):
+    """Back-fills the URLs assigned by the server to the newly created prerequisites."""
+    for attribute in DEPENDENCY_ATTRIBUTES.get(object.type, []):
+        value = object.data.get(attribute, None)
+        if isinstance(value, list):
+            object.data[attribute] = [replaced_urls.get(url, url) for url in value]
+        elif isinstance(value, str):
+            object.data[attribute] = replaced_urls.get(value, value)
+
+
+async def push_in_dependency_order(
+    objects: list["ChangedObject"],
+    push: Callable[["ChangedObject"], Awaitable[Optional[dict]]],
+    on_skipped: Callable[["ChangedObject", "ChangedObject"], None],
+    n: int = None,
+) -> list[Optional[dict]]:
+    """Pushes the objects concurrently (at most n at once), each one as soon as the objects it references are created.
+    push returns the server response (None on failure), objects depending on a failed one are skipped."""
+    dependencies = build_dependencies(objects)
+    break_dependency_cycles(objects, dependencies)
+
+    semaphore = asyncio.Semaphore(n or settings.CONCURRENCY)
+    done = [asyncio.Event() for _ in objects]
+    results: list[Optional[dict]] = [None] * len(objects)
+    replaced_urls = {}
+
+    async def push_one(index: int):
+        object = objects[index]
+        try:
+            for dependency in dependencies[index]:
+                await done[dependency.index].wait()
+                if not results[dependency.index]:
+                    on_skipped(object, objects[dependency.index])
+                    return
+
+            replace_references(object, replaced_urls)
+            local_url = object.data.get("url", None)
+            async with semaphore:
+                results[index] = await push(object)
+
+            if local_url and results[index] and (new_url := results[index].get("url", None)):
+                replaced_urls[local_url] = new_url
+        finally:
+            done[index].set()
+
+    await asyncio.gather(*[push_one(index) for index in range(len(objects))])
+    return results
@@ -1,3 +1,4 @@
+import os
 import subprocess
 
 import click
@@ -8,6 +9,11 @@ from rich.panel import Panel
 # from project_rossum_deploy.commands.download.download import download_project
 from deployment_manager.commands.download.download import download_destinations
 from deployment_manager.commands.upload.directory import UploadOrganizationDirectory
+from deployment_manager.commands.upload.refresh import refresh_pushed_objects
+from deployment_manager.common.fleet import RequestBudget, display_summary, run_for_organizations
+from deployment_manager.common.git import forget_git_changes
+from deployment_manager.common.non_versioned_attributes import buffered_session
+from deployment_manager.common.object_index import ObjectIndex
 from deployment_manager.common.read_write import read_prd_project_config
 from deployment_manager.common.upload_download_setup import (
     check_unique_org_ids,
@@ -70,9 +76,40 @@ Only source files are taken into account by default.
     default=None,
     help="Maximum concurrent API requests (default: 5, or PRD2_CONCURRENCY env var).",
 )
+@click.option(
+    "--org-concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    help="How many org directories are pushed at once.",
+)
+@click.option(
+    "--request-budget",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Maximum concurrent API requests across all org directories pushed at once (default: 20).",
+)
+@click.option(
+    "--full-refresh",
+    default=False,
+    is_flag=True,
+    help="Pulls the whole destinations after pushing instead of refreshing just the pushed (and related) objects.",
+)
 @coro
-async def upload_project_wrapper(destinations, all, force, indexed_only, commit, message, concurrency):
+async def upload_project_wrapper(
+    destinations,
+    all,
+    force,
+    indexed_only,
+    commit,
+    message,
+    concurrency,
+    org_concurrency=1,
+    request_budget=None,
+    full_refresh=False,
+):
     apply_concurrency_override(concurrency)
+    if request_budget:
+        settings.REQUEST_BUDGET = request_budget
     # To be able to run the command progammatically without the CLI decorators
     await upload_destinations(
         destinations=destinations,
@@ -81,9 +118,12 @@ async def upload_project_wrapper(destinations, all, force, indexed_only, commit,
         indexed_only=indexed_only,
         commit=commit,
         commit_message=message,
+        org_concurrency=org_concurrency,
+        full_refresh=full_refresh,
     )
 
 
+@buffered_session
 async def upload_destinations(
     destinations: tuple[Path],
     project_path: Path = None,
@@ -92,6 +132,8 @@ async def upload_destinations(
     indexed_only: bool = False,
     commit: bool = False,
     commit_message: str = "",
+    org_concurrency: int = 1,
+    full_refresh: bool = False,
 ):
     if not destinations:
         display_warning("No destinations specified to pull.")
@@ -101,6 +143,8 @@ async def upload_destinations(
         project_path = Path("./")
 
     project_config = await read_prd_project_config(project_path)
+    object_index = ObjectIndex(project_path=project_path)
+    request_budget = RequestBudget(settings.REQUEST_BUDGET) if org_concurrency > 1 else None
 
     configured_directories = {
         name: UploadOrganizationDirectory(
@@ -109,6 +153,8 @@ async def upload_destinations(
             upload_all=upload_all,
             force=force,
             indexed_only=indexed_only,
+            object_index=object_index,
+            request_budget=request_budget,
             **value,
         )
         for name, value in project_config.get("directories", {}).items()
@@ -128,26 +174,48 @@ async def upload_destinations(
         expanded_destinations=expanded_destinations,
     )
 
-    errors_encountered = False
-    for dir_config in configured_directories.values():
-        if all(not subdir.include for subdir in dir_config.subdirectories.values()):
-            continue
-
+    async def upload_organization(dir_name: str) -> list[str]:
+        dir_config = configured_directories[dir_name]
         try:
             await dir_config.upload_organization()
             if dir_config.request_errors:
-                errors_encountered = True
                 display_error(
                     f"Error(s) while uploading {dir_config.display_label}:\n{'\n'.join(dir_config.request_errors)}"
                 )
         except Exception as e:
-            display_error(
+            dir_config.report_error(
                 f"Error during the {settings.UPLOAD_COMMAND_NAME} of {dir_config.display_label}: {e}",
                 e,
             )
+        return dir_config.errors + dir_config.request_errors
 
-    if not errors_encountered:
-        await download_destinations(destinations=destinations)
+    results = await run_for_organizations(
+        names=[
+            name
+            for name, dir_config in configured_directories.items()
+            if any(subdir.include for subdir in dir_config.subdirectories.values())
+        ],
+        run=upload_organization,
+        org_concurrency=org_concurrency,
+        request_budget=request_budget,
+    )
+
+    if len(results) > 1:
+        display_summary(settings.UPLOAD_COMMAND_NAME, results)
+
+    if not any(configured_directories[result.name].request_errors for result in results):
+        # Pushed objects got rewritten locally, git has to be asked again
+        forget_git_changes()
+        if full_refresh:
+            await download_destinations(destinations=destinations, org_concurrency=org_concurrency)
+        else:
+            await refresh_destinations(
+                destinations=destinations,
+                project_path=project_path,
+                directories=[configured_directories[result.name] for result in results],
+                org_concurrency=org_concurrency,
+            )
+    object_index.close()
 
     if commit:
         subprocess.run(["git", "add", "."])
@@ -158,3 +226,31 @@ async def upload_destinations(
             f"Finished {settings.UPLOAD_COMMAND_NAME}.{' Please commit the changes before running this command again.' if not commit else ''}"
         )
     )
+
+
+async def refresh_destinations(
+    destinations: tuple[Path],
+    project_path: Path,
+    directories: list[UploadOrganizationDirectory],
+    org_concurrency: int = 1,
+):
+    """Refreshes the pushed objects locally, org directories where that is not enough get pulled whole."""
+    pulled_dir_names = set()
+    for directory in directories:
+        try:
+            if not await refresh_pushed_objects(directory):
+                pulled_dir_names.add(directory.name)
+        except Exception as e:
+            display_error(f"Error while refreshing the pushed objects of {directory.display_label}: {e}", e)
+            pulled_dir_names.add(directory.name)
+
+    if pulled_dir_names:
+        await download_destinations(
+            destinations=tuple(
+                destination
+                for destination in destinations
+                if Path(os.path.relpath(destination, project_path)).parts[0] in pulled_dir_names
+            ),
+            project_path=project_path,
+            org_concurrency=org_concurrency,
+        )
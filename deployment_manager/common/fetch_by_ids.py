@@ -0,0 +1,34 @@
+from typing import Iterable
+
+from rossum_api import AsyncRossumAPIClient
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.utils.consts import CustomResource, settings
+from deployment_manager.utils.functions import gather_with_concurrency
+
+
+async def fetch_objects_by_ids(
+    client: AsyncRossumAPIClient, type: Resource | CustomResource, ids: Iterable[int]
+) -> dict[int, dict]:
+    """Fetches the objects with a few listings filtered by their IDs instead of one request per object.
+    Returns the objects by their ID, the missing ones are not included."""
+    ids = sorted({int(id) for id in ids if id})
+    batches = [
+        ids[start : start + settings.FETCH_BY_IDS_BATCH_SIZE]
+        for start in range(0, len(ids), settings.FETCH_BY_IDS_BATCH_SIZE)
+    ]
+
+    async def fetch_batch(batch: list[int]):
+        wanted_ids = set(batch)
+        return [
+            object
+            async for object in client._http_client.fetch_all(type, id=",".join(map(str, batch)))
+            # Do not rely on the filter alone
+            if object.get("id", None) in wanted_ids
+        ]
+
+    objects = {}
+    for batch_objects in await gather_with_concurrency(*[fetch_batch(batch) for batch in batches]):
+        for object in batch_objects:
+            objects[object["id"]] = object
+    return objects
@@ -0,0 +1,116 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+from rich import print as pprint
+from rich.panel import Panel
+
+from deployment_manager.utils.consts import display_error
+
+
+class RequestBudget:
+    """Limits the API requests in flight of all organizations processed at once.
+
+    Each active organization gets a fair share of the budget, an organization can use more only when others are done.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.in_flight: dict[str, int] = defaultdict(int)
+        self.active_organizations: set[str] = set()
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        if not self._condition:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @property
+    def fair_share(self) -> int:
+        return max(1, math.ceil(self.total / max(1, len(self.active_organizations))))
+
+    def can_request(self, organization: str) -> bool:
+        return sum(self.in_flight.values()) < self.total and self.in_flight[organization] < self.fair_share
+
+    async def acquire(self, organization: str):
+        async with self.condition:
+            self.active_organizations.add(organization)
+            await self.condition.wait_for(lambda: self.can_request(organization))
+            self.in_flight[organization] += 1
+
+    async def release(self, organization: str):
+        async with self.condition:
+            self.in_flight[organization] -= 1
+            self.condition.notify_all()
+
+    async def finish(self, organization: str):
+        async with self.condition:
+            self.active_organizations.discard(organization)
+            # The others now have a bigger share
+            self.condition.notify_all()
+
+    def for_organization(self, organization: str) -> "OrganizationRequestBudget":
+        return OrganizationRequestBudget(budget=self, organization=organization)
+
+
+class OrganizationRequestBudget:
+    """Async context manager wrapping each request of one organization (see _CustomInternalClient)."""
+
+    def __init__(self, budget: RequestBudget, organization: str):
+        self.budget = budget
+        self.organization = organization
+
+    async def __aenter__(self):
+        await self.budget.acquire(self.organization)
+
+    async def __aexit__(self, *args):
+        await self.budget.release(self.organization)
+
+
+class OrganizationResult(BaseModel):
+    name: str
+    duration: float = 0
+    errors: list[str] = []
+
+
+async def run_for_organizations(
+    names: list[str],
+    run: Callable[[str], Awaitable[list[str]]],
+    org_concurrency: int = 1,
+    request_budget: Optional[RequestBudget] = None,
+) -> list[OrganizationResult]:
+    """Runs the command for the org directories (at most org_concurrency at once), run returns the errors of an org."""
+    semaphore = asyncio.Semaphore(org_concurrency)
+
+    async def run_one(name: str):
+        async with semaphore:
+            result = OrganizationResult(name=name)
+            start = time.perf_counter()
+            try:
+                result.errors = list(await run(name) or [])
+            except Exception as e:
+                display_error(f"Error while processing {name}: {e}", e)
+                result.errors = [str(e)]
+            finally:
+                result.duration = time.perf_counter() - start
+                if request_budget:
+                    await request_budget.finish(name)
+            return result
+
+    return list(await asyncio.gather(*[run_one(name) for name in names]))
+
+
+def display_summary(command_name: str, results: list[OrganizationResult]):
+    lines = []
+    for result in sorted(results, key=lambda result: result.name):
+        status = "[red]failed[/red]" if result.errors else "[green]ok[/green]"
+        lines.append(f"[blue]{result.name}[/blue]: {status} in {result.duration:.1f} s")
+        lines.extend(f"  - {error}" for error in result.errors)
+
+    failed_count = len([result for result in results if result.errors])
+    title = f"{command_name} summary: {len(results) - failed_count} ok, {failed_count} failed"
+    pprint(Panel("\n".join(lines), title=title))
@@ -1,40 +1,150 @@
+import os
 import subprocess
+from typing import Optional
 
 from anyio import Path
+from pydantic import BaseModel
 
 from deployment_manager.utils.consts import GIT_CHARACTERS
 
+# States in `git status --porcelain=v2`, see https://git-scm.com/docs/git-status#_porcelain_format_version_2
+UNCHANGED = "."
+UNTRACKED = "?"
 
-def get_changed_file_paths(destination: str, indexed_only=False) -> list[tuple[str, Path]]:
-    # The -s flag is there to show a simplified list of changes
-    # The -u flag is there to show each individual file (and not a subdir)
-    # The change in git config is because of potential 'unusual' (non-ASCII) characters in paths
-    subprocess.run(["git", "config", "core.quotePath", "false"])
-    git_destination_diff = subprocess.run(
-        ["git", "status", destination, "-s", "-u"],
+CHANGED_FILE_SUFFIXES = (".json", ".py", ".js")
+
+
+class GitChange(BaseModel):
+    # Relative to the current directory
+    path: str
+    # State of the path in the index (staged) and in the working tree (unstaged), "." if unchanged
+    staged: str = UNCHANGED
+    unstaged: str = UNCHANGED
+    # Set for renamed/copied files
+    original_path: Optional[str] = None
+
+    @property
+    def operation(self) -> str:
+        """The change as a `git status -s` code without the spaces (M, MM, ??...)."""
+        # The renamed file still contains the same object
+        if self.original_path:
+            return GIT_CHARACTERS.UPDATED
+        return f"{self.staged}{self.unstaged}".replace(UNCHANGED, "")
+
+
+def parse_porcelain_v2(output: str) -> list[GitChange]:
+    """Parses the NUL-separated output of `git status --porcelain=v2 -z` (paths are not quoted or escaped)."""
+    changes = []
+    records = iter(output.split("\0"))
+    for record in records:
+        if not record:
+            continue
+
+        match record[0]:
+            case "1":
+                # 1 XY sub mH mI mW hH hI path
+                fields = record.split(" ", maxsplit=8)
+                changes.append(GitChange(path=fields[8], staged=fields[1][0], unstaged=fields[1][1]))
+            case "2":
+                # 2 XY sub mH mI mW hH hI Xscore path, the original path is in the next record
+                fields = record.split(" ", maxsplit=9)
+                changes.append(
+                    GitChange(
+                        path=fields[9],
+                        staged=fields[1][0],
+                        unstaged=fields[1][1],
+                        original_path=next(records, None),
+                    )
+                )
+            case "u":
+                # u XY sub m1 m2 m3 mW h1 h2 h3 path
+                fields = record.split(" ", maxsplit=10)
+                changes.append(GitChange(path=fields[10], staged=fields[1][0], unstaged=fields[1][1]))
+            case "?":
+                changes.append(GitChange(path=record[2:], staged=UNTRACKED, unstaged=UNTRACKED))
+            # Headers (#) and ignored files (!) are not changes
+
+    return changes
+
+
+# Working directory -> (repository root, index file)
+_repository_paths: dict[str, tuple[str, str]] = {}
+# (working directory, destination, index signature) -> changes
+_changes_cache: dict[tuple, list[GitChange]] = {}
+
+
+def get_repository_paths(cwd: str) -> tuple[str, str]:
+    if cwd not in _repository_paths:
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel", "--git-path", "index"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+        lines = result.stdout.splitlines() if result.returncode == 0 else []
+        if len(lines) != 2:
+            # Not a git repository (yet), nothing to remember
+            return "", ""
+        _repository_paths[cwd] = (lines[0], os.path.join(cwd, lines[1]))
+
+    return _repository_paths[cwd]
+
+
+def get_index_signature(index_path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(index_path)
+    except (FileNotFoundError, ValueError):
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_git_changes(destination: str) -> list[GitChange]:
+    """Returns the changes under destination. The result is reused until the git index changes
+    (or forget_git_changes is called after the command changed the files itself)."""
+    cwd = os.getcwd()
+    repository_root, index_path = get_repository_paths(cwd)
+
+    cache_key = None
+    if index_signature := get_index_signature(index_path):
+        cache_key = (cwd, str(destination), index_signature)
+        if cache_key in _changes_cache:
+            return _changes_cache[cache_key]
+
+    # --no-optional-locks keeps git from refreshing (rewriting) the index, so its signature stays the same
+    # -u shows each individual file (and not a subdir)
+    git_status = subprocess.run(
+        ["git", "--no-optional-locks", "status", "--porcelain=v2", "-z", "-u", "--", str(destination)],
         capture_output=True,
         text=True,
+        encoding="utf-8",
     )
-    subprocess.run(["git", "config", "core.quotePath", "true"])
+    changes = parse_porcelain_v2(git_status.stdout if git_status.returncode == 0 else "")
 
-    changes_raw = git_destination_diff.stdout.split("\n")
-    changes = []
-    for change in changes_raw:
-        if not change:
-            continue
+    # Porcelain paths are relative to the repository root
+    real_cwd = os.path.realpath(cwd)
+    if repository_root and os.path.realpath(repository_root) != real_cwd:
+        for change in changes:
+            change.path = os.path.relpath(os.path.join(os.path.realpath(repository_root), change.path), real_cwd)
+
+    if cache_key:
+        _changes_cache[cache_key] = changes
+    return changes
+
+
+def forget_git_changes():
+    _changes_cache.clear()
 
-        if indexed_only:
-            # "M" is staged modified, " M" is staged unmodified
-            first_char, op_path = tuple(change.split(" ", maxsplit=1))
-            if first_char != GIT_CHARACTERS.UPDATED:
-                continue
 
-        change = change.strip(" ")
-        op, path = tuple(change.split(" ", maxsplit=1))
+def get_changed_file_paths(destination: str, indexed_only=False) -> list[tuple[str, Path]]:
+    changes = []
+    for change in get_git_changes(destination):
+        # Only the staged modifications
+        if indexed_only and change.staged != GIT_CHARACTERS.UPDATED:
+            continue
 
-        path = Path(path.strip().strip('"'))
-        if path.suffix not in (".json", ".py", ".js"):
+        path = Path(change.path)
+        if path.suffix not in CHANGED_FILE_SUFFIXES:
             continue
 
-        changes.append((op, path))
+        changes.append((change.operation, path))
     return changes
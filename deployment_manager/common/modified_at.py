@@ -2,6 +2,10 @@ from rossum_api import AsyncRossumAPIClient
 from rossum_api.domain_logic.resources import Resource
 
 
+def is_modified_timestamp_synced(remote_object: dict, local_object: dict) -> bool:
+    return remote_object.get("modified_at", "") == local_object.get("modified_at", "")
+
+
 async def check_modified_timestamp(client: AsyncRossumAPIClient, resource: Resource, id: int, local_object: dict):
     object = await client._http_client.fetch_one(resource, id)
-    return object.get("modified_at", "") == local_object.get("modified_at", "")
+    return is_modified_timestamp_synced(object, local_object)
@@ -0,0 +1,182 @@
+import functools
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from anyio import Path
+from pydantic import BaseModel
+
+from deployment_manager.utils.consts import display_error, settings
+
+
+class NonVersionedAttributesFile(BaseModel):
+    data: dict = {}
+    # (mtime_ns, size, inode) of the file when it was last read or written, None if it did not exist
+    signature: Optional[tuple[int, int, int]] = None
+    dirty: bool = False
+
+
+class NonVersionedAttributeStore:
+    """In-memory copy of the non-versioned attribute files (one per dir/subdir).
+
+    Each file is loaded once and reloaded only if it changed on disk in the meantime.
+    Within a session (see buffered_session), changes are only kept in memory and every changed file gets written
+    once (atomically) when the outermost session ends. Outside of one, changes are written right away.
+    All operations are synchronous, so concurrent coroutines cannot interleave within them.
+    """
+
+    def __init__(self):
+        self.files: dict[str, NonVersionedAttributesFile] = {}
+        self.session_depth = 0
+
+    @staticmethod
+    def get_file_path(path: Path) -> Optional[Path]:
+        if len(path.parents) < 3:
+            # outside subdirectory, no non_versioned_attribute allowed at this level
+            return None
+
+        # path.parents is a list of full paths which are parents for the current file from closest to furthest
+        # path.parents example: if we have a file a/b/c/d/e.txt, Path(e.txt).parents would be [a/b/c/d, a/b/c, a/b, a, .]
+        # `non_versioned_attributes` file we need to find is always saved on org/suborg level
+        # That's why it's always -3. then, we can load org/suborg/non_versioned_object_attributes.json
+        subdir_path = path.parents[-3]  # path to dir/subdir, or organization/suborganization
+        return subdir_path / settings.NON_VERSIONED_ATTRIBUTES_FILE_NAME  # file is saved in root for each subdirectory
+
+    @staticmethod
+    def get_signature(file_path: str) -> Optional[tuple[int, int, int]]:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def load(self, file_path: Path) -> tuple[str, NonVersionedAttributesFile]:
+        key = os.path.abspath(file_path)
+        cached_file = self.files.get(key, None)
+        # Nothing else is expected to change the files while a command runs
+        if cached_file and self.session_depth:
+            return key, cached_file
+
+        signature = self.get_signature(key)
+        # Unflushed changes win over whatever is on the disk
+        if cached_file and (cached_file.dirty or cached_file.signature == signature):
+            return key, cached_file
+
+        data = {}
+        if signature:
+            with open(key, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        self.files[key] = NonVersionedAttributesFile(data=data, signature=signature)
+        return key, self.files[key]
+
+    def get(self, path: Path) -> dict:
+        """Returns the non-versioned attributes of the object file (empty if there are none)."""
+        if not (file_path := self.get_file_path(path)):
+            return {}
+
+        # The data structure mirrors the paths inside of the subdir, see `set`
+        _, attributes_file = self.load(file_path)
+        current_level = attributes_file.data
+        for part in path.parts[2:]:
+            # iterate deeper into the object until the filename is found
+            current_level = current_level.get(part, None)
+            if not current_level:
+                return {}
+        return dict(current_level) if isinstance(current_level, dict) else {}
+
+    def set(self, path: Path, key: str, value: Any) -> bool:
+        if not (file_path := self.get_file_path(path)):
+            return False
+
+        # Saving new value of the key to the non_versioned file structure
+        # Example: path.parts[2:] is ["c", "d", "e", "f"], key is KEY and current_level[KEY] is VALUE.
+        # This loop will result in writing a following value into non_versioned_data: {c: {d: {e: {f: {KEY: VALUE}}}}}
+        # It benefits from how references are used in python.
+        file_key, attributes_file = self.load(file_path)
+        current_level = attributes_file.data
+        for part in path.parts[2:]:
+            if part not in current_level or not isinstance(current_level[part], dict):
+                current_level[part] = {}
+            current_level = current_level[part]
+        current_level[key] = value
+
+        return self.mark_changed(file_key, attributes_file)
+
+    def delete(self, path: Path):
+        """Forgets the attributes of the object file (or of everything under it if it is a directory)."""
+        if not (file_path := self.get_file_path(path)):
+            return
+
+        file_key, attributes_file = self.load(file_path)
+        parent = attributes_file.data
+        # Go up to the second-to-last key. For the last one, del will be called later.
+        for part in path.parts[2:-1]:
+            parent = parent.get(part, None)
+            if not isinstance(parent, dict):
+                return
+
+        if path.parts[-1] not in parent:
+            return
+
+        del parent[path.parts[-1]]
+        self.mark_changed(file_key, attributes_file)
+
+    def mark_changed(self, file_key: str, attributes_file: NonVersionedAttributesFile) -> bool:
+        attributes_file.dirty = True
+        if self.session_depth:
+            return True
+        return self.flush_file(file_key, attributes_file)
+
+    def flush_file(self, file_key: str, attributes_file: NonVersionedAttributesFile) -> bool:
+        try:
+            os.makedirs(os.path.dirname(file_key), exist_ok=True)
+            # Write to a temporary file first so that an interrupted flush never leaves a truncated file behind
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_key), prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(attributes_file.data, f, indent=4)
+                os.replace(temp_path, file_key)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        except Exception as e:
+            display_error(f"Failed to write to '{file_key}': {e}")
+            return False
+
+        attributes_file.dirty = False
+        attributes_file.signature = self.get_signature(file_key)
+        return True
+
+    def flush(self):
+        for file_key, attributes_file in self.files.items():
+            if attributes_file.dirty:
+                self.flush_file(file_key, attributes_file)
+
+    @contextmanager
+    def session(self):
+        self.session_depth += 1
+        try:
+            yield self
+        finally:
+            self.session_depth -= 1
+            if not self.session_depth:
+                self.flush()
+                # Other processes (e.g., another prd2 run) might change the files before the next session
+                self.files.clear()
+
+
+non_versioned_attributes = NonVersionedAttributeStore()
+
+
+def buffered_session(func):
+    """Keeps non-versioned attribute changes of the whole (async) command in memory and writes them once at the end."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with non_versioned_attributes.session():
+            return await func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Optional
+
+from anyio import Path, to_thread
+from pydantic import BaseModel, ConfigDict
+
+from deployment_manager.common.determine_path import determine_object_type_from_url
+from deployment_manager.common.non_versioned_attributes import non_versioned_attributes
+from deployment_manager.common.read_write import read_object_from_json
+from deployment_manager.utils.consts import settings
+
+# Bump when the table layout or the meaning of the columns changes, the index is then rebuilt from scratch
+INDEX_VERSION = 3
+
+# Files modified this recently might get rewritten within the mtime granularity without changing their size
+RACY_WINDOW_NS = 2 * 10**9
+
+# The first attribute found is considered the parent of the object
+PARENT_URL_KEYS = ("workspace", "queue", "engine", "workflow", "queues")
+
+
+def canonical_hash(object: Any) -> str:
+    serialized = json.dumps(object, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class IndexedObject(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    path: Path
+    id: Optional[int | str] = None
+    type: Optional[str] = None
+    url: Optional[str] = None
+    org: Optional[str] = None
+    subdir: Optional[str] = None
+    modified_at: Optional[str] = None
+    parent_url: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+class ObjectIndex:
+    """Persistent index of local object files (<project>/.prd2/index.sqlite).
+
+    Each file is parsed only when its mtime or size changed since it was last indexed.
+    The hashes of the files as they were last pulled (or pushed) are kept too, see record_pulled_hash.
+
+    Walking the tree and stat-ing the files runs in a worker thread so that it does not block concurrent downloads.
+    The SQLite queries stay on the event loop (the connection is bound to its thread), they are indexed lookups
+    and the rows of a scan are read and stored at once.
+    """
+
+    COLUMNS = (
+        "path",
+        "mtime_ns",
+        "size",
+        "id",
+        "type",
+        "url",
+        "org",
+        "subdir",
+        "modified_at",
+        "parent_url",
+        "content_hash",
+    )
+
+    def __init__(self, project_path: Path):
+        self.project_path = Path(project_path)
+        self._connection: sqlite3.Connection = None
+        # Path key -> content hash, stored at once on flush
+        self._pulled_hashes: dict[str, str] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.project_path / settings.LOCAL_STATE_DIR_NAME / settings.OBJECT_INDEX_FILE_NAME
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if not self._connection:
+            os.makedirs(self.index_path.parent, exist_ok=True)
+            try:
+                self._connection = self._connect()
+            except sqlite3.DatabaseError:
+                # Corrupted index, it can always be rebuilt from the files
+                os.remove(self.index_path)
+                self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.index_path), timeout=30)
+        # Several prd2 processes (e.g., pull --process-pool) can use the index at once
+        connection.execute("PRAGMA journal_mode=WAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            connection.execute("DROP TABLE IF EXISTS objects")
+            connection.execute("DROP TABLE IF EXISTS pulled_hashes")
+            connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS objects (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                id,
+                type TEXT,
+                url TEXT,
+                org TEXT,
+                subdir TEXT,
+                modified_at TEXT,
+                parent_url TEXT,
+                content_hash TEXT
+            )"""
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS objects_by_id ON objects (type, id)")
+        connection.execute("CREATE TABLE IF NOT EXISTS pulled_hashes (path TEXT PRIMARY KEY, content_hash TEXT)")
+        connection.commit()
+        return connection
+
+    def close(self):
+        self.flush_pulled_hashes()
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    def _key(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self.project_path)).as_posix()
+
+    @staticmethod
+    def _is_row_fresh(row: Optional[tuple], stat: os.stat_result) -> bool:
+        return (
+            row is not None
+            and row[1] == stat.st_mtime_ns
+            and row[2] == stat.st_size
+            and time.time_ns() - stat.st_mtime_ns > RACY_WINDOW_NS
+        )
+
+    def _row_to_object(self, row: tuple) -> IndexedObject:
+        values = dict(zip(self.COLUMNS, row))
+        path = self.project_path / values.pop("path")
+        # The row describes the file itself, its non-versioned attributes live in the (in-memory) subdir file
+        if modified_at := non_versioned_attributes.get(path).get("modified_at", None):
+            values["modified_at"] = modified_at
+        return IndexedObject(
+            path=path,
+            **{key: value for key, value in values.items() if key not in ("mtime_ns", "size")},
+        )
+
+    async def _index_file(self, path: Path, key: str, stat: os.stat_result) -> tuple:
+        """Parses the file and returns its row. The rows are stored by the caller at once, so that no transaction
+        stays open while awaiting (other coroutines or processes might be writing too)."""
+        # The hash covers only what is in the file so that it can be compared with what would be written there
+        object = await read_object_from_json(path, include_non_version_attribtues=False)
+        if not isinstance(object, dict):
+            object = {}
+
+        url = object.get("url", None)
+        try:
+            object_type = determine_object_type_from_url(url) if url else None
+        except Exception:
+            object_type = None
+        parent_url = next((object[key] for key in PARENT_URL_KEYS if object.get(key, None)), None)
+        if isinstance(parent_url, list):
+            parent_url = parent_url[0]
+
+        key_parts = key.split("/")
+        row = (
+            key,
+            stat.st_mtime_ns,
+            stat.st_size,
+            object.get("id", None),
+            object_type.value if object_type else None,
+            url,
+            key_parts[0] if len(key_parts) > 1 else None,
+            key_parts[1] if len(key_parts) > 2 else None,
+            object.get("modified_at", None),
+            parent_url,
+            canonical_hash(object),
+        )
+        return row
+
+    def _store(self, rows: list[tuple], deleted_keys: list[str] | None = None):
+        if deleted_keys is None:
+            deleted_keys = []
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO objects VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                rows,
+            )
+            self.connection.executemany("DELETE FROM objects WHERE path = ?", [(key,) for key in deleted_keys])
+            self.connection.executemany("DELETE FROM pulled_hashes WHERE path = ?", [(key,) for key in deleted_keys])
+
+    async def get(self, path: Path) -> Optional[IndexedObject]:
+        """Returns the (re)indexed file or None if it does not exist."""
+        key = self._key(path)
+        try:
+            stat = await to_thread.run_sync(os.stat, path)
+        except FileNotFoundError:
+            self._store([], deleted_keys=[key])
+            return None
+
+        row = self.connection.execute("SELECT * FROM objects WHERE path = ?", (key,)).fetchone()
+        if not self._is_row_fresh(row, stat):
+            row = await self._index_file(path, key, stat)
+            self._store([row])
+        return self._row_to_object(row)
+
+    async def scan(self, root: Path) -> list[IndexedObject]:
+        """Indexes all JSON files under root (reparsing only changed ones) and forgets the deleted ones."""
+        root_key = self._key(root)
+        prefix = "" if root_key == "." else root_key + "/"
+        rows = {
+            row[0]: row
+            for row in self.connection.execute(
+                "SELECT * FROM objects WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )
+        }
+
+        indexed_rows, changed_rows = [], []
+        for path, stat in await to_thread.run_sync(self._walk_json_files, root):
+            key = self._key(path)
+            row = rows.pop(key, None)
+            if not self._is_row_fresh(row, stat):
+                row = await self._index_file(path, key, stat)
+                changed_rows.append(row)
+            indexed_rows.append(row)
+
+        # Whatever was not found anymore got deleted
+        self._store(changed_rows, deleted_keys=list(rows))
+
+        return [self._row_to_object(row) for row in indexed_rows]
+
+    @staticmethod
+    def _walk_json_files(root: Path) -> list[tuple[Path, os.stat_result]]:
+        """Blocking, run in a worker thread."""
+        files = []
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                if file_name.endswith(".json"):
+                    path = Path(dir_path) / file_name
+                    files.append((path, os.stat(path)))
+        return files
+
+    def record_pulled_hash(self, path: Path, content_hash: str):
+        """Remembers the hash of the file content as it is on the server (written by a pull or a push)."""
+        self._pulled_hashes[self._key(path)] = content_hash
+
+    def flush_pulled_hashes(self):
+        if not self._pulled_hashes:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO pulled_hashes VALUES (?, ?)", list(self._pulled_hashes.items())
+            )
+        self._pulled_hashes = {}
+
+    def get_pulled_hash(self, path: Path) -> Optional[str]:
+        key = self._key(path)
+        if key in self._pulled_hashes:
+            return self._pulled_hashes[key]
+        row = self.connection.execute("SELECT content_hash FROM pulled_hashes WHERE path = ?", (key,)).fetchone()
+        return row[0] if row else None
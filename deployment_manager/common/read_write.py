@@ -1,6 +1,6 @@
-import asyncio
 import dataclasses
 import json
+import os
 from typing import Any
 
 import aiofiles
@@ -11,9 +11,32 @@ from rossum_api.domain_logic.resources import Resource
 from ruamel.yaml import YAML
 
 from deployment_manager.common.determine_path import determine_object_type_from_path
+from deployment_manager.common.non_versioned_attributes import non_versioned_attributes
 from deployment_manager.utils.consts import settings
 
-NON_VERSIONED_ATTRIBUTES_FILE_LOCK = asyncio.Lock()
+
+def get_versioned_content(path: Path, object: dict, type: Resource = None) -> dict:
+    """Returns the part of the (remote) object which write_object_to_json would put into the file itself."""
+    excluded_keys = set(settings.NON_PULLED_KEYS_PER_OBJECT.get(type, [])) if type else set()
+    if type and non_versioned_attributes.get_file_path(path):
+        excluded_keys.update(settings.NON_VERSIONED_ATTRIBUTES)
+    return {key: value for key, value in object.items() if key not in excluded_keys}
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Skips writing identical content to keep the mtime (and so the git index and local object index) untouched."""
+    try:
+        # Cheap check first, the file is read only if it can be the same
+        if os.stat(path).st_size == len(text.encode("utf-8")):
+            with open(path, "r") as rf:
+                if rf.read() == text:
+                    return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+
+    with open(path, "w") as wf:
+        wf.write(text)
+    return True
 
 
 async def write_object_to_json(path: Path, object: dict, type: Resource = None, log_message: str = ""):
@@ -34,60 +57,21 @@ async def write_object_to_json(path: Path, object: dict, type: Resource = None,
                     non_versioned_key_written = await write_non_versioned_attribute(path, object, key)
                     if non_versioned_key_written:
                         del object[key]
-    with open(path, "w") as wf:
-        json.dump(object, wf, indent=2)
+    write_if_changed(path, json.dumps(object, indent=2))
 
     if log_message:
         print(log_message)
 
 
 async def write_non_versioned_attribute(path, object_, key):
-    if len(path.parents) < 3:
-        # outside subdirectory, no non_versioned_attribute allowed at this level
-        return False
-
-    # path.parents is a list of full paths which are parents for the current file from closest to furthest
-    # path.parents example: if we have a file a/b/c/d/e.txt, Path(e.txt).parents would be [a/b/c/d, a/b/c, a/b, a, .]
-    # `non_versioned_attributes` file we need to find is always saved on org/suborg level
-    # That's why it's always -3. then, we can load org/suborg/non_versioned_object_attributes.json
-    subdir_path = path.parents[-3]  # path to dir/subdir, or organization/suborganization
-    non_versioned_attributes_file = (
-        subdir_path / settings.NON_VERSIONED_ATTRIBUTES_FILE_NAME
-    )  # file is saved in root for each subdirectory
-
-    # avoid simultaneous write to the same file
-    async with NON_VERSIONED_ATTRIBUTES_FILE_LOCK:
-        if await non_versioned_attributes_file.exists():
-            with open(non_versioned_attributes_file, "r", encoding="utf-8") as f:
-                non_versioned_data = json.load(f)
-        else:
-            non_versioned_data = {}
-
-        # Saving new value of the key to the non_versioned file structure
-        # Example: path.parts[2:] is ["c", "d", "e", "f"], key is KEY and current_level[KEY] is VALUE.
-        # This loop will result in writing a following value into non_versioned_data: {c: {d: {e: {f: {KEY: VALUE}}}}}
-        # It benefits from how references are used in python.
-        current_level = non_versioned_data
-        for part in path.parts[2:]:
-            if part not in current_level or not isinstance(current_level[part], dict):
-                current_level[part] = {}
-            current_level = current_level[part]
-        current_level[key] = object_[key]
-
-        try:
-            with open(non_versioned_attributes_file, "w", encoding="utf-8") as f:
-                json.dump(non_versioned_data, f, indent=4)
-            return True
-        except Exception as e:
-            print(f"Error: Failed to write to '{non_versioned_attributes_file}': {e}")
-        return False
+    # The attributes are kept in memory and written to the dir/subdir file at once (see NonVersionedAttributeStore)
+    return non_versioned_attributes.set(path, key, object_[key])
 
 
 async def write_str(path: Path, code: str):
     if path.parent:
         await path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w") as wf:
-        wf.write(code)
+    write_if_changed(path, code)
 
 
 async def create_local_object(path: Path, object: dict):
@@ -168,34 +152,9 @@ async def read_object_from_json(path: Path, include_non_version_attribtues=True)
 
 async def read_non_versioned_attribute_data(path, object_):
     # extend object with data from separate file
-
-    if len(path.parents) < 3:
-        # outside subdirectory, no non_versioned_attribute allowed at this level
-        return
-
-    # fore more clarity of how this works, read comments in the `write_non_versioned_attribute` function
-    subdir_path = path.parents[-3]  # path to dir/subdir, or organization/suborganization
-    non_versioned_attributes_file = (
-        subdir_path / settings.NON_VERSIONED_ATTRIBUTES_FILE_NAME
-    )  # file is saved in root for each subdirectory
-    if await non_versioned_attributes_file.exists():
-        non_versioned_data = {}
-        # locking the file while reading to be sure other process won't write in the meantime
-        async with NON_VERSIONED_ATTRIBUTES_FILE_LOCK:
-            with open(non_versioned_attributes_file, "r") as f:
-                non_versioned_data = json.load(f)
-
-        # fore more clarity of how this works, read the comment before the writing loop in the `write_non_versioned_attribute` function
-        # this function does the opposite and reads the data from the separate file, and results in having the full object in memory
-        for path_part in path.parts[2:]:
-            # iterate deeper into the object until the filename is found
-            non_versioned_data = non_versioned_data.get(path_part)
-            if not non_versioned_data:
-                return
-        if non_versioned_data:
-            # join non_versioned data into the object
-            object_.update(non_versioned_data)
-    return
+    if non_versioned_data := non_versioned_attributes.get(path):
+        # join non_versioned data into the object
+        object_.update(non_versioned_data)
 
 
 async def read_txt(path: Path) -> str:
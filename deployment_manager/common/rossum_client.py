@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import random
+from typing import AsyncIterator
 
 import httpx
 import tenacity
@@ -61,6 +62,25 @@ class _CustomInternalClient(InternalAsyncClient):
             reraise=True,
         )
 
+    async def _request(self, method: HttpMethod, url: str, *args, **kwargs) -> httpx.Response:
+        # Org directories processed at once share one budget of requests in flight (see RequestBudget)
+        request_budget = getattr(self, "request_budget", None)
+        if not request_budget:
+            return await super()._request(method, url, *args, **kwargs)
+        async with request_budget:
+            return await super()._request(method, url, *args, **kwargs)
+
+    async def _stream(self, method: HttpMethod, url: str, *args, **kwargs) -> AsyncIterator[bytes]:
+        # A stream holds its slot of the budget until it is fully read (e.g., export of all annotations)
+        request_budget = getattr(self, "request_budget", None)
+        if not request_budget:
+            async for chunk in super()._stream(method, url, *args, **kwargs):
+                yield chunk
+            return
+        async with request_budget:
+            async for chunk in super()._stream(method, url, *args, **kwargs):
+                yield chunk
+
     async def _raise_for_status(self, response: httpx.Response, method: HttpMethod) -> None:
         try:
             response.raise_for_status()
@@ -141,6 +141,14 @@ class Settings:
 
     # Concurrency limit for gather_with_concurrency
     CONCURRENCY: int = 5
+    # How many pulled objects are saved locally at once
+    SAVE_CONCURRENCY: int = 16
+    # Maximum API requests in flight across all org directories processed at once (--org-concurrency)
+    REQUEST_BUDGET: int = 20
+    # How many object IDs go into one listing filtered by IDs (id=1,2,3...)
+    FETCH_BY_IDS_BATCH_SIZE: int = 100
+    # How many objects of each type can be downloaded ahead of saving them
+    DOWNLOAD_BUFFER_SIZE: int = 32
 
     SOURCE_API_BASE: str = ""
     # Empty string gives an API error even if there is username and password
@@ -214,6 +222,16 @@ class Settings:
     DOWNLOAD_KEY_ORG_ID = "org_id"
     DOWNLOAD_KEY_REGEX = "regex"
 
+    # Types (their API names) whose paginated payloads are the same as the detail ones, no need to refetch them
+    LIST_PAYLOAD_COMPLETE_TYPES: tuple = ("workspaces", "queues", "inboxes", "labels", "workflows")
+    # How many objects per type are compared with their detail when verifying the above
+    LIST_PAYLOAD_VERIFICATION_SAMPLE_SIZE: int = 5
+
+    # Local PRD state (not versioned) kept in the project root
+    LOCAL_STATE_DIR_NAME: str = ".prd2"
+    PULL_STATE_FILE_NAME: str = "pull_state.json"
+    OBJECT_INDEX_FILE_NAME: str = "index.sqlite"
+
     # Deploy consts
     DEPLOY_IGNORED_DIRS = [
         ".git",
@@ -294,6 +312,14 @@ class Settings:
         Resource.Organization: ["workspaces"],
     }
 
+    # Big attributes that are not modified after attribute override (e.g., schema.content)
+    # The data of the deploy phases (plan, first and second deploy) share them instead of copying them,
+    # so a phase has to replace them (e.g., hook.config of private hooks), never modify them in place
+    DEPLOY_SHARED_KEYS: dict = {
+        Resource.Schema: ["content"],
+        Resource.Hook: ["config"],
+    }
+
     FORMULA_DIR_NAME: str = "formulas"
     RULES_DIR_NAME: str = "rules"
     EMAIL_TEMPLATES_DIR_NAME: str = "email_templates"
@@ -1,5 +1,6 @@
 """Advanced pull scenarios: stale object removal + formula field extraction."""
 
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -8,6 +9,7 @@ from anyio import Path
 
 from deployment_manager.commands.download.directory import DownloadOrganizationDirectory
 from deployment_manager.commands.download.download import download_destinations
+from deployment_manager.commands.download.pull_state import PullState
 from deployment_manager.utils.consts import settings
 from tests.integration.virtual_api import VirtualRossumClient, build_simple_org
 
@@ -126,3 +128,160 @@ async def test_pull_extracts_formula_fields_to_py_files(tmp_path: Path, monkeypa
 
     # Plain (non-formula) datapoint should NOT produce a .py file
     assert not await (q_dir / settings.FORMULA_DIR_NAME / "plain_field.py").exists()
+
+
+@pytest.mark.asyncio
+async def test_incremental_pull_refetches_only_modified_objects(tmp_path: Path, monkeypatch):
+    """Second incremental pull fetches details only for objects modified since the first one."""
+    _patch_git(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+
+    org = build_simple_org()
+    await _prepare_project(tmp_path, org)
+
+    client = VirtualRossumClient(org)
+
+    async def do_pull():
+        with patch.object(DownloadOrganizationDirectory, "initialize", lambda self: _inject_client(self, client)):
+            await download_destinations(
+                destinations=(Path("source") / "primary",),
+                project_path=Path("."),
+                incremental=True,
+            )
+
+    await do_pull()
+    assert await (tmp_path / settings.LOCAL_STATE_DIR_NAME / settings.PULL_STATE_FILE_NAME).exists()
+
+    org._stores["hooks"][500003]["name"] = "MyHook Renamed"
+    org._stores["hooks"][500003]["modified_at"] = "2100-01-01T00:00:00.000000Z"
+
+    fetched = []
+    original_fetch_one = client._http_client.fetch_one
+
+    async def counting_fetch_one(resource, id_):
+        fetched.append((resource, id_))
+        return await original_fetch_one(resource, id_)
+
+    monkeypatch.setattr(client._http_client, "fetch_one", counting_fetch_one)
+
+    await do_pull()
+
+    # Organization is always fetched, otherwise only the modified hook
+    assert sorted(id_ for _, id_ in fetched) == [org.org_id, 500003]
+    hooks_dir = tmp_path / "source" / "primary" / "hooks"
+    assert await (hooks_dir / "MyHook Renamed_[500003].json").exists()
+    assert not await (hooks_dir / "MyHook_[500003].json").exists()
+    # Unchanged objects are kept as they were
+    assert await (tmp_path / "source" / "primary" / "workspaces" / "WS1_[500001]" / "workspace.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_pull_multiple_organizations_concurrently(tmp_path: Path, monkeypatch):
+    """Org directories pulled at once do not mix up their objects and each gets a result."""
+    _patch_git(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+
+    orgs = {
+        "source": build_simple_org(org_id=100, base_url="https://source.rossum.app/api/v1"),
+        "target": build_simple_org(org_id=200, base_url="https://target.rossum.app/api/v1"),
+    }
+    orgs["target"].add_hook(name="TargetOnly", id_=600001)
+    config = {
+        "directories": {
+            name: {"org_id": org.org_id, "api_base": org.base_url, "subdirectories": {"primary": {"regex": ""}}}
+            for name, org in orgs.items()
+        }
+    }
+    await (tmp_path / settings.CONFIG_FILENAME).write_text(yaml.safe_dump(config))
+    clients = {name: VirtualRossumClient(org) for name, org in orgs.items()}
+
+    with patch.object(
+        DownloadOrganizationDirectory, "initialize", lambda self: _inject_client(self, clients[self.name])
+    ):
+        results = await download_destinations(
+            destinations=(Path("source"), Path("target")),
+            project_path=Path("."),
+            org_concurrency=2,
+        )
+
+    assert {result.name: result.errors for result in results} == {"source": [], "target": []}
+    assert await (tmp_path / "target" / "primary" / "hooks" / "TargetOnly_[600001].json").exists()
+    assert not await (tmp_path / "source" / "primary" / "hooks" / "TargetOnly_[600001].json").exists()
+    assert await (tmp_path / "source" / "primary" / "hooks" / "MyHook_[500003].json").exists()
+
+
+async def _prepare_two_org_project(tmp_path: Path):
+    orgs = {
+        "source": build_simple_org(org_id=100, base_url="https://source.rossum.app/api/v1"),
+        "target": build_simple_org(org_id=200, base_url="https://target.rossum.app/api/v1"),
+    }
+    config = {
+        "directories": {
+            name: {"org_id": org.org_id, "api_base": org.base_url, "subdirectories": {"primary": {"regex": ""}}}
+            for name, org in orgs.items()
+        }
+    }
+    await (tmp_path / settings.CONFIG_FILENAME).write_text(yaml.safe_dump(config))
+    return orgs
+
+
+@pytest.mark.asyncio
+async def test_incremental_pull_of_multiple_organizations_keeps_all_marks(tmp_path: Path, monkeypatch):
+    """Org directories pulled at once store their high-water marks in a single pull state write."""
+    _patch_git(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+
+    orgs = await _prepare_two_org_project(tmp_path)
+    clients = {name: VirtualRossumClient(org) for name, org in orgs.items()}
+
+    with patch.object(
+        DownloadOrganizationDirectory, "initialize", lambda self: _inject_client(self, clients[self.name])
+    ):
+        await download_destinations(
+            destinations=(Path("source"), Path("target")),
+            project_path=Path("."),
+            org_concurrency=2,
+            incremental=True,
+        )
+
+    pull_state = await PullState.load(Path("."))
+    assert pull_state.get_high_water_marks("source", 100, "https://source.rossum.app/api/v1")
+    assert pull_state.get_high_water_marks("target", 200, "https://target.rossum.app/api/v1")
+
+
+@pytest.mark.asyncio
+async def test_process_pool_workers_return_marks_to_the_parent(tmp_path: Path, monkeypatch):
+    """Workers do not write the pull state, the parent writes the marks of all of them at once."""
+    _patch_git(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+
+    orgs = await _prepare_two_org_project(tmp_path)
+
+    def fake_worker(project_path, org_dir_name, subdir_names, concurrency, options):
+        assert options["incremental"]
+        org = orgs[org_dir_name]
+        marks = {"hooks": f"2024-01-0{org.org_id // 100}T00:00:00Z"}
+        return [], {"org_id": org.org_id, "api_base": org.base_url, "high_water_marks": marks}
+
+    monkeypatch.setattr("deployment_manager.commands.download.download.download_organization_in_process", fake_worker)
+    monkeypatch.setattr(
+        "deployment_manager.commands.download.download.ProcessPoolExecutor",
+        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers=max_workers),
+    )
+
+    results = await download_destinations(
+        destinations=(Path("source"), Path("target")),
+        project_path=Path("."),
+        org_concurrency=2,
+        process_pool=True,
+        incremental=True,
+    )
+
+    assert {result.name: result.errors for result in results} == {"source": [], "target": []}
+    pull_state = await PullState.load(Path("."))
+    assert pull_state.get_high_water_marks("source", 100, "https://source.rossum.app/api/v1") == {
+        "hooks": "2024-01-01T00:00:00Z"
+    }
+    assert pull_state.get_high_water_marks("target", 200, "https://target.rossum.app/api/v1") == {
+        "hooks": "2024-01-02T00:00:00Z"
+    }
@@ -61,16 +61,17 @@ def _patch_git_empty(monkeypatch):
 
 
 def _patch_git_with_changes(monkeypatch, changed_files: list[str]):
-    """Mock the `git status` call to report the given files as modified."""
-    lines = "\n".join(f" M {path}" for path in changed_files) + "\n"
+    """Mock the first `git status` call to report the given files as modified."""
+    output = "".join(f"1 .M N... 100644 100644 100644 0000000 0000000 {path}\0" for path in changed_files)
 
-    call_count = [0]
+    status_calls = [0]
 
-    def fake_run(*args, **kwargs):
-        m = MagicMock(returncode=0)
-        call_count[0] += 1
-        # First and third run() calls are `git config core.quotePath`; second is `git status`
-        m.stdout = lines if call_count[0] == 2 else ""
+    def fake_run(command, *args, **kwargs):
+        m = MagicMock(returncode=0, stdout="")
+        if "status" in command:
+            status_calls[0] += 1
+            # The pull after the push sees no changes
+            m.stdout = output if status_calls[0] == 1 else ""
         return m
 
     monkeypatch.setattr("deployment_manager.common.git.subprocess.run", fake_run)
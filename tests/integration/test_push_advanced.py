@@ -1,6 +1,7 @@
 """Advanced push scenarios: CREATE of new objects and --all re-upload."""
 
 import json
+import os
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -54,15 +55,23 @@ def _patch_git_empty(monkeypatch):
 
 
 def _patch_git_with_changes(monkeypatch, change_lines: list[str]):
-    """`change_lines` already include the opcode prefix (e.g., ' M path', '?? path')."""
-    output = "\n".join(change_lines) + "\n"
-
-    call_count = [0]
-
-    def fake_run(*args, **kwargs):
-        m = MagicMock(returncode=0)
-        call_count[0] += 1
-        m.stdout = output if call_count[0] == 2 else ""
+    """`change_lines` are in the short format (e.g., ' M path', '?? path'), they get converted to porcelain v2."""
+    records = []
+    for line in change_lines:
+        code, path = line[:2], line[3:]
+        if code == "??":
+            records.append(f"? {path}")
+        else:
+            records.append(f"1 {code.replace(' ', '.')} N... 100644 100644 100644 0000000 0000000 {path}")
+    output = "".join(f"{record}\0" for record in records)
+
+    status_calls = [0]
+
+    def fake_run(command, *args, **kwargs):
+        m = MagicMock(returncode=0, stdout="")
+        if "status" in command:
+            status_calls[0] += 1
+            m.stdout = output if status_calls[0] == 1 else ""
         return m
 
     monkeypatch.setattr("deployment_manager.common.git.subprocess.run", fake_run)
@@ -81,8 +90,8 @@ async def _pull_initial(client):
 
 
 @pytest.mark.asyncio
-async def test_push_all_uploads_every_file(tmp_path: Path, monkeypatch):
-    """`--all` extends the list of git-reported changes with every other file."""
+async def test_push_all_uploads_files_changed_since_pull(tmp_path: Path, monkeypatch):
+    """`--all` extends the list of git-reported changes with every other file that differs from the last pull."""
     monkeypatch.chdir(tmp_path)
     _patch_git_empty(monkeypatch)
 
@@ -91,8 +100,15 @@ async def test_push_all_uploads_every_file(tmp_path: Path, monkeypatch):
     client = VirtualRossumClient(org)
     await _pull_initial(client)
 
-    # Freeze the hook's modified_at so we can verify it gets re-updated by the push
+    # Freeze the timestamps so we can verify which objects get re-updated by the push
     org._stores["hooks"][500003]["modified_at"] = "2020-01-01T00:00:00.000000Z"
+    org._stores["schemas"][500002]["modified_at"] = "2020-01-01T00:00:00.000000Z"
+
+    # The hook is edited (and committed), git does not report it
+    hook_path = Path(SOURCE) / SUB / "hooks" / "MyHook_[500003].json"
+    hook = json.loads(await hook_path.read_text())
+    hook["name"] = "Renamed hook"
+    await write_object_to_json(hook_path, hook)
 
     # Simulate one trivially reported change so prepare_changed_objects doesn't bail early
     _patch_git_with_changes(
@@ -111,13 +127,92 @@ async def test_push_all_uploads_every_file(tmp_path: Path, monkeypatch):
                     project_path=Path("."),
                     upload_all=True,
                     force=True,
+                    full_refresh=True,
                 )
 
-    # The hook (which wasn't in the git-reported change list) must have been touched
-    # because --all includes unmodified files.
-    assert org._stores["hooks"][500003]["modified_at"] != "2020-01-01T00:00:00.000000Z"
+    # The hook (which wasn't in the git-reported change list) must have been pushed
+    assert org._stores["hooks"][500003]["name"] == "Renamed hook"
+    # The schema is the same as when it was pulled
+    assert org._stores["schemas"][500002]["modified_at"] == "2020-01-01T00:00:00.000000Z"
 
 
+@pytest.mark.asyncio
+async def test_push_all_compares_with_remote_without_pulled_hashes(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _patch_git_empty(monkeypatch)
+
+    org = build_simple_org()
+    await _prepare_project(tmp_path, org)
+    client = VirtualRossumClient(org)
+    await _pull_initial(client)
+
+    # E.g., pulled by an older version
+    os.remove(tmp_path / settings.LOCAL_STATE_DIR_NAME / settings.OBJECT_INDEX_FILE_NAME)
+    org._stores["hooks"][500003]["name"] = "Renamed remotely"
+    org._stores["schemas"][500002]["modified_at"] = "2020-01-01T00:00:00.000000Z"
+    _patch_git_with_changes(
+        monkeypatch,
+        [f" M {SOURCE}/{SUB}/workspaces/WS1_[500001]/workspace.json"],
+    )
+
+    async def _noop_download(*args, **kwargs):
+        return
+
+    with patch.object(UploadOrganizationDirectory, "initialize", lambda self: _inject_upload_client(self, client)):
+        with patch("deployment_manager.commands.upload.upload.download_destinations", _noop_download):
+            await upload_destinations(
+                destinations=(Path(SOURCE) / SUB,),
+                project_path=Path("."),
+                upload_all=True,
+                force=True,
+                full_refresh=True,
+            )
+
+    # The hook differs from the remote one, the schema does not
+    assert org._stores["hooks"][500003]["name"] == "MyHook"
+    assert org._stores["schemas"][500002]["modified_at"] == "2020-01-01T00:00:00.000000Z"
+
+
+@pytest.mark.asyncio
+async def test_push_all_does_not_compare_with_incomplete_listing_payloads(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _patch_git_empty(monkeypatch)
+
+    org = build_simple_org()
+    await _prepare_project(tmp_path, org)
+    client = VirtualRossumClient(org)
+    await _pull_initial(client)
+
+    os.remove(tmp_path / settings.LOCAL_STATE_DIR_NAME / settings.OBJECT_INDEX_FILE_NAME)
+    org._stores["schemas"][500002]["modified_at"] = "2020-01-01T00:00:00.000000Z"
+    _patch_git_with_changes(monkeypatch, [])
+
+    original_fetch_all = client._http_client.fetch_all
+
+    async def fetch_all_without_content(resource, **kwargs):
+        # Like the real API, schema listings do not include the content
+        async for object in original_fetch_all(resource, **kwargs):
+            object.pop("content", None)
+            yield object
+
+    monkeypatch.setattr(client._http_client, "fetch_all", fetch_all_without_content)
+
+    async def _noop_download(*args, **kwargs):
+        return
+
+    with patch.object(UploadOrganizationDirectory, "initialize", lambda self: _inject_upload_client(self, client)):
+        with patch("deployment_manager.commands.upload.upload.download_destinations", _noop_download):
+            await upload_destinations(
+                destinations=(Path(SOURCE) / SUB,),
+                project_path=Path("."),
+                upload_all=True,
+                force=True,
+                full_refresh=True,
+            )
+
+    # The schema was compared with its detail, which is the same as the local file
+    assert org._stores["schemas"][500002]["modified_at"] == "2020-01-01T00:00:00.000000Z"
+
 @pytest.mark.asyncio
 async def test_push_creates_new_object_from_untracked_json(tmp_path: Path, monkeypatch):
     """An untracked local JSON (id/url that returns 404) → API create() is called."""
@@ -215,3 +310,124 @@ async def test_push_untracked_file_but_remote_exists_becomes_update(tmp_path: Pa
     assert org._stores["workspaces"][500001]["name"] == "Pushed From Untracked"
     # No extra workspace created
     assert len([k for k in org._stores["workspaces"]]) == 1
+
+
+@pytest.mark.asyncio
+async def test_push_refreshes_pushed_and_related_objects_without_listing(tmp_path: Path, monkeypatch):
+    """After creating a hook, its file gets the new ID and the queue it was attached to gets the new hooks."""
+    monkeypatch.chdir(tmp_path)
+    _patch_git_empty(monkeypatch)
+
+    org = build_simple_org()
+    await _prepare_project(tmp_path, org)
+    client = VirtualRossumClient(org)
+    await _pull_initial(client)
+
+    queue_url = f"{org.base_url}/queues/500004"
+    new_hook_path = tmp_path / SOURCE / SUB / "hooks" / "AttachedHook_[999999].json"
+    await write_object_to_json(
+        new_hook_path,
+        {
+            "id": 999999,
+            "name": "AttachedHook",
+            "url": f"{org.base_url}/hooks/999999",
+            "type": "webhook",
+            "queues": [queue_url],
+            "config": {"url": "https://example.com"},
+        },
+    )
+    _patch_git_with_changes(monkeypatch, [f"?? {SOURCE}/{SUB}/hooks/AttachedHook_[999999].json"])
+
+    http_client = client._http_client
+    original_create = http_client.create
+
+    async def create_with_side_effects(resource, data):
+        # The server keeps queue.hooks in sync with hook.queues
+        created = await original_create(resource, data)
+        for url in created.get("queues", []):
+            org._stores["queues"][int(url.split("/")[-1])]["hooks"].append(created["url"])
+        return created
+
+    original_fetch_all = http_client.fetch_all
+
+    async def no_full_listing(resource, **kwargs):
+        # Listings filtered by IDs are fine
+        if "id" not in kwargs:
+            raise AssertionError("The organization should not be listed")
+        async for object in original_fetch_all(resource, **kwargs):
+            yield object
+
+    monkeypatch.setattr(http_client, "create", create_with_side_effects)
+    monkeypatch.setattr(http_client, "fetch_all", no_full_listing)
+
+    with patch.object(UploadOrganizationDirectory, "initialize", lambda self: _inject_upload_client(self, client)):
+        with patch.object(DownloadOrganizationDirectory, "initialize", lambda self: _inject_download_client(self, client)):
+            await upload_destinations(destinations=(Path(SOURCE) / SUB,), project_path=Path("."))
+
+    new_hook = next(hook for hook in org._stores["hooks"].values() if hook["name"] == "AttachedHook")
+    assert not await new_hook_path.exists()
+    assert await (tmp_path / SOURCE / SUB / "hooks" / f"AttachedHook_[{new_hook['id']}].json").exists()
+
+    queue_path = tmp_path / SOURCE / SUB / "workspaces" / "WS1_[500001]" / "queues" / "Q1_[500004]" / "queue.json"
+    assert new_hook["url"] in json.loads(await queue_path.read_text())["hooks"]
+
+
+@pytest.mark.asyncio
+async def test_push_refreshes_pushed_objects_changed_by_a_later_push(tmp_path: Path, monkeypatch):
+    """A hook created and then attached to a queue in the same push gets the queue in its local file."""
+    monkeypatch.chdir(tmp_path)
+    _patch_git_empty(monkeypatch)
+
+    org = build_simple_org()
+    await _prepare_project(tmp_path, org)
+    client = VirtualRossumClient(org)
+    await _pull_initial(client)
+
+    queue_url = f"{org.base_url}/queues/500004"
+    new_hook_url = f"{org.base_url}/hooks/999999"
+    await write_object_to_json(
+        tmp_path / SOURCE / SUB / "hooks" / "LaterAttachedHook_[999999].json",
+        {
+            "id": 999999,
+            "name": "LaterAttachedHook",
+            "url": new_hook_url,
+            "type": "webhook",
+            "queues": [],
+            "config": {"url": "https://example.com"},
+        },
+    )
+    queue_path = tmp_path / SOURCE / SUB / "workspaces" / "WS1_[500001]" / "queues" / "Q1_[500004]" / "queue.json"
+    queue = json.loads(await queue_path.read_text())
+    queue["hooks"].append(new_hook_url)
+    await write_object_to_json(queue_path, queue)
+    _patch_git_with_changes(
+        monkeypatch,
+        [
+            f"?? {SOURCE}/{SUB}/hooks/LaterAttachedHook_[999999].json",
+            f" M {SOURCE}/{SUB}/workspaces/WS1_[500001]/queues/Q1_[500004]/queue.json",
+        ],
+    )
+
+    http_client = client._http_client
+    original_update = http_client.update
+
+    async def update_with_side_effects(resource, id_, data):
+        # The server keeps hook.queues in sync with queue.hooks
+        updated = await original_update(resource, id_, data)
+        if updated["url"] == queue_url:
+            for url in updated.get("hooks", []):
+                hook = org._stores["hooks"][int(url.split("/")[-1])]
+                if queue_url not in hook["queues"]:
+                    hook["queues"].append(queue_url)
+        return updated
+
+    monkeypatch.setattr(http_client, "update", update_with_side_effects)
+
+    with patch.object(UploadOrganizationDirectory, "initialize", lambda self: _inject_upload_client(self, client)):
+        with patch.object(DownloadOrganizationDirectory, "initialize", lambda self: _inject_download_client(self, client)):
+            await upload_destinations(destinations=(Path(SOURCE) / SUB,), project_path=Path("."))
+
+    new_hook = next(hook for hook in org._stores["hooks"].values() if hook["name"] == "LaterAttachedHook")
+    assert new_hook["queues"] == [queue_url]
+    hook_path = tmp_path / SOURCE / SUB / "hooks" / f"LaterAttachedHook_[{new_hook['id']}].json"
+    assert json.loads(await hook_path.read_text())["queues"] == [queue_url]
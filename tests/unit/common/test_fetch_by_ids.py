@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock
+
+import pytest
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.common.fetch_by_ids import fetch_objects_by_ids
+from deployment_manager.utils.consts import settings
+
+
+@pytest.mark.asyncio
+class TestFetchObjectsByIds:
+    async def test_fetches_in_batches_and_skips_missing(self, monkeypatch):
+        monkeypatch.setattr(settings, "FETCH_BY_IDS_BATCH_SIZE", 2)
+        remote_ids = {1, 2, 5}
+        listings = []
+
+        async def fetch_all(resource, id: str):
+            listings.append(id)
+            for object_id in map(int, id.split(",")):
+                if object_id in remote_ids:
+                    yield {"id": object_id}
+            # Objects not asked for are ignored
+            yield {"id": 100}
+
+        client = MagicMock()
+        client._http_client.fetch_all = fetch_all
+
+        objects = await fetch_objects_by_ids(client, Resource.Queue, [5, 1, 2, 3, 1])
+
+        assert sorted(listings) == ["1,2", "3,5"]
+        assert set(objects) == {1, 2, 5}
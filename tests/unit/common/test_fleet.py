@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from rossum_api.clients.internal_async_client import InternalAsyncClient
+
+from deployment_manager.common.fleet import OrganizationResult, RequestBudget, display_summary, run_for_organizations
+from deployment_manager.common.rossum_client import _CustomInternalClient
+
+
+@pytest.mark.asyncio
+class TestRequestBudget:
+    async def test_organizations_get_a_fair_share(self):
+        budget = RequestBudget(total=4)
+        in_flight, peak = {"a": 0, "b": 0}, {"a": 0, "b": 0}
+
+        async def request(organization: str):
+            async with budget.for_organization(organization):
+                in_flight[organization] += 1
+                peak[organization] = max(peak[organization], in_flight[organization])
+                await asyncio.sleep(0.01)
+                in_flight[organization] -= 1
+
+        # Both organizations are active before any request is made
+        budget.active_organizations.update({"a", "b"})
+        await asyncio.gather(*[request("a") for _ in range(10)], *[request("b") for _ in range(3)])
+
+        assert peak == {"a": 2, "b": 2}
+        assert sum(budget.in_flight.values()) == 0
+
+    async def test_finished_organizations_free_their_share(self):
+        budget = RequestBudget(total=4)
+        budget.active_organizations.update({"a", "b"})
+        assert budget.fair_share == 2
+
+        await budget.finish("b")
+        assert budget.fair_share == 4
+
+    async def test_streamed_requests_use_the_budget(self, monkeypatch):
+        budget = RequestBudget(total=4)
+        in_flight = []
+
+        async def stream(self, method, url, *args, **kwargs):
+            for chunk in (b"a", b"b"):
+                in_flight.append(budget.in_flight["org"])
+                yield chunk
+
+        monkeypatch.setattr(InternalAsyncClient, "_stream", stream)
+        client = object.__new__(_CustomInternalClient)
+        client.request_budget = budget.for_organization("org")
+
+        chunks = [chunk async for chunk in client._stream("GET", "annotations/export")]
+
+        assert chunks == [b"a", b"b"]
+        assert in_flight == [1, 1]
+        assert budget.in_flight["org"] == 0
+
+
+@pytest.mark.asyncio
+class TestRunForOrganizations:
+    async def test_collects_errors_and_limits_concurrency(self):
+        running, peak = set(), []
+
+        async def run(name: str):
+            running.add(name)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.discard(name)
+            if name == "broken":
+                raise ValueError("boom")
+            return ["request failed"] if name == "partial" else []
+
+        results = await run_for_organizations(["ok", "partial", "broken"], run, org_concurrency=2)
+
+        assert max(peak) == 2
+        assert {result.name: result.errors for result in results} == {
+            "ok": [],
+            "partial": ["request failed"],
+            "broken": ["boom"],
+        }
+        assert all(result.duration > 0 for result in results)
+
+    async def test_summary_counts_failures(self, capsys):
+        display_summary("push", [OrganizationResult(name="a"), OrganizationResult(name="b", errors=["x"])])
+
+        output = capsys.readouterr().out
+        assert "push summary: 1 ok, 1 failed" in output
@@ -1,37 +1,46 @@
-"""Tests for git.py - mocks subprocess.run to emulate `git status` output."""
+"""Tests for git.py - mocks subprocess.run to emulate `git status --porcelain=v2 -z` output."""
 
 from unittest.mock import MagicMock, patch
 
-from deployment_manager.common.git import get_changed_file_paths
+import pytest
+
+from deployment_manager.common import git
+from deployment_manager.common.git import forget_git_changes, get_changed_file_paths, parse_porcelain_v2
 from deployment_manager.utils.consts import GIT_CHARACTERS
 
 
-def _mock_git_status(output: str):
-    """Return a side_effect for subprocess.run that returns the given output once."""
+def _changed(xy: str, path: str) -> str:
+    return f"1 {xy} N... 100644 100644 100644 0000000 0000000 {path}\0"
+
 
-    call_count = [0]
+def _mock_git_status(output: str, calls: list = None):
+    """Return a side_effect for subprocess.run that returns the given output for `git status`."""
 
-    def side_effect(*args, **kwargs):
-        result = MagicMock()
-        # The first and third subprocess.run calls are `git config core.quotePath`
-        # The second one is `git status`
-        call_count[0] += 1
-        if call_count[0] == 2:
+    def side_effect(command, *args, **kwargs):
+        if calls is not None:
+            calls.append(command)
+        result = MagicMock(returncode=0, stdout="")
+        if "status" in command:
             result.stdout = output
-        else:
-            result.stdout = ""
         return result
 
     return side_effect
 
 
+@pytest.fixture(autouse=True)
+def clean_cache():
+    yield
+    forget_git_changes()
+    git._repository_paths.clear()
+
+
 class TestGetChangedFilePaths:
     def test_empty_output(self):
         with patch("subprocess.run", side_effect=_mock_git_status("")):
             assert get_changed_file_paths(".") == []
 
     def test_parses_modified_file(self):
-        with patch("subprocess.run", side_effect=_mock_git_status(" M org/sub/workspaces/ws.json\n")):
+        with patch("subprocess.run", side_effect=_mock_git_status(_changed(".M", "org/sub/workspaces/ws.json"))):
             result = get_changed_file_paths(".")
             assert len(result) == 1
             op, path = result[0]
@@ -39,12 +48,12 @@ class TestGetChangedFilePaths:
             assert str(path).endswith("ws.json")
 
     def test_parses_untracked_file(self):
-        with patch("subprocess.run", side_effect=_mock_git_status("?? org/sub/hooks/h.json\n")):
+        with patch("subprocess.run", side_effect=_mock_git_status("? org/sub/hooks/h.json\0")):
             result = get_changed_file_paths(".")
             assert result[0][0] == GIT_CHARACTERS.CREATED
 
     def test_ignores_non_json_py_js(self):
-        output = " M org/README.md\n M config.yaml\n M hook.py\n"
+        output = _changed(".M", "org/README.md") + _changed(".M", "config.yaml") + _changed(".M", "hook.py")
         with patch("subprocess.run", side_effect=_mock_git_status(output)):
             result = get_changed_file_paths(".")
             # README.md and config.yaml filtered out; only hook.py remains
@@ -53,19 +62,67 @@ class TestGetChangedFilePaths:
 
     def test_indexed_only_filters_non_staged(self):
         """Indexed_only keeps only staged `M` entries."""
-        # " M" (space then M) = unstaged modified
-        # "M " (M then space) = staged modified
-        # Note: the production code splits on space, so opcode "M" means staged
-        output = "M  staged.json\n M unstaged.json\n"
+        output = _changed("M.", "staged.json") + _changed(".M", "unstaged.json")
         with patch("subprocess.run", side_effect=_mock_git_status(output)):
             result = get_changed_file_paths(".", indexed_only=True)
             # Only the staged one remains
             assert len(result) == 1
             assert str(result[0][1]) == "staged.json"
 
-    def test_quoted_paths_are_unquoted(self):
-        output = ' M "path with spaces.json"\n'
+    def test_paths_with_spaces_are_kept_whole(self):
+        output = _changed(".M", "path with spaces.json")
         with patch("subprocess.run", side_effect=_mock_git_status(output)):
             result = get_changed_file_paths(".")
             assert len(result) == 1
             assert str(result[0][1]) == "path with spaces.json"
+
+    def test_never_changes_git_config(self):
+        calls = []
+        with patch("subprocess.run", side_effect=_mock_git_status("", calls)):
+            get_changed_file_paths(".")
+        assert not [command for command in calls if "config" in command]
+
+    def test_results_are_reused_until_the_index_changes(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        index_path = tmp_path / "index"
+        with open(index_path, "w") as f:
+            f.write("v1")
+
+        calls = []
+
+        def side_effect(command, *args, **kwargs):
+            calls.append(command)
+            if "rev-parse" in command:
+                return MagicMock(returncode=0, stdout=f"{tmp_path}\n{index_path}\n")
+            return MagicMock(returncode=0, stdout=_changed(".M", "a.json"))
+
+        with patch("subprocess.run", side_effect=side_effect):
+            get_changed_file_paths("org")
+            get_changed_file_paths("org", indexed_only=True)
+            assert len([command for command in calls if "status" in command]) == 1
+
+            with open(index_path, "w") as f:
+                f.write("v2 is longer")
+            get_changed_file_paths("org")
+            assert len([command for command in calls if "status" in command]) == 2
+
+
+class TestParsePorcelainV2:
+    def test_parses_all_entry_types(self):
+        output = (
+            "# branch.oid 1234\0"
+            + _changed("MM", "both.json")
+            + "2 R. N... 100644 100644 100644 0000000 0000000 R100 new name.json\0old name.json\0"
+            + "u UU N... 100644 100644 100644 100644 0000000 0000000 0000000 conflict.json\0"
+            + "? untracked.json\0"
+            + "! ignored.json\0"
+        )
+
+        changes = {change.path: change for change in parse_porcelain_v2(output)}
+
+        assert set(changes) == {"both.json", "new name.json", "conflict.json", "untracked.json"}
+        assert (changes["both.json"].staged, changes["both.json"].unstaged) == ("M", "M")
+        assert changes["both.json"].operation == "MM"
+        assert changes["new name.json"].original_path == "old name.json"
+        assert changes["new name.json"].operation == GIT_CHARACTERS.UPDATED
+        assert changes["untracked.json"].operation == GIT_CHARACTERS.CREATED
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+from anyio import Path
+
+from deployment_manager.common.non_versioned_attributes import NonVersionedAttributeStore
+from deployment_manager.utils.consts import settings
+
+WS_PATH = Path("org") / "subdir" / "workspaces" / "ws_[1]" / "workspace.json"
+QUEUE_PATH = Path("org") / "subdir" / "workspaces" / "ws_[1]" / "queues" / "q_[2]" / "queue.json"
+NV_FILE = Path("org") / "subdir" / settings.NON_VERSIONED_ATTRIBUTES_FILE_NAME
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # The sidecar location is derived from relative paths
+    monkeypatch.chdir(tmp_path)
+    return NonVersionedAttributeStore()
+
+
+def read_nv_file():
+    with open(NV_FILE) as f:
+        return json.load(f)
+
+
+class TestNonVersionedAttributeStore:
+    def test_writes_through_outside_session(self, store):
+        assert store.set(WS_PATH, "modified_at", "2024-01-01")
+
+        assert read_nv_file() == {"workspaces": {"ws_[1]": {"workspace.json": {"modified_at": "2024-01-01"}}}}
+        assert store.get(WS_PATH) == {"modified_at": "2024-01-01"}
+
+    def test_session_flushes_once_at_the_end(self, store, monkeypatch):
+        flushed = []
+        original_flush_file = store.flush_file
+        monkeypatch.setattr(store, "flush_file", lambda *args: flushed.append(args[0]) or original_flush_file(*args))
+
+        with store.session():
+            store.set(WS_PATH, "modified_at", "2024-01-01")
+            with store.session():
+                store.set(QUEUE_PATH, "modified_at", "2024-01-02")
+            store.delete(WS_PATH)
+
+            # Nothing written yet, but reads see the changes
+            assert not os.path.exists(NV_FILE)
+            assert flushed == []
+            assert store.get(QUEUE_PATH) == {"modified_at": "2024-01-02"}
+            assert store.get(WS_PATH) == {}
+
+        assert len(flushed) == 1
+        assert read_nv_file() == {
+            "workspaces": {"ws_[1]": {"queues": {"q_[2]": {"queue.json": {"modified_at": "2024-01-02"}}}}}
+        }
+
+    def test_deleting_directory_forgets_everything_under_it(self, store):
+        store.set(WS_PATH, "modified_at", "2024-01-01")
+        store.set(QUEUE_PATH, "modified_at", "2024-01-02")
+
+        store.delete(QUEUE_PATH.parent)
+
+        assert store.get(QUEUE_PATH) == {}
+        assert store.get(WS_PATH) == {"modified_at": "2024-01-01"}
+        assert read_nv_file()["workspaces"]["ws_[1]"]["queues"] == {}
+
+    def test_external_changes_are_reloaded(self, store):
+        store.set(WS_PATH, "modified_at", "2024-01-01")
+
+        with open(NV_FILE, "w") as f:
+            json.dump({"workspaces": {"ws_[1]": {"workspace.json": {"modified_at": "2025-01-01T00:00:00Z"}}}}, f)
+
+        assert store.get(WS_PATH) == {"modified_at": "2025-01-01T00:00:00Z"}
+
+    def test_shallow_paths_are_ignored(self, store):
+        assert not store.set(Path("organization.json"), "modified_at", "2024-01-01")
+        assert store.get(Path("organization.json")) == {}
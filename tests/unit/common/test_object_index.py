@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+from deployment_manager.common import object_index as object_index_module
+from deployment_manager.common.object_index import ObjectIndex, canonical_hash
+from deployment_manager.utils.consts import settings
+
+
+async def _write(path, object):
+    await path.parent.mkdir(parents=True, exist_ok=True)
+    await path.write_text(json.dumps(object))
+
+
+@pytest.fixture
+def no_racy_window(monkeypatch):
+    # Freshly written files are otherwise always reparsed
+    monkeypatch.setattr(object_index_module, "RACY_WINDOW_NS", -(10**18))
+
+
+@pytest.mark.asyncio
+class TestObjectIndex:
+    async def test_scan_indexes_objects(self, tmp_path):
+        queue = {
+            "id": 5,
+            "name": "Q",
+            "url": "https://x.rossum.app/api/v1/queues/5",
+            "workspace": "https://x.rossum.app/api/v1/workspaces/1",
+        }
+        await _write(tmp_path / "org" / "dev" / "workspaces" / "ws_[1]" / "queues" / "q_[5]" / "queue.json", queue)
+        await _write(tmp_path / "org" / "dev" / "notes.json", {"foo": "bar"})
+
+        index = ObjectIndex(project_path=tmp_path)
+        indexed_objects = {o.path.name: o for o in await index.scan(tmp_path / "org" / "dev")}
+
+        assert await (tmp_path / settings.LOCAL_STATE_DIR_NAME / settings.OBJECT_INDEX_FILE_NAME).exists()
+        queue_entry = indexed_objects["queue.json"]
+        assert queue_entry.id == 5
+        assert queue_entry.type == "queues"
+        assert queue_entry.org == "org"
+        assert queue_entry.subdir == "dev"
+        assert queue_entry.parent_url == queue["workspace"]
+        assert queue_entry.content_hash == canonical_hash(queue)
+        assert indexed_objects["notes.json"].id is None
+
+    async def test_unchanged_files_are_not_reparsed(self, tmp_path, monkeypatch, no_racy_window):
+        path = tmp_path / "org" / "dev" / "hooks" / "h_[1].json"
+        await _write(path, {"id": 1, "url": "https://x.rossum.app/api/v1/hooks/1"})
+
+        index = ObjectIndex(project_path=tmp_path)
+        await index.scan(tmp_path / "org")
+        index.close()
+
+        parsed = []
+        original_index_file = ObjectIndex._index_file
+
+        async def counting_index_file(self, path, key, stat):
+            parsed.append(key)
+            return await original_index_file(self, path, key, stat)
+
+        monkeypatch.setattr(ObjectIndex, "_index_file", counting_index_file)
+
+        # A new instance reads the persisted index
+        index = ObjectIndex(project_path=tmp_path)
+        assert [o.id for o in await index.scan(tmp_path / "org")] == [1]
+        assert parsed == []
+
+        await _write(path, {"id": 1, "url": "https://x.rossum.app/api/v1/hooks/1", "name": "changed"})
+        # Make sure the mtime differs even on filesystems with a coarse resolution
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        await index.get(path)
+        assert parsed == ["org/dev/hooks/h_[1].json"]
+
+    async def test_deleted_files_are_forgotten(self, tmp_path):
+        path = tmp_path / "org" / "dev" / "labels" / "l_[1].json"
+        await _write(path, {"id": 1, "url": "https://x.rossum.app/api/v1/labels/1"})
+
+        index = ObjectIndex(project_path=tmp_path)
+        assert len(await index.scan(tmp_path / "org")) == 1
+
+        await path.unlink()
+        assert await index.scan(tmp_path / "org") == []
+        assert await index.get(path) is None
+
+    async def test_pulled_hashes_are_kept_until_the_file_is_deleted(self, tmp_path):
+        path = tmp_path / "org" / "dev" / "labels" / "l_[1].json"
+        await _write(path, {"id": 1})
+
+        index = ObjectIndex(project_path=tmp_path)
+        await index.scan(tmp_path / "org")
+        index.record_pulled_hash(path, "abc")
+        index.close()
+
+        index = ObjectIndex(project_path=tmp_path)
+        assert index.get_pulled_hash(path) == "abc"
+
+        await path.unlink()
+        await index.scan(tmp_path / "org")
+        assert index.get_pulled_hash(path) is None
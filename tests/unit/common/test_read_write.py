@@ -1,4 +1,5 @@
 import json
+import os
 
 import pytest
 from anyio import Path
@@ -47,6 +48,18 @@ class TestWriteReadJson:
         assert "counts" not in loaded
         assert "users" not in loaded
 
+    async def test_identical_content_is_not_rewritten(self, tmp_path):
+        path = tmp_path / "thing.json"
+        await write_object_to_json(path, {"id": 1, "name": "foo"})
+        os.utime(path, ns=(0, 0))
+
+        await write_object_to_json(path, {"id": 1, "name": "foo"})
+        assert os.stat(path).st_mtime_ns == 0
+
+        await write_object_to_json(path, {"id": 1, "name": "bar"})
+        assert os.stat(path).st_mtime_ns != 0
+        assert (await read_object_from_json(path, False))["name"] == "bar"
+
     async def test_hook_status_stripped(self, tmp_path):
         path = tmp_path / "hook.json"
         await write_object_to_json(
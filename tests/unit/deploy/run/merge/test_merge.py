@@ -152,6 +152,21 @@ class TestDeepThreeWayMerge:
         merged, _, _ = deep_three_way_merge(la, s, t)
         assert merged["new_field"] == "value"
 
+    def test_identical_subtrees_are_merged_like_changed_ones(self):
+        la = {"settings": {"ids": [3, 1, 1], "nested": {"raw": [2, 1]}, "items": [{"b": 1}]}, "name": "a"}
+        s = {"settings": {"ids": [3, 1, 1], "nested": {"raw": [2, 1]}, "items": [{"b": 1}]}, "name": "b"}
+        t = {"settings": {"ids": [3, 1, 1], "nested": {"raw": [2, 1]}, "items": [{"b": 1}]}, "name": "a"}
+        merged, conflicts, rebases = deep_three_way_merge(la, s, t, ignored_fields=["settings.nested.raw"])
+        # Primitive lists are still sorted and deduplicated, ignored fields are still taken as they are
+        assert merged == {"settings": {"ids": [1, 3], "nested": {"raw": [2, 1]}, "items": [{"b": 1}]}, "name": "b"}
+        assert conflicts == {}
+        assert rebases == {}
+
+    def test_values_equal_only_in_python_are_identical(self):
+        merged, conflicts, rebases = deep_three_way_merge({"a": 1}, {"a": True}, {"a": 1.0}, ignored_fields={"id"})
+        assert merged == {"a": True}
+        assert conflicts == {} and rebases == {}
+
 
 class TestGetSetNestedValue:
     def test_get_flat(self):
@@ -263,28 +263,3 @@ class TestReplaceIdsInTargetObject:
         assert 999 in target.data["settings"]["refs"]
 
 
-class TestCreateOverrideDiff:
-    def test_no_diff_for_identical_objects(self):
-        overrider = AttributeOverrider(type=Resource.Hook, plan_only=False)
-        before = {"id": 1, "url": "x", "name": "same"}
-        after = {"id": 1, "url": "x", "name": "same"}
-        result = overrider.create_override_diff(before, after)
-        # diff should be empty for identical content
-        assert result == ""
-
-    def test_shows_diff_for_changed_attribute(self):
-        overrider = AttributeOverrider(type=Resource.Hook, plan_only=False)
-        before = {"id": 1, "url": "x", "name": "old"}
-        after = {"id": 1, "url": "x", "name": "new"}
-        result = overrider.create_override_diff(before, after)
-        assert "old" in result
-        assert "new" in result
-
-    def test_shows_code_diff_separately(self):
-        overrider = AttributeOverrider(type=Resource.Hook, plan_only=False)
-        before = {"id": 1, "url": "x", "config": {"code": "print('a')\n"}}
-        after = {"id": 1, "url": "x", "config": {"code": "print('b')\n"}}
-        result = overrider.create_override_diff(before, after)
-        assert "config.code diff:" in result
-        assert "print('a')" in result
-        assert "print('b')" in result
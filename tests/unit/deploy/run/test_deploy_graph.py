@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.hook_deploy_object import HookDeployObject
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.queue_deploy_object import QueueDeployObject
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.reference_replacer import SourceIdMatcher
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.schema_deploy_object import SchemaDeployObject
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.workspace_deploy_object import (
+    WorkspaceDeployObject,
+)
+from deployment_manager.commands.deploy.subcommands.run.deploy_orchestrator.deploy_graph import (
+    build_deploy_graph,
+    find_critical_path,
+    run_deploy_graph,
+)
+
+# Importing the orchestrator triggers the model_rebuild() calls at module load
+from deployment_manager.commands.deploy.subcommands.run.deploy_orchestrator.deploy_orchestrator import (  # noqa: F401
+    DeployOrchestrator,
+)
+
+BASE = "https://source.rossum.app/api/v1"
+
+
+def _objects():
+    workspaces = [
+        WorkspaceDeployObject(id=1, name="W1", data={"url": f"{BASE}/workspaces/1"}),
+        WorkspaceDeployObject(id=2, name="W2", data={"url": f"{BASE}/workspaces/2"}),
+    ]
+    hook = HookDeployObject(
+        id=5, name="H", data={"url": f"{BASE}/hooks/5", "queues": [f"{BASE}/queues/10"], "run_after": []}
+    )
+    queue = QueueDeployObject(
+        id=10,
+        name="Q",
+        base_path="source",
+        data={
+            "url": f"{BASE}/queues/10",
+            "workspace": f"{BASE}/workspaces/1",
+            "schema": f"{BASE}/schemas/20",
+            "hooks": [f"{BASE}/hooks/5"],
+        },
+        schema=SchemaDeployObject(id=20, name="S", data={"url": f"{BASE}/schemas/20", "queues": [f"{BASE}/queues/10"]}),
+    )
+    return {"hooks": [hook], "workspaces": workspaces, "queues": [queue]}
+
+
+class TestBuildDeployGraph:
+    def test_depends_only_on_referenced_objects_of_earlier_groups(self):
+        nodes = build_deploy_graph(_objects())
+        by_name = {node.deploy_object.name: index for index, node in enumerate(nodes)}
+
+        # The hook references the queue too, but hooks are deployed first (the second deploy fills the reference)
+        assert nodes[by_name["H"]].dependencies == []
+        assert nodes[by_name["W2"]].dependencies == []
+        assert sorted(nodes[by_name["Q"]].dependencies) == sorted([by_name["H"], by_name["W1"]])
+
+    def test_depends_on_objects_referenced_by_id_in_settings(self):
+        objects = _objects()
+        new_hook = HookDeployObject(id=6, name="H2", data={"url": f"{BASE}/hooks/6", "queues": []})
+        objects["hooks"].append(new_hook)
+        queue = objects["queues"][0]
+        queue.data["settings"] = {"columns": [{"hook_id": 6}], "note": "ignored 99"}
+        matcher = SourceIdMatcher([1, 2, 5, 6, 10, 20])
+
+        nodes = build_deploy_graph(objects, source_id_matcher=matcher)
+        by_name = {node.deploy_object.name: index for index, node in enumerate(nodes)}
+
+        assert sorted(nodes[by_name["Q"]].dependencies) == sorted([by_name["H"], by_name["H2"], by_name["W1"]])
+        # Without the matcher only URL references are followed
+        nodes = build_deploy_graph(objects)
+        assert by_name["H2"] not in nodes[by_name["Q"]].dependencies
+
+
+@pytest.mark.asyncio
+class TestRunDeployGraph:
+    async def test_objects_start_once_their_dependencies_finish(self):
+        nodes = build_deploy_graph(_objects())
+        events = []
+
+        async def deploy(deploy_object):
+            events.append(("start", deploy_object.name))
+            await asyncio.sleep(0.02 if deploy_object.name == "W2" else 0)
+            events.append(("end", deploy_object.name))
+
+        await run_deploy_graph(nodes, deploy)
+
+        # The queue does not wait for the unrelated slow workspace
+        assert events.index(("start", "Q")) > events.index(("end", "W1"))
+        assert events.index(("start", "Q")) > events.index(("end", "H"))
+        assert events.index(("start", "Q")) < events.index(("end", "W2"))
+
+    async def test_critical_path_follows_the_last_finished_dependencies(self):
+        nodes = build_deploy_graph(_objects())
+
+        async def deploy(deploy_object):
+            await asyncio.sleep(0.01 if deploy_object.name == "H" else 0)
+
+        await run_deploy_graph(nodes, deploy)
+
+        assert [node.deploy_object.name for node in find_critical_path(nodes)] == ["H", "Q"]
+
+    async def test_error_lets_deploying_objects_finish_and_skips_the_rest(self):
+        nodes = build_deploy_graph(_objects())
+        events = []
+
+        async def deploy(deploy_object):
+            events.append(("start", deploy_object.name))
+            if deploy_object.name == "H":
+                await asyncio.sleep(0)
+                raise ValueError("Hook failed")
+            await asyncio.sleep(0.02 if deploy_object.name == "W2" else 0)
+            events.append(("end", deploy_object.name))
+
+        with pytest.raises(ValueError, match="Hook failed"):
+            await run_deploy_graph(nodes, deploy, n=5)
+
+        # The slow workspace was not cancelled, the queue depending on the hook never started
+        assert ("end", "W2") in events
+        assert ("start", "Q") not in events
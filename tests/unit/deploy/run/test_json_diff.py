@@ -0,0 +1,89 @@
+import json
+import re
+
+import pytest
+
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.json_diff import (
+    create_code_diff,
+    create_json_diff,
+)
+
+HUNK_REGEX = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@$")
+
+
+def _apply_diff(before_lines: list[str], diff: str) -> list[str]:
+    """Patches the lines like `patch` would, checking the context and the hunk ranges on the way."""
+    result = []
+    position = 0
+    lines = diff.splitlines()[2:]
+    index = 0
+    while index < len(lines):
+        match = HUNK_REGEX.match(lines[index])
+        assert match, lines[index]
+        start = int(match.group(1)) - (1 if match.group(2) != "0" else 0)
+        result.extend(before_lines[position:start])
+        position = start
+        index += 1
+        while index < len(lines) and not lines[index].startswith("@@"):
+            tag, line = lines[index][0], lines[index][1:]
+            if tag in " -":
+                assert before_lines[position] == line
+                position += 1
+            if tag in " +":
+                result.append(line)
+            index += 1
+    return result + before_lines[position:]
+
+
+def _dump(object) -> list[str]:
+    return json.dumps(object, indent=2, sort_keys=True).splitlines()
+
+
+class TestCreateJsonDiff:
+    @pytest.mark.parametrize(
+        "before, after",
+        [
+            ({"a": 1, "b": {"c": [1, 2, 3]}}, {"a": 1, "b": {"c": [1, 5, 3]}}),
+            ({"a": 1, "b": 2}, {"a": 1}),
+            ({"a": 1}, {"a": 1, "z": {"new": True}}),
+            ({"list": [{"x": 1}, {"x": 2}]}, {"list": [{"x": 1}]}),
+            ({"a": {"b": {"c": {}}}}, {"a": {"b": {"c": {"d": None}}}}),
+            ({"a": "text"}, {"a": ["text"]}),
+            ({f"k{i}": {"v": i} for i in range(50)}, {**{f"k{i}": {"v": i} for i in range(50)}, "k25": {"v": -1}}),
+        ],
+    )
+    def test_diff_transforms_before_into_after(self, before, after):
+        diff = create_json_diff(before, after)
+        assert diff.startswith("--- before\n+++ after\n@@ ")
+        assert _apply_diff(_dump(before), diff) == _dump(after)
+
+    def test_only_changed_subtrees_are_shown(self):
+        before = {"settings": {f"key_{i}": i for i in range(100)}, "name": "hook"}
+        after = {"settings": {**before["settings"], "key_50": "changed"}, "name": "hook"}
+
+        diff = create_json_diff(before, after)
+
+        assert diff.count("@@ ") == 1
+        assert '-    "key_50": 50,' in diff
+        assert '+    "key_50": "changed",' in diff
+        # Three lines of context around the change
+        assert len([line for line in diff.splitlines() if line.startswith(" ")]) == 6
+
+    def test_equal_objects_and_json_types(self):
+        assert create_json_diff({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}) == ""
+        # Equal in Python but not in JSON
+        diff = create_json_diff({"enabled": 1}, {"enabled": True})
+        assert '-  "enabled": 1' in diff
+        assert '+  "enabled": true' in diff
+
+    def test_unsorted_keys_keep_their_order(self):
+        diff = create_json_diff({"b": 1, "a": 1}, {"b": 2, "a": 1}, sort_keys=False)
+        assert _apply_diff(["{", '  "b": 1,', '  "a": 1', "}"], diff) == ["{", '  "b": 2,', '  "a": 1', "}"]
+
+
+class TestCreateCodeDiff:
+    def test_code_diff(self):
+        assert create_code_diff("a = 1\n", "a = 1\n") == ""
+        diff = create_code_diff("a = 1\nb = 2\n", "a = 1\nb = 3\n")
+        assert "config.code diff:" in diff
+        assert "-b = 2" in diff and "+b = 3" in diff
@@ -0,0 +1,162 @@
+"""Tests for the compare and plan phases being prepared concurrently and rendered in order."""
+
+import asyncio
+from copy import deepcopy
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects import base_deploy_object
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.hook_deploy_object import HookDeployObject
+from deployment_manager.commands.deploy.subcommands.run.deploy_objects.hook_reference_replacer import (
+    HookReferenceReplacer,
+)
+
+# Trigger model rebuild for forward refs
+from deployment_manager.commands.deploy.subcommands.run.deploy_orchestrator.deploy_orchestrator import (  # noqa: F401
+    DeployOrchestrator,
+)
+from deployment_manager.commands.deploy.subcommands.run.models import Target
+
+
+class _SlowCache:
+    """Answers later requests first to shuffle the completion order."""
+
+    def __init__(self, objects: dict):
+        self.objects = objects
+        self.calls = []
+
+    async def get(self, type, id):
+        self.calls.append(id)
+        await asyncio.sleep(0.01 * (len(self.objects) - list(self.objects).index(id)))
+        return dict(self.objects[id])
+
+
+def _make_object(id: int, target_ids: list[str], deploy_file) -> HookDeployObject:
+    targets = []
+    for target_id in target_ids:
+        target = Target(id=target_id)
+        target.visualized_plan_data = {"id": target_id, "name": f"Hook {target_id}"}
+        targets.append(target)
+    object = HookDeployObject(id=id, name=f"Hook {id}", type=Resource.Hook, targets=targets)
+    object.deploy_file = deploy_file
+    return object
+
+
+@pytest.mark.asyncio
+class TestPreparedPhases:
+    async def test_plan_is_printed_in_order(self, monkeypatch):
+        cache = _SlowCache({"10": {"id": "10", "name": "Old"}, "20": {"id": "20", "name": "Old"}})
+        deploy_file = SimpleNamespace(remote_object_cache=cache)
+        objects = [_make_object(1, ["10"], deploy_file), _make_object(2, ["20"], deploy_file)]
+        printed = []
+        monkeypatch.setattr(base_deploy_object, "pprint", lambda panel: printed.append(panel.renderable))
+
+        await asyncio.gather(*[object.prepare_plan() for object in objects])
+        for object in objects:
+            await object.visualize_changes()
+
+        assert len(printed) == 2
+        assert '"Hook 10' in printed[0] and '"Hook 20' in printed[1]
+        # Prepared plans are used once and not fetched again
+        assert cache.calls == ["10", "20"]
+        assert all(object.prepared_plan is None for object in objects)
+
+    async def test_failed_preparation_is_reported_when_rendering(self):
+        cache = MagicMock()
+        cache.get.side_effect = Exception("Connection lost")
+        object = _make_object(1, ["10"], SimpleNamespace(remote_object_cache=cache))
+
+        await object.prepare_plan()
+        assert object.prepared_plan is None
+
+        with pytest.raises(Exception, match="Connection lost"):
+            await object.visualize_changes()
+
+    async def test_compare_uses_prepared_merges(self):
+        cache = _SlowCache({"10": {"id": "10", "name": "Hook 10"}, "20": {"id": "20", "name": "Hook 20"}})
+        deploy_state = MagicMock()
+        deploy_state.get_last_applied.return_value = {}
+        deploy_file = SimpleNamespace(remote_object_cache=cache, deploy_state=deploy_state, prefer=None)
+        object = _make_object(1, ["10", "20"], deploy_file)
+
+        await object.prepare_comparisons()
+        assert [comparison.target.id for comparison in object.prepared_comparisons] == ["10", "20"]
+
+        await object.compare_target_objects()
+        assert not object.deploy_failed and not object.conflict_detected
+        assert cache.calls == ["10", "20"]
+
+
+class TestPhaseData:
+    @pytest.mark.asyncio
+    async def test_phases_stay_independent_after_override_references(self):
+        source, target = "https://src/api/v1", "https://tgt/api/v1"
+        remote_hook = {"id": "10", "queues": [f"{target}/queues/77"], "run_after": []}
+        deploy_file = SimpleNamespace(
+            lookup_table={5: {Resource.Queue: [Target(id="50")]}},
+            reverse_lookup_table={Resource.Queue: {"50": 5}},
+            source_id_matcher=None,
+            is_same_org=False,
+            token_owner_id=3,
+            source_client=SimpleNamespace(_http_client=SimpleNamespace(base_url=source)),
+            client=SimpleNamespace(_http_client=SimpleNamespace(base_url=target)),
+            remote_object_cache=_SlowCache({"10": remote_hook}),
+        )
+        object = _make_object(1, ["10"], deploy_file)
+        object.ref_replacer = HookReferenceReplacer(object)
+        data = {
+            "id": "10",
+            "url": f"{target}/hooks/10",
+            "queues": [f"{source}/queues/5"],
+            "run_after": [],
+            "settings": {"queue_id": 5},
+            "config": {"code": "queue_id = 5", "schedule": {"queues": [5]}},
+        }
+        pre_reference_replace_data = deepcopy(data)
+        hook_target = object.targets[0]
+        hook_target.pre_reference_replace_data = data
+        for data_attribute in ("visualized_plan_data", "first_deploy_data", "second_deploy_data"):
+            setattr(hook_target, data_attribute, object.copy_phase_data(data))
+
+        await object.override_references("visualized_plan_data", use_dummy_references=True)
+        await object.override_references("first_deploy_data", use_dummy_references=False)
+        hook_target.first_deploy_data["settings"]["deployed"] = True
+        hook_target.first_deploy_data["queues"].append("first only")
+
+        # The references of each phase got replaced, the source data and the shared config stay as they were
+        assert data == pre_reference_replace_data
+        assert hook_target.visualized_plan_data["settings"] == {"queue_id": 50}
+        assert hook_target.visualized_plan_data["queues"] == [f"{target}/queues/50", f"{target}/queues/77"]
+        assert hook_target.second_deploy_data["settings"] == {"queue_id": 5}
+        assert hook_target.second_deploy_data["queues"] == [f"{source}/queues/5"]
+        assert hook_target.visualized_plan_data["config"] == pre_reference_replace_data["config"]
+
+    def test_phases_share_only_unmodified_attributes(self):
+        object = _make_object(1, ["10"], SimpleNamespace())
+        data = {"id": 10, "config": {"code": "x = 1"}, "settings": {"queue": 5}, "queues": ["queue/5"]}
+
+        first_data, second_data = object.copy_phase_data(data), object.copy_phase_data(data)
+        first_data["settings"]["queue"] = 6
+        first_data["queues"].append("queue/6")
+
+        assert first_data["config"] is second_data["config"] is data["config"]
+        assert second_data == data
+        assert data["settings"] == {"queue": 5} and data["queues"] == ["queue/5"]
+
+    @pytest.mark.asyncio
+    async def test_update_payload_is_not_copied(self):
+        client = SimpleNamespace(_http_client=SimpleNamespace(update=AsyncMock(return_value={"id": "10"})))
+        cache = SimpleNamespace(set=MagicMock())
+        object = _make_object(1, ["10"], SimpleNamespace(client=client, remote_object_cache=cache))
+        target = object.targets[0]
+        target.first_deploy_data = {"id": "10", "config": {"code": "x = 1"}}
+
+        await object.update_remote(data_attribute="first_deploy_data", target=target)
+
+        payload = client._http_client.update.call_args.kwargs["data"]
+        assert payload == {"config": {"code": "x = 1"}}
+        assert payload["config"] is target.first_deploy_data["config"]
+        assert target.first_deploy_data["id"] == "10"
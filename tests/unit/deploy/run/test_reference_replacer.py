@@ -6,6 +6,8 @@ from rossum_api.domain_logic.resources import Resource
 
 from deployment_manager.commands.deploy.subcommands.run.deploy_objects.reference_replacer import (
     ReferenceReplacer,
+    ReverseReferenceTranslator,
+    SourceIdMatcher,
 )
 
 # Trigger Target/DeployObject rebuild
@@ -350,56 +352,38 @@ class TestReplaceListOfReferenceUrls:
         assert "https://src.rossum.app/api/v1/hooks/700999" in obj["hooks"]
 
 
-class TestReverseTargetReferenceIntoSource:
+class TestReverseReferenceTranslator:
     def test_replaces_target_ids_in_string(self):
         rlut = _make_reverse_lookup(Resource.Hook, {100: 1, 200: 2})
-        value = "hook:100 and hook:200"
-        result = ReferenceReplacer.reverse_target_reference_into_source(
-            value=value,
-            reference_type=Resource.Hook,
-            reverse_lookup_table=rlut,
-            source_base_url="https://src/api/v1",
-            target_base_url="https://tgt/api/v1",
-        )
-        assert "1" in result
-        assert "2" in result
+        translator = ReverseReferenceTranslator(rlut, "https://src/api/v1", "https://tgt/api/v1")
+        assert translator.translate("hook:100 and hook:200", Resource.Hook) == "hook:1 and hook:2"
 
     def test_replaces_base_url(self):
         rlut = _make_reverse_lookup(Resource.Hook, {100: 1})
-        value = "https://tgt/api/v1/hooks/100"
-        result = ReferenceReplacer.reverse_target_reference_into_source(
-            value=value,
-            reference_type=Resource.Hook,
-            reverse_lookup_table=rlut,
-            source_base_url="https://src/api/v1",
-            target_base_url="https://tgt/api/v1",
-        )
-        assert result == "https://src/api/v1/hooks/1"
+        translator = ReverseReferenceTranslator(rlut, "https://src/api/v1", "https://tgt/api/v1")
+        assert translator.translate("https://tgt/api/v1/hooks/100", Resource.Hook) == "https://src/api/v1/hooks/1"
+        # Only a prefix is a base URL
+        assert translator.translate("see https://tgt/api/v1", Resource.Hook) == "see https://tgt/api/v1"
 
-    def test_recurses_into_list(self):
+    def test_recurses_into_lists_and_dicts(self):
         rlut = _make_reverse_lookup(Resource.Hook, {100: 1})
-        values = ["a", "100", {"key": "100"}]
-        result = ReferenceReplacer.reverse_target_reference_into_source(
-            value=values,
-            reference_type=Resource.Hook,
-            reverse_lookup_table=rlut,
-            source_base_url="https://src/api/v1",
-            target_base_url="https://tgt/api/v1",
-        )
-        assert result[1] == "1"
-        assert result[2] == {"key": "1"}
+        translator = ReverseReferenceTranslator(rlut, "https://src/api/v1", "https://tgt/api/v1")
+        assert translator.translate(["a", "100", {"key": "100"}], Resource.Hook) == ["a", "1", {"key": "1"}]
+        assert translator.translate({"a": "100", "b": {"c": "100"}}, Resource.Hook) == {"a": "1", "b": {"c": "1"}}
 
-    def test_recurses_into_dict(self):
-        rlut = _make_reverse_lookup(Resource.Hook, {100: 1})
-        value = {"a": "100", "b": {"c": "100"}}
-        result = ReferenceReplacer.reverse_target_reference_into_source(
-            value=value,
-            reference_type=Resource.Hook,
-            reverse_lookup_table=rlut,
-            source_base_url="https://src/api/v1",
-            target_base_url="https://tgt/api/v1",
-        )
-        assert result == {"a": "1", "b": {"c": "1"}}
+    def test_replaces_whole_ids_only(self):
+        rlut = _make_reverse_lookup(Resource.Hook, {12: 1, 100: 2})
+        translator = ReverseReferenceTranslator(rlut, "https://src/api/v1", "https://tgt/api/v1")
+        assert translator.translate("12 123 v12 hooks/12", Resource.Hook) == "1 123 v12 hooks/1"
+        # Replaced IDs are not translated again
+        assert translator.translate({"ids": [100, "12,100"]}, Resource.Hook) == {"ids": ["2", "1,2"]}
+
+    def test_translates_urls_and_dummy_ids(self):
+        rlut = _make_reverse_lookup(Resource.Queue, {"<NEW COPY>[0](q - 5)": 5, 300: 3})
+        translator = ReverseReferenceTranslator(rlut, "https://src/api/v1", "https://tgt/api/v1")
+        assert translator.translate("https://tgt/api/v1/queues/300", Resource.Queue) == "https://src/api/v1/queues/3"
+        assert translator.translate("<NEW COPY>[0](q - 5)", Resource.Queue) == "5"
+        assert translator.translate("300", Resource.Hook) == "300"
 
 
 class TestReverseUnknownReferenceType:
@@ -467,3 +451,52 @@ class TestReplaceUnstructuredAttributes:
             num_targets=1,
         )
         assert target_object["actions"][0]["id"] == "99"
+
+
+class TestSourceIdMatcher:
+    def test_finds_ids_in_lookup_table_order(self):
+        matcher = SourceIdMatcher([123, 12, 5, 999])
+        assert matcher.find("https://x/api/v1/hooks/123?q=5") == [123, 12, 5]
+        assert matcher.find(999) == [999]
+        assert matcher.find("no-ids") == []
+
+    def test_matches_substring_search(self):
+        source_ids = [1, 12, 123, 2345, 500001, 7, 70, 700, "abc"]
+        matcher = SourceIdMatcher(source_ids)
+        values = ["", "1", "x12345y", "500001/700", "uuid-7-0-abc", 70012, "٣12", "0123-2345"]
+        for value in values:
+            assert matcher.find(value) == [id for id in source_ids if str(id) in str(value)]
+
+    def test_replaces_all_ids_in_one_value(self):
+        rr = ReferenceReplacer(parent_object_reference=_make_parent(), type=Resource.Hook)
+        lut = _make_lookup(1, Resource.Hook, [_make_target(99)])
+        lut[2][Resource.Queue] = [_make_target(88)]
+        target_object = {"settings": {"ids": [1, 2, 3]}, "metadata": {"refs": "2"}}
+        rr.replace_references_in_unstructured_attributes(
+            target_object_label="hook",
+            target_object=target_object,
+            lookup_table=lut,
+            target_object_index=0,
+            num_targets=1,
+        )
+        assert target_object == {"settings": {"ids": [99, 88, 3]}, "metadata": {"refs": "88"}}
+
+    def test_keys_written_the_same_are_all_found(self):
+        matcher = SourceIdMatcher([123, "123", 5])
+        assert matcher.find("hooks/123") == [123, "123"]
+
+    def test_given_matcher_is_used(self):
+        rr = ReferenceReplacer(parent_object_reference=_make_parent(), type=Resource.Hook)
+        lut = _make_lookup(1, Resource.Hook, [_make_target(99)])
+        matcher = MagicMock(wraps=SourceIdMatcher(list(lut.keys())))
+        target_object = {"settings": {"a": 1}, "metadata": {"b": "1"}}
+        rr.replace_references_in_unstructured_attributes(
+            target_object_label="hook",
+            target_object=target_object,
+            lookup_table=lut,
+            target_object_index=0,
+            num_targets=1,
+            source_id_matcher=matcher,
+        )
+        assert target_object == {"settings": {"a": 99}, "metadata": {"b": "99"}}
+        assert matcher.find.call_count == 2
@@ -0,0 +1,105 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from rossum_api import APIClientError
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.commands.deploy.subcommands.run.remote_object_cache import RemoteObjectCache
+
+
+def _make_client(responses: list):
+    client = MagicMock()
+    calls = []
+
+    async def fetch_one(resource, id_):
+        calls.append((resource, id_))
+        await asyncio.sleep(0)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client._http_client.fetch_one = fetch_one
+    return client, calls
+
+
+@pytest.mark.asyncio
+class TestRemoteObjectCache:
+    async def test_concurrent_gets_share_one_fetch(self):
+        client, calls = _make_client([{"id": 1, "name": "Q"}])
+        cache = RemoteObjectCache(client=client)
+
+        first, second = await asyncio.gather(cache.get(Resource.Queue, 1), cache.get(Resource.Queue, "1"))
+
+        assert first == second == {"id": 1, "name": "Q"}
+        assert calls == [(Resource.Queue, 1)]
+        # Callers get their own copies
+        first["name"] = "Changed"
+        assert (await cache.get(Resource.Queue, 1))["name"] == "Q"
+
+    async def test_refresh_and_failures_fetch_again(self):
+        client, calls = _make_client(
+            [APIClientError("GET", "/queues/1", 500, "Error"), {"id": 1, "name": "Q"}, {"id": 1, "name": "New"}]
+        )
+        cache = RemoteObjectCache(client=client)
+
+        with pytest.raises(APIClientError):
+            await cache.get(Resource.Queue, 1)
+        assert (await cache.get(Resource.Queue, 1))["name"] == "Q"
+        assert (await cache.get(Resource.Queue, 1, refresh=True))["name"] == "New"
+        assert len(calls) == 3
+
+    async def test_written_objects_replace_fetched_ones(self):
+        client, calls = _make_client([{"id": 1, "name": "Q"}, {"id": 1, "name": "Fetched again"}])
+        cache = RemoteObjectCache(client=client)
+        await cache.get(Resource.Queue, 1)
+
+        cache.set(Resource.Queue, 1, {"id": 1, "name": "Updated"})
+        assert (await cache.get(Resource.Queue, 1))["name"] == "Updated"
+
+        cache.forget(Resource.Queue, 1)
+        assert (await cache.get(Resource.Queue, 1))["name"] == "Fetched again"
+        assert len(calls) == 2
+
+    async def test_prefetch_lists_objects_by_ids(self):
+        client, calls = _make_client([{"id": 3, "name": "Q3"}])
+        listings = []
+
+        async def fetch_all(resource, id: str):
+            listings.append((resource, id))
+            for object_id in map(int, id.split(",")):
+                if object_id != 3:
+                    yield {"id": object_id, "type": resource}
+
+        client._http_client.fetch_all = fetch_all
+        cache = RemoteObjectCache(client=client)
+
+        await cache.prefetch({Resource.Queue: {"1", "2", "3"}, Resource.Inbox: {"4"}, Resource.Workspace: set()})
+
+        assert sorted(listings, key=str) == [(Resource.Inbox, "4"), (Resource.Queue, "1,2,3")]
+        assert (await cache.get(Resource.Queue, 2))["type"] == Resource.Queue
+        assert (await cache.get(Resource.Inbox, "4"))["type"] == Resource.Inbox
+        assert calls == []
+        # Objects missing from the listing are fetched one by one
+        await cache.get(Resource.Queue, 3)
+        assert calls == [(Resource.Queue, 3)]
+
+    async def test_prefetch_skips_types_with_incomplete_listing_payloads(self):
+        client, calls = _make_client([{"id": 4, "name": "S", "content": [{"id": "section"}]}])
+        listings = []
+
+        async def fetch_all(resource, id: str):
+            listings.append((resource, id))
+            # Schema listings do not include the content
+            for object_id in map(int, id.split(",")):
+                yield {"id": object_id, "name": "S"}
+
+        client._http_client.fetch_all = fetch_all
+        cache = RemoteObjectCache(client=client)
+
+        await cache.prefetch({Resource.Schema: {"4"}})
+
+        assert listings == []
+        assert (await cache.get(Resource.Schema, 4))["content"] == [{"id": "section"}]
+        assert calls == [(Resource.Schema, 4)]
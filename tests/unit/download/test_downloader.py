@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from rossum_api import APIClientError
+from rossum_api.domain_logic.resources import Resource
+
+from deployment_manager.commands.download.downloader import Downloader, DownloadException
+from deployment_manager.utils.consts import settings
+
+
+class FakeHttpClient:
+    def __init__(self, objects: list[dict]):
+        self.objects = {object["id"]: object for object in objects}
+        self.fetched_ids = []
+        self.listed_count = 0
+
+    async def fetch_all(self, resource, **kwargs):
+        for object in self.objects.values():
+            self.listed_count += 1
+            # Paginated payloads are not guaranteed to have every attribute
+            yield {key: value for key, value in object.items() if key != "detail_only"}
+
+    async def fetch_one(self, resource, id_):
+        self.fetched_ids.append(id_)
+        return dict(self.objects[id_])
+
+
+def _downloader(objects: list[dict], **kwargs):
+    http_client = FakeHttpClient(objects)
+    client = SimpleNamespace(_http_client=http_client)
+    return Downloader.model_construct(
+        client=client,
+        incremental=kwargs.get("incremental", False),
+        modified_since=kwargs.get("modified_since", {}),
+        complete_list_payload_types=set(settings.LIST_PAYLOAD_COMPLETE_TYPES),
+        verify_list_payloads=kwargs.get("verify_list_payloads", False),
+        high_water_marks={},
+        partial_object_ids={},
+    )
+
+
+HOOKS = [
+    {"id": 1, "modified_at": "2024-01-01T00:00:00.000000Z", "detail_only": True},
+    {"id": 2, "modified_at": "2024-03-01T00:00:00.000000Z", "detail_only": True},
+    {"id": 3, "modified_at": None, "detail_only": True},
+]
+
+
+@pytest.mark.asyncio
+class TestDownloader:
+    async def test_full_pull_refetches_everything(self):
+        downloader = _downloader(HOOKS)
+        objects = await downloader.download_remote_objects(Resource.Hook)
+
+        assert [object["id"] for object in objects] == [1, 2, 3]
+        assert all(object["detail_only"] for object in objects)
+        assert sorted(downloader.client._http_client.fetched_ids) == [1, 2, 3]
+        assert downloader.high_water_marks == {"hooks": "2024-03-01T00:00:00.000000Z"}
+
+    async def test_incremental_pull_refetches_only_modified(self):
+        downloader = _downloader(HOOKS, incremental=True, modified_since={"hooks": "2024-01-01T00:00:00.000000Z"})
+        objects = await downloader.download_remote_objects(Resource.Hook)
+
+        # Objects without a timestamp are always refetched
+        assert sorted(downloader.client._http_client.fetched_ids) == [2, 3]
+        assert [object["id"] for object in objects] == [1, 2, 3]
+        assert "detail_only" not in objects[0]
+        assert downloader.partial_object_ids == {"hooks": {1}}
+
+        await downloader.complete_object(Resource.Hook, objects[0])
+        assert objects[0]["detail_only"]
+        assert downloader.partial_object_ids == {"hooks": set()}
+
+    async def test_incremental_pull_without_previous_mark(self):
+        downloader = _downloader(HOOKS, incremental=True, modified_since={})
+        await downloader.download_remote_objects(Resource.Hook)
+
+        assert sorted(downloader.client._http_client.fetched_ids) == [1, 2, 3]
+        assert downloader.partial_object_ids == {}
+
+    async def test_high_water_mark_never_decreases(self):
+        downloader = _downloader(HOOKS[:1], incremental=True, modified_since={"hooks": "2025-01-01T00:00:00.000000Z"})
+        await downloader.download_remote_objects(Resource.Hook)
+
+        assert downloader.high_water_marks == {"hooks": "2025-01-01T00:00:00.000000Z"}
+
+    async def test_complete_list_payloads_are_not_refetched(self):
+        downloader = _downloader([{"id": 1, "name": "WS"}])
+        objects = await downloader.download_remote_objects(Resource.Workspace)
+
+        assert objects == [{"id": 1, "name": "WS"}]
+        assert downloader.client._http_client.fetched_ids == []
+
+    async def test_verification_refetches_diverging_types(self):
+        downloader = _downloader([{"id": 1, "name": "WS", "detail_only": True}], verify_list_payloads=True)
+        objects = await downloader.download_remote_objects(Resource.Workspace)
+
+        assert objects == [{"id": 1, "name": "WS", "detail_only": True}]
+        assert "workspaces" not in downloader.complete_list_payload_types
+
+    async def test_verification_keeps_matching_types(self):
+        downloader = _downloader([{"id": 1, "name": "WS"}], verify_list_payloads=True)
+        await downloader.download_remote_objects(Resource.Workspace)
+
+        # Only the sampled object was fetched
+        assert downloader.client._http_client.fetched_ids == [1]
+        assert "workspaces" in downloader.complete_list_payload_types
+
+    async def test_stream_reads_ahead_only_up_to_buffer_size(self, monkeypatch):
+        monkeypatch.setattr(settings, "DOWNLOAD_BUFFER_SIZE", 3)
+        downloader = _downloader([{"id": id, "name": f"WS {id}"} for id in range(20)])
+        http_client = downloader.client._http_client
+
+        stream = downloader.stream_remote_objects(Resource.Workspace)
+        first_object = await anext(stream)
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        # The consumed object + the buffered ones + the one waiting to be buffered
+        assert first_object["id"] == 0
+        assert http_client.listed_count <= 5
+        assert [object["id"] async for object in stream] == list(range(1, 20))
+
+    async def test_stream_yields_detail_payloads(self):
+        downloader = _downloader(HOOKS)
+        objects = [object async for object in downloader.stream_remote_objects(Resource.Hook)]
+
+        assert sorted(object["id"] for object in objects) == [1, 2, 3]
+        assert all(object["detail_only"] for object in objects)
+        assert downloader.sort_in_listing_order(Resource.Hook, objects[::-1]) == [
+            downloader.client._http_client.objects[id] for id in [1, 2, 3]
+        ]
+
+    async def test_stream_raises_download_errors(self):
+        downloader = _downloader(HOOKS)
+
+        async def failing_fetch_one(resource, id_):
+            raise APIClientError("GET", "hooks", 500, "Server error")
+
+        downloader.client._http_client.fetch_one = failing_fetch_one
+
+        with pytest.raises(DownloadException):
+            [object async for object in downloader.stream_remote_objects(Resource.Hook)]
@@ -1,11 +1,19 @@
+from types import SimpleNamespace
+
 import pytest
+import pytest_asyncio
 from anyio import Path
+from rossum_api.domain_logic.resources import Resource
 
+from deployment_manager.commands.download import helpers
 from deployment_manager.commands.download.helpers import (
     delete_empty_folders,
-    delete_empty_formula_dir,
     replace_code_paths,
+    should_write_object,
 )
+from deployment_manager.common.non_versioned_attributes import non_versioned_attributes
+from deployment_manager.common.object_index import ObjectIndex
+from deployment_manager.common.read_write import write_object_to_json
 from deployment_manager.utils.consts import settings
 
 
@@ -41,6 +49,60 @@ class TestReplaceCodePaths:
         assert replaced[2] == Path("org/sub/workspaces/ws_[1]/queues/q_[5]/schema.json")
 
 
+QUEUE = {
+    "id": 5,
+    "url": "https://x.rossum.app/api/v1/queues/5",
+    "name": "Q",
+    "hooks": [],
+    "counts": {"to_review": 1},
+    "modified_at": "2024-01-01T00:00:00.000000Z",
+}
+
+
+@pytest.mark.asyncio
+class TestShouldWriteObject:
+    @pytest_asyncio.fixture
+    async def queue_path(self, tmp_path, monkeypatch):
+        # The non-versioned attributes logic needs paths relative to the project
+        monkeypatch.chdir(tmp_path)
+        path = Path("org") / "dev" / "workspaces" / "ws_[1]" / "queues" / "q_[5]" / "queue.json"
+        await write_object_to_json(path, dict(QUEUE), Resource.Queue)
+        return path
+
+    @pytest.fixture
+    def parent_dir(self):
+        index = ObjectIndex(project_path=Path("."))
+        return SimpleNamespace(get_object_index=lambda: index, ignore_changed_file_warnings=False)
+
+    @pytest.fixture
+    def no_file_reads(self, monkeypatch):
+        async def fail(*args, **kwargs):
+            raise AssertionError("The local file should not be read")
+
+        monkeypatch.setattr(helpers, "read_object_from_json", fail)
+
+    async def test_unchanged_object_is_skipped_without_reading(self, queue_path, parent_dir, no_file_reads):
+        # Non-pulled keys (counts) do not make a difference
+        remote_queue = {**QUEUE, "counts": {"to_review": 2}}
+        assert not await should_write_object(queue_path, remote_queue, set(), parent_dir, Resource.Queue)
+
+    async def test_same_content_with_new_timestamp_is_written(self, queue_path, parent_dir, no_file_reads):
+        remote_queue = {**QUEUE, "modified_at": "2024-02-01T00:00:00.000000Z"}
+        assert await should_write_object(queue_path, remote_queue, set(), parent_dir, Resource.Queue) is True
+
+    async def test_changed_content_falls_back_to_comparison(self, queue_path, parent_dir):
+        # The timestamp did not change, so local edits are kept
+        assert not await should_write_object(queue_path, {**QUEUE, "name": "local"}, set(), parent_dir, Resource.Queue)
+
+        remote_queue = {**QUEUE, "hooks": ["https://x.rossum.app/api/v1/hooks/1"]}
+        assert await should_write_object(queue_path, remote_queue, set(), parent_dir, Resource.Queue)
+
+    async def test_local_changes_are_kept_when_not_interactive(self, queue_path, parent_dir):
+        parent_dir.interactive = False
+        remote_queue = {**QUEUE, "modified_at": "2024-02-01T00:00:00.000000Z"}
+        assert not await should_write_object(queue_path, remote_queue, {queue_path}, parent_dir, Resource.Queue)
+
+
 @pytest.mark.asyncio
 class TestDeleteEmptyFolders:
     async def test_removes_single_empty_folder(self, tmp_path):
@@ -60,20 +122,33 @@ class TestDeleteEmptyFolders:
     async def test_removes_nested_empty(self, tmp_path):
         nested = tmp_path / "a" / "b" / "c"
         await nested.mkdir(parents=True)
-        # A single pass walks rglob and deletes what it finds empty.
-        # The innermost empty directory is always removed immediately.
-        await delete_empty_folders(tmp_path)
-        assert not await (tmp_path / "a" / "b" / "c").exists()
+        # The walk is bottom-up, so directories left empty by their children go in the same pass
+        deleted = await delete_empty_folders(tmp_path)
+        assert not await (tmp_path / "a").exists()
+        assert await tmp_path.exists()
+        assert len(deleted) == 3
+
+    async def test_forgets_non_versioned_attributes_of_deleted_dirs(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        queue_path = Path("org") / "dev" / "workspaces" / "ws_[1]" / "queues" / "q_[5]" / "queue.json"
+        await queue_path.parent.mkdir(parents=True)
+        non_versioned_attributes.set(queue_path, "modified_at", "2024-01-01")
+
+        await delete_empty_folders(Path("org") / "dev" / "workspaces")
+
+        assert not await (Path("org") / "dev" / "workspaces" / "ws_[1]").exists()
+        assert non_versioned_attributes.get(queue_path) == {}
 
 
 @pytest.mark.asyncio
-class TestDeleteEmptyFormulaDir:
+class TestDeleteQueueDirsWithOnlyFormulas:
     async def test_removes_queue_with_only_formula_dir(self, tmp_path):
         formula_dir = settings.FORMULA_DIR_NAME
         queue_path = tmp_path / "ws_[1]" / "queues" / "q_[5]" / formula_dir
         await queue_path.mkdir(parents=True)
+        await (queue_path / "field.py").write_text("")
         # queue dir has only formula/
-        await delete_empty_formula_dir(tmp_path)
+        await delete_empty_folders(tmp_path)
         assert not await (tmp_path / "ws_[1]" / "queues" / "q_[5]").exists()
 
     async def test_does_not_remove_if_other_files(self, tmp_path):
@@ -81,6 +156,6 @@ class TestDeleteEmptyFormulaDir:
         queue_dir = tmp_path / "ws_[1]" / "queues" / "q_[5]"
         await (queue_dir / formula_dir).mkdir(parents=True)
         await (queue_dir / "queue.json").write_text("{}")
-        await delete_empty_formula_dir(tmp_path)
+        await delete_empty_folders(tmp_path)
         assert await queue_dir.exists()
         assert await (queue_dir / "queue.json").exists()
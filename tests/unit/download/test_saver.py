@@ -1,11 +1,13 @@
+import asyncio
 import io
 
 import pytest
 from anyio import Path
 
-from deployment_manager.commands.download.saver import WorkspaceSaver
+from deployment_manager.commands.download.saver import InboxSaver, RuleSaver, WorkspaceSaver
 from deployment_manager.commands.download.subdirectory import Subdirectory
 from deployment_manager.common.read_write import read_object_from_json
+from deployment_manager.utils.consts import settings
 from deployment_manager.utils.functions import templatize_name_id
 
 
@@ -127,6 +129,39 @@ async def test_save_workspace_ignores_unincluded_subdir(workspace_json, tmp_path
     assert not await object_path.exists()
 
 
+@pytest.mark.asyncio
+async def test_save_objects_concurrently(workspace_json: dict, tmp_path: Path, test_subdir: Subdirectory, monkeypatch):
+    monkeypatch.setattr(settings, "SAVE_CONCURRENCY", 3)
+    workspaces = [{**workspace_json, "id": id, "name": f"WS {id}"} for id in range(10)]
+
+    workspace_saver = WorkspaceSaver(
+        base_path=tmp_path,
+        objects=workspaces,
+        changed_files=[],
+        download_all=False,
+        subdirs=[test_subdir],
+    )
+
+    in_flight, max_in_flight = 0, 0
+    original_write_object = WorkspaceSaver.write_object
+
+    async def tracking_write_object(self, object_path, object):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        await original_write_object(self, object_path, object)
+        in_flight -= 1
+
+    monkeypatch.setattr(WorkspaceSaver, "write_object", tracking_write_object)
+    await workspace_saver.save_downloaded_objects()
+
+    assert max_in_flight == 3
+    for workspace in workspaces:
+        object_path = workspace_saver.construct_object_path(subdir=test_subdir, object=workspace)
+        assert await read_object_from_json(object_path) == workspace
+
+
 # Not working with CLI input...
 @pytest.mark.skip
 @pytest.mark.asyncio
@@ -160,3 +195,35 @@ async def test_get_subdir_from_user(
 
 
 # TODO: move Q into different WS -> queue, schema, inbox get put into the second WS and the first get removed
+
+
+def test_rule_uses_first_downloaded_queue(tmp_path: Path, test_subdir: Subdirectory):
+    queues = [
+        {"id": 1, "url": "https://x/api/v1/queues/1"},
+        {"id": 2, "url": "https://x/api/v1/queues/2"},
+    ]
+    rule_saver = RuleSaver(
+        base_path=tmp_path,
+        objects=[],
+        queues=queues,
+        changed_files=[],
+        subdirs=[test_subdir],
+    )
+
+    rule = {"id": 10, "queues": ["https://x/api/v1/queues/2", "https://x/api/v1/queues/1", "https://x/api/v1/queues/3"]}
+    assert rule_saver.find_queue_for_rule(rule) == queues[0]
+    assert rule_saver.find_queue_for_rule({"id": 11, "queues": ["https://x/api/v1/queues/3"]}) is None
+
+
+def test_inbox_without_queues_has_no_parent(tmp_path: Path, test_subdir: Subdirectory):
+    inbox_saver = InboxSaver(
+        base_path=tmp_path,
+        objects=[],
+        workspaces=[],
+        queues=[{"id": 1, "url": "https://x/api/v1/queues/1"}],
+        changed_files=[],
+        subdirs=[test_subdir],
+    )
+
+    assert inbox_saver.find_queue({"id": 5, "queues": []}) is None
+    assert inbox_saver.find_queue({"id": 6, "queues": ["https://x/api/v1/queues/1"]})["id"] == 1
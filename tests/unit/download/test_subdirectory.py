@@ -1,4 +1,5 @@
 from deployment_manager.commands.download.subdirectory import (
+    SubdirClassifier,
     Subdirectory,
     create_subdir_configuration,
 )
@@ -39,3 +40,24 @@ class TestCreateSubdirConfiguration:
         assert result["prod"].name == "prod"
         # When `value` is None, default Subdirectory fields are used
         assert result["prod"].include is False
+
+
+class TestSubdirClassifier:
+    def test_single_subdir_always_wins(self):
+        subdir = Subdirectory(name="only", regex="NOPE")
+        assert SubdirClassifier([subdir]).classify({"id": 1, "name": "whatever"}) == subdir
+
+    def test_object_id_has_priority_over_regex(self):
+        dev = Subdirectory(name="dev", regex="DEV", object_ids=[1])
+        prod = Subdirectory(name="prod", regex="PROD")
+        classifier = SubdirClassifier([dev, prod])
+        assert classifier.classify({"id": 1, "name": "WS [PROD]"}) == dev
+        assert classifier.classify({"id": 2, "name": "WS [PROD]"}) == prod
+
+    def test_first_matching_regex_wins(self):
+        test = Subdirectory(name="test", regex="TEST")
+        prod = Subdirectory(name="prod", regex="PROD")
+        classifier = SubdirClassifier([test, prod])
+        # PROD matches earlier in the name, but the test subdir is configured first
+        assert classifier.classify({"id": 1, "name": "PROD TEST"}) == test
+        assert classifier.classify({"id": 2, "name": "DEV"}) is None
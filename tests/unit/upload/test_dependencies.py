@@ -67,6 +67,17 @@ class TestMergeHookChanges:
         result = await merge_hook_changes([change], tmp_path)
         assert change in result
 
+    async def test_merged_hook_keeps_the_position_of_its_code(self, tmp_path):
+        hook_dir = tmp_path / "org" / "hooks"
+        await hook_dir.mkdir(parents=True)
+        await write_object_to_json(hook_dir / "h1.json", {"config": {"code": "old_code"}})
+        await write_str(hook_dir / "h1.py", "new_code")
+        other_change = (GIT_CHARACTERS.UPDATED, tmp_path / "workspace.json")
+
+        result = await merge_hook_changes([(GIT_CHARACTERS.UPDATED, hook_dir / "h1.py"), other_change], tmp_path)
+
+        assert result == [(GIT_CHARACTERS.UPDATED, hook_dir / "h1.json"), other_change]
+
 
 @pytest.mark.asyncio
 class TestMergeFormulaChanges:
@@ -114,6 +125,62 @@ class TestMergeFormulaChanges:
         result = await merge_formula_changes([change])
         assert change in result
 
+    async def test_formulas_of_one_schema_are_written_at_once(self, tmp_path):
+        queue_dir = tmp_path / "ws_[1]" / "queues" / "q_[5]"
+        formula_dir = queue_dir / settings.FORMULA_DIR_NAME
+        schema_path = queue_dir / "schema.json"
+        await formula_dir.mkdir(parents=True)
+        await write_object_to_json(
+            schema_path,
+            {
+                "content": [
+                    {
+                        "category": "section",
+                        "children": [
+                            {"id": "a", "category": "datapoint", "formula": "old_a"},
+                            {"id": "b", "category": "datapoint", "formula": "old_b"},
+                            {"id": "c", "category": "datapoint", "formula": "changed_in_json"},
+                        ],
+                    }
+                ]
+            },
+        )
+        await write_str(formula_dir / "a.py", "new_a")
+        await write_str(formula_dir / "b.py", "new_b")
+        await write_str(formula_dir / "c.py", "old_c")
+
+        changes = [
+            (GIT_CHARACTERS.UPDATED, formula_dir / "a.py"),
+            (GIT_CHARACTERS.UPDATED, schema_path),
+            (GIT_CHARACTERS.UPDATED, formula_dir / "b.py"),
+        ]
+        with patch(
+            "deployment_manager.commands.upload.dependencies.write_object_to_json", wraps=write_object_to_json
+        ) as write_mock:
+            result = await merge_formula_changes(changes)
+
+        assert result == [(GIT_CHARACTERS.UPDATED, schema_path)]
+        assert write_mock.call_count == 1
+        children = (await read_object_from_json(schema_path))["content"][0]["children"]
+        assert [child["formula"] for child in children] == ["new_a", "new_b", "changed_in_json"]
+        # The formula changed only in the JSON file is written to its code file
+        assert await (formula_dir / "c.py").read_text() == "changed_in_json"
+
+    async def test_merged_schema_keeps_the_position_of_its_first_formula(self, tmp_path):
+        queue_dir = tmp_path / "ws_[1]" / "queues" / "q_[5]"
+        formula_dir = queue_dir / settings.FORMULA_DIR_NAME
+        schema_path = queue_dir / "schema.json"
+        await formula_dir.mkdir(parents=True)
+        await write_object_to_json(schema_path, {"content": [{"id": "a", "category": "datapoint", "formula": "old"}]})
+        await write_str(formula_dir / "a.py", "new_a")
+        first_change = (GIT_CHARACTERS.UPDATED, tmp_path / "first.json")
+        other_change = (GIT_CHARACTERS.UPDATED, tmp_path / "other.json")
+        formula_change = (GIT_CHARACTERS.UPDATED, formula_dir / "a.py")
+
+        result = await merge_formula_changes([first_change, formula_change, other_change])
+
+        assert result == [first_change, (GIT_CHARACTERS.UPDATED, schema_path), other_change]
+
 
 def _client_with_obj(remote_obj=None, status_code=None):
     client = MagicMock()
@@ -175,6 +242,39 @@ class TestMarkUnstagedObjectsAsUpdated:
         )
         assert result == [(GIT_CHARACTERS.CREATED, path)]
 
+    async def test_prefetched_object_is_not_fetched_again(self, tmp_path):
+        org_path = tmp_path
+        path = Path("source/org/hooks/h.json")
+        await (org_path / path).parent.mkdir(parents=True)
+        await write_object_to_json(org_path / path, {"id": 1, "url": "https://api/v1/hooks/1"})
+
+        client = _client_with_obj(status_code=404)
+        result = await mark_unstaged_objects_as_updated(
+            [(GIT_CHARACTERS.CREATED, path)],
+            org_path,
+            client,
+            remote_objects={"https://api/v1/hooks/1": {"id": 1}},
+        )
+        assert result == [(GIT_CHARACTERS.UPDATED, path)]
+        client._http_client.request_json.assert_not_called()
+
+    async def test_object_missing_from_listing_is_fetched(self, tmp_path):
+        org_path = tmp_path
+        path = Path("source/org/hooks/h.json")
+        await (org_path / path).parent.mkdir(parents=True)
+        await write_object_to_json(org_path / path, {"id": 1, "url": "https://api/v1/hooks/1"})
+
+        # The listing did not return the object, but it still exists
+        client = _client_with_obj(remote_obj={"id": 1, "url": "https://api/v1/hooks/1"})
+        result = await mark_unstaged_objects_as_updated(
+            [(GIT_CHARACTERS.CREATED, path)],
+            org_path,
+            client,
+            remote_objects={"https://api/v1/hooks/1": None},
+        )
+        assert result == [(GIT_CHARACTERS.UPDATED, path)]
+        client._http_client.request_json.assert_awaited_once_with(method="GET", url="https://api/v1/hooks/1")
+
     async def test_organization_create_is_warned_and_skipped(self, tmp_path):
         org_path = tmp_path
         path = Path("source/org/organization.json")
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+from anyio import Path
+
+from deployment_manager.commands.upload import refresh
+from deployment_manager.commands.upload.directory import PushedObject
+from deployment_manager.commands.upload.refresh import find_related_urls, is_directory_moved
+
+BASE = "https://x.rossum.app/api/v1"
+
+
+def _pushed(remote_object: dict, previous_remote_object: dict = {}) -> PushedObject:
+    return PushedObject(
+        path=Path("org/dev/x.json"), remote_object=remote_object, previous_remote_object=previous_remote_object
+    )
+
+
+class TestFindRelatedUrls:
+    def test_includes_relations_before_and_after_the_push(self):
+        hook = _pushed(
+            {"url": f"{BASE}/hooks/1", "queues": [f"{BASE}/queues/2"], "run_after": [f"{BASE}/hooks/9"]},
+            {"url": f"{BASE}/hooks/1", "queues": [f"{BASE}/queues/3"]},
+        )
+
+        assert find_related_urls([hook]) == {f"{BASE}/queues/2", f"{BASE}/queues/3"}
+
+    def test_pushed_objects_are_refetched_only_when_related_to_another_pushed_object(self):
+        queue = _pushed({"url": f"{BASE}/queues/2", "schema": f"{BASE}/schemas/4", "inbox": None, "hooks": []})
+        schema = _pushed({"url": f"{BASE}/schemas/4", "queues": [f"{BASE}/queues/2"]})
+        hook = _pushed({"url": f"{BASE}/hooks/1", "queues": []})
+
+        assert find_related_urls([queue, schema, hook]) == {f"{BASE}/queues/2", f"{BASE}/schemas/4"}
+
+    def test_schemas_of_rules_are_refreshed(self):
+        # The server keeps schema.rules in sync
+        rule = _pushed(
+            {"url": f"{BASE}/rules/5", "schema": f"{BASE}/schemas/4"},
+            {"url": f"{BASE}/rules/5", "schema": f"{BASE}/schemas/3"},
+        )
+
+        assert find_related_urls([rule]) == {f"{BASE}/schemas/4", f"{BASE}/schemas/3"}
+
+
+@pytest.mark.asyncio
+class TestRefreshPushedObjects:
+    async def test_refresh_errors_are_displayed(self, monkeypatch):
+        class FakeDownloadDirectory:
+            def __init__(self, **kwargs):
+                self.errors = []
+
+            async def refresh_objects(self, remote_objects: list[dict], previous_paths: list[Path]):
+                self.errors.append("Cannot write hook")
+
+        displayed = []
+        monkeypatch.setattr(refresh, "DownloadOrganizationDirectory", FakeDownloadDirectory)
+        monkeypatch.setattr(refresh, "display_error", displayed.append)
+        directory = SimpleNamespace(
+            name="org",
+            org_id=1,
+            api_base=BASE,
+            subdirectories={},
+            project_path=Path("."),
+            client=None,
+            object_index=None,
+            display_label="org",
+            errors=[],
+            pushed_objects=[_pushed({"url": f"{BASE}/hooks/1", "name": "Hook"})],
+        )
+
+        assert await refresh.refresh_pushed_objects(directory)
+        assert len(displayed) == 1 and "Cannot write hook" in displayed[0]
+
+
+class TestIsDirectoryMoved:
+    def test_renamed_or_created_queues_move(self):
+        previous_queue = {"url": f"{BASE}/queues/2", "id": 2, "name": "Q", "workspace": f"{BASE}/workspaces/1"}
+
+        assert not is_directory_moved(_pushed({**previous_queue, "hooks": ["changed"]}, previous_queue))
+        assert is_directory_moved(_pushed({**previous_queue, "name": "Renamed"}, previous_queue))
+        assert is_directory_moved(_pushed(previous_queue))
+
+    def test_other_types_never_move_directories(self):
+        assert not is_directory_moved(_pushed({"url": f"{BASE}/hooks/1", "name": "New"}))
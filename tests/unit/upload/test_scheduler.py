@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from anyio import Path
+
+from deployment_manager.commands.upload.directory import ChangedObject
+from deployment_manager.commands.upload.scheduler import push_in_dependency_order
+from deployment_manager.utils.consts import GIT_CHARACTERS
+
+BASE = "https://x.rossum.app/api/v1"
+
+
+def _changed(url: str, operation=GIT_CHARACTERS.CREATED, **data) -> ChangedObject:
+    return ChangedObject(operation=operation, path=Path(f"{url.split('/')[-1]}.json"), data={"url": url, **data})
+
+
+class FakeServer:
+    def __init__(self, failing_urls: set = set()):
+        self.failing_urls = failing_urls
+        self.pushed = []
+        self.next_id = 100
+
+    async def push(self, object: ChangedObject):
+        await asyncio.sleep(0)
+        self.pushed.append((object.data["url"], dict(object.data)))
+        if object.data["url"] in self.failing_urls:
+            return None
+        if object.operation != GIT_CHARACTERS.CREATED:
+            return object.data
+        self.next_id += 1
+        return {**object.data, "url": f"{object.data['url'].rsplit('/', 1)[0]}/{self.next_id}"}
+
+
+@pytest.mark.asyncio
+class TestPushInDependencyOrder:
+    async def test_creates_prerequisites_first_and_backfills_their_urls(self):
+        queue = _changed(f"{BASE}/queues/1", workspace=f"{BASE}/workspaces/1", schema=f"{BASE}/schemas/1")
+        workspace = _changed(f"{BASE}/workspaces/1")
+        schema = _changed(f"{BASE}/schemas/1")
+        hook = _changed(f"{BASE}/hooks/5", operation=GIT_CHARACTERS.UPDATED, queues=[f"{BASE}/queues/2"])
+        server = FakeServer()
+
+        results = await push_in_dependency_order([queue, workspace, schema, hook], server.push, lambda *args: None)
+
+        order = [url for url, _ in server.pushed]
+        assert order.index(f"{BASE}/queues/1") > order.index(f"{BASE}/workspaces/1")
+        assert order.index(f"{BASE}/queues/1") > order.index(f"{BASE}/schemas/1")
+        assert results[0]["workspace"] == results[1]["url"]
+        assert results[0]["schema"] == results[2]["url"]
+
+    async def test_skips_dependents_of_failed_objects(self):
+        workspace = _changed(f"{BASE}/workspaces/1")
+        queue = _changed(f"{BASE}/queues/1", workspace=f"{BASE}/workspaces/1")
+        skipped = []
+        server = FakeServer(failing_urls={f"{BASE}/workspaces/1"})
+
+        await push_in_dependency_order(
+            [workspace, queue], server.push, lambda object, prerequisite: skipped.append((object, prerequisite))
+        )
+
+        assert [url for url, _ in server.pushed] == [f"{BASE}/workspaces/1"]
+        assert skipped == [(queue, workspace)]
+
+    async def test_breaks_cycles_on_list_references(self):
+        queue = _changed(f"{BASE}/queues/1", workspace=f"{BASE}/workspaces/9", hooks=[f"{BASE}/hooks/1"])
+        hook = _changed(f"{BASE}/hooks/1", queues=[f"{BASE}/queues/1"])
+        server = FakeServer()
+
+        results = await push_in_dependency_order([queue, hook], server.push, lambda *args: None)
+
+        assert all(results)
+        (first_url, first_data), (_, second_data) = server.pushed
+        created_urls = {f"{BASE}/queues/1": results[0]["url"], f"{BASE}/hooks/1": results[1]["url"]}
+        # The first object is pushed without the reference, the second one links both
+        assert not (first_data.get("hooks") or first_data.get("queues"))
+        assert (second_data.get("hooks") or second_data.get("queues")) == [created_urls[first_url]]